@@ -6,6 +6,16 @@ if [ -n "${DATABASE_URL-}" ]; then
   alembic upgrade head || true
 fi
 
-# start app
-exec uvicorn app.main:app --host 0.0.0.0 --port 8000
+# multiprocess metrics: workers share metric files in this directory; stale files from a previous run must go
+if [ -n "${PROMETHEUS_MULTIPROC_DIR-}" ]; then
+  rm -rf "${PROMETHEUS_MULTIPROC_DIR:?}"
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
+# start app: WEB_CONCURRENCY > 1 (or 0 = one per CPU) runs the pre-fork launcher, as does worker
+# recycling, which needs its supervisor to replace the recycled worker
+if [ "${WEB_CONCURRENCY:-1}" != "1" ] || [ "${WORKER_MAX_REQUESTS:-0}" != "0" ] || [ "${WORKER_MAX_RSS_MB:-0}" != "0" ]; then
+  exec python -m app.server --host 0.0.0.0 --port 8000
+fi
+exec uvicorn --factory app.main:create_app --host 0.0.0.0 --port 8000
 
@@ -0,0 +1,103 @@
+"""Benchmark the per-request overhead of the access-log middleware.
+
+Drives a minimal Starlette app directly over ASGI (no HTTP client or socket in the way) with
+no middleware, the previous BaseHTTPMiddleware-based logger and the current pure ASGI
+LoggingMiddleware, and prints the mean cost per request. Access lines are formatted and
+written to os.devnull so log formatting is included in the numbers.
+
+Usage:
+    python scripts/bench_logging_middleware.py --requests 20000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+
+def _legacy_middleware():
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    logger = logging.getLogger('app.middleware')
+
+    class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+        # the BaseHTTPMiddleware implementation this benchmark compares against
+        async def dispatch(self, request, call_next):
+            client_host = request.client.host if request.client else "unknown"
+            path = request.url.path
+            qs = f"?{request.url.query}" if request.url.query else ""
+            cid = request.headers.get('X-Correlation-ID') or request.headers.get('X-Request-ID')
+            logger.info("%s - %s %s%s - start (cid=%s)", client_host, request.method, path, qs, cid)
+            start = time.time()
+            response = await call_next(request)
+            elapsed_ms = (time.time() - start) * 1000
+            size = response.headers.get('content-length') or 'unknown'
+            logger.info("%s - %s %s%s - %s - %s bytes - %.2fms (cid=%s)", client_host, request.method, path, qs, response.status_code, size, elapsed_ms, cid)
+            return response
+
+    return LegacyLoggingMiddleware
+
+
+def _build_app(middleware_cls):
+    from starlette.applications import Starlette
+    from starlette.middleware import Middleware
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    async def ping(request):
+        return JSONResponse({"status": "ok"})
+
+    middleware = [Middleware(middleware_cls)] if middleware_cls else []
+    return Starlette(routes=[Route("/ping", ping)], middleware=middleware)
+
+
+async def _drive(app, requests: int) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/ping", "raw_path": b"/ping", "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"x-correlation-id", b"bench-cid")],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(min(requests, 500)):  # warm up
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+    from app.middleware.logging_middleware import LoggingMiddleware
+
+    devnull = open(os.devnull, "w")
+    handler = logging.StreamHandler(devnull)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    log = logging.getLogger('app.middleware')
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+    baseline = None
+    for name, cls in (("none", None), ("BaseHTTPMiddleware", _legacy_middleware()), ("pure ASGI", LoggingMiddleware)):
+        per_request = asyncio.run(_drive(_build_app(cls), args.requests))
+        baseline = per_request if baseline is None else baseline
+        print(f"{name:<20} {per_request * 1e6:8.1f} us/request  (+{(per_request - baseline) * 1e6:.1f} us middleware)")
+    devnull.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark login throughput of a single app worker.
+
+Runs the app in-process against a throwaway SQLite DB, registers one user and then
+fires concurrent logins for a fixed duration while probing /health latency, which shows
+how much password hashing stalls the event loop.
+
+Usage:
+    python scripts/bench_login.py --seconds 10 --concurrency 16 --hash-workers 2
+    python scripts/bench_login.py --hash-workers 0   # thread pool instead of process pool
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+async def _run(seconds: float, concurrency: int) -> None:
+    import httpx
+    from app.main import create_app
+
+    app = create_app(enable_rate_limiting=False)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            username = f"bench_{uuid.uuid4().hex[:8]}"
+            r = await client.post("/api/v1/auth/register", json={"username": username, "email": f"{username}@example.com", "password": "pw"})
+            r.raise_for_status()
+
+            login_latencies: list[float] = []
+            health_latencies: list[float] = []
+            errors = 0
+            deadline = time.perf_counter() + seconds
+
+            async def login_loop() -> None:
+                nonlocal errors
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    resp = await client.post("/api/v1/auth/login", json={"username": username, "password": "pw"})
+                    if resp.status_code == 200:
+                        login_latencies.append(time.perf_counter() - start)
+                    else:
+                        errors += 1
+
+            async def health_loop() -> None:
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    await client.get("/health")
+                    health_latencies.append(time.perf_counter() - start)
+                    await asyncio.sleep(0.05)
+
+            await asyncio.gather(health_loop(), *(login_loop() for _ in range(concurrency)))
+
+    print(f"logins/s:        {len(login_latencies) / seconds:.1f}")
+    print(f"login p50/p95:   {statistics.median(login_latencies or [0]) * 1000:.1f} / {_percentile(login_latencies, 0.95) * 1000:.1f} ms")
+    print(f"/health p50/p95: {statistics.median(health_latencies or [0]) * 1000:.1f} / {_percentile(health_latencies, 0.95) * 1000:.1f} ms")
+    print(f"rejected/errors: {errors}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--hash-workers", type=int, default=None, help="overrides PASSWORD_HASH_WORKERS")
+    args = parser.parse_args()
+
+    db_file = Path(tempfile.gettempdir()) / f"bench_login_{uuid.uuid4().hex}.sqlite"
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_file}"
+    os.environ["REDIS_URL"] = ""
+    if args.hash_workers is not None:
+        os.environ["PASSWORD_HASH_WORKERS"] = str(args.hash_workers)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+    try:
+        asyncio.run(_run(args.seconds, args.concurrency))
+    finally:
+        db_file.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
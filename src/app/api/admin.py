@@ -0,0 +1,119 @@
+import asyncio
+import logging
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from app.db.models import User
+from app.constants import PROFILER_MAX_SECONDS
+from app.hotkeys import HOTKEY_CATEGORIES, top_hot_keys
+from app import memory_diagnostics
+from app.memory_diagnostics import KEY_TYPES, SnapshotNotFound
+from app.profiler import ProfilerBusy, sample_stacks
+from app.security.dependencies import get_current_admin_user
+from app.api.routing import TimedAPIRoute
+
+router = APIRouter(prefix="/api/v1/admin", tags=["admin"], route_class=TimedAPIRoute)
+logger = logging.getLogger('app.api.admin')
+
+class HotKeyOut(BaseModel):
+    key: str
+    count: int
+
+@router.get("/hotkeys", response_model=dict[str, list[HotKeyOut]])
+async def get_hot_keys(category: str | None = None, limit: int = 20, admin_user: User = Depends(get_current_admin_user)):
+    """Hottest book ids, cover ids and cache keys by estimated recent access count."""
+    if category is not None and category not in HOTKEY_CATEGORIES:
+        raise HTTPException(status_code=400, detail=f"Unknown category; expected one of {', '.join(HOTKEY_CATEGORIES)}")
+    categories = [category] if category else list(HOTKEY_CATEGORIES)
+    return {c: [HotKeyOut(key=k, count=n) for k, n in top_hot_keys(c, limit)] for c in categories}
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(5.0, gt=0, le=PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(10.0, ge=1, le=1000),
+    admin_user: User = Depends(get_current_admin_user),
+):
+    """Sample this worker's thread stacks for `seconds` and return them in collapsed-stack format
+    (feed to flamegraph.pl or speedscope). Only one profile runs per worker at a time.
+    """
+    logger.info("Profiling worker for %.1fs at %.0fms interval (admin id=%s)", seconds, interval_ms, admin_user.id)
+    try:
+        result = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000)
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    return PlainTextResponse(
+        result.collapsed(),
+        headers={
+            "X-Profile-Samples": str(result.samples),
+            "X-Profile-Duration": f"{result.duration:.3f}",
+            "X-Profile-Interval-Ms": f"{result.interval * 1000:.1f}",
+            "X-Profile-Overhead": f"{result.overhead:.4f}",
+        },
+    )
+
+def _check_key_type(key_type: str) -> None:
+    if key_type not in KEY_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown key_type; expected one of {', '.join(KEY_TYPES)}")
+
+@router.post("/memory/tracemalloc/start")
+async def start_tracemalloc(frames: int = Query(1, ge=1, le=64), admin_user: User = Depends(get_current_admin_user)):
+    """Start tracing allocations in this worker. Tracing slows every allocation down; stop it when done."""
+    started = memory_diagnostics.start_tracing(frames)
+    if started:
+        logger.info("tracemalloc started with %d frames (admin id=%s)", frames, admin_user.id)
+    return memory_diagnostics.tracing_status()
+
+@router.post("/memory/tracemalloc/stop")
+async def stop_tracemalloc(admin_user: User = Depends(get_current_admin_user)):
+    """Stop tracing and discard the stored snapshots."""
+    memory_diagnostics.stop_tracing()
+    logger.info("tracemalloc stopped (admin id=%s)", admin_user.id)
+    return memory_diagnostics.tracing_status()
+
+@router.get("/memory/tracemalloc")
+async def tracemalloc_status(admin_user: User = Depends(get_current_admin_user)):
+    return memory_diagnostics.tracing_status()
+
+@router.post("/memory/snapshots", status_code=201)
+async def take_memory_snapshot(admin_user: User = Depends(get_current_admin_user)):
+    """Snapshot the traced allocations; only the most recent few snapshots are kept."""
+    try:
+        snapshot_id = await asyncio.to_thread(memory_diagnostics.take_snapshot)
+    except RuntimeError:
+        raise HTTPException(status_code=409, detail="tracemalloc is not running")
+    return {"id": snapshot_id}
+
+@router.get("/memory/snapshots")
+async def list_memory_snapshots(admin_user: User = Depends(get_current_admin_user)):
+    return memory_diagnostics.list_snapshots()
+
+@router.get("/memory/snapshots/{snapshot_id}/top")
+async def snapshot_top(
+    snapshot_id: int,
+    key_type: str = "lineno",
+    limit: int = Query(20, ge=1, le=500),
+    admin_user: User = Depends(get_current_admin_user),
+):
+    """Allocation sites holding the most memory in a snapshot, grouped by line, file or traceback."""
+    _check_key_type(key_type)
+    try:
+        return await asyncio.to_thread(memory_diagnostics.top_allocations, snapshot_id, key_type, limit)
+    except SnapshotNotFound:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+
+@router.get("/memory/snapshots/{snapshot_id}/diff/{base_id}")
+async def snapshot_diff(
+    snapshot_id: int,
+    base_id: int,
+    key_type: str = "lineno",
+    limit: int = Query(20, ge=1, le=500),
+    admin_user: User = Depends(get_current_admin_user),
+):
+    """Allocation sites that grew the most between snapshot `base_id` and `snapshot_id`."""
+    _check_key_type(key_type)
+    try:
+        return await asyncio.to_thread(memory_diagnostics.diff_snapshots, snapshot_id, base_id, key_type, limit)
+    except SnapshotNotFound:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
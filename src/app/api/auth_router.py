@@ -2,17 +2,19 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from ..schemas.auth import LoginRequest, TokenResponse, RegisterRequest, RefreshRequest
 from ..security.jwt import create_access_token, create_refresh_token_string, REFRESH_TOKEN_EXPIRE_DAYS
 from ..db.models import User, RefreshToken
-from ..security.password import verify_password, hash_password
+from ..security.password import verify_password_async, hash_password_async
 from app.db.base import get_session
 from app.security.dependencies import get_current_user, get_current_user_optional
+from app.security.principal_cache import invalidate_principal
 import logging
 import uuid
 import datetime
 from datetime import timezone
+from app.api.routing import TimedAPIRoute
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
+router = APIRouter(prefix="/api/v1/auth", tags=["auth"], route_class=TimedAPIRoute)
 
 @router.post("/login", response_model=TokenResponse)
 async def login(req: LoginRequest):
@@ -25,7 +27,7 @@ async def login(req: LoginRequest):
         if not user:
             logger.info("Authentication failed for username/email=%s: user not found", req.username)
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
-        if not verify_password(req.password, user.password_hash):
+        if not await verify_password_async(req.password, user.password_hash):
             logger.info("Authentication failed for username/email=%s: wrong password", req.username)
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
         access_token = create_access_token(subject=user.id, user_type=getattr(user, 'type', None))
@@ -49,7 +51,7 @@ async def register(req: RegisterRequest):
             logger.info("Registration attempt with existing username/email=%s/%s", req.username, req.email)
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username or email already in use")
         user_id = str(uuid.uuid4())
-        u = User(id=user_id, username=req.username, email=req.email, password_hash=hash_password(req.password), type=0)
+        u = User(id=user_id, username=req.username, email=req.email, password_hash=await hash_password_async(req.password), type=0)
         session.add(u)
         await session.commit()
         await session.refresh(u)
@@ -74,7 +76,11 @@ async def refresh_token(req: RefreshRequest):
         if not rec:
             logger.info("Invalid refresh token presented")
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
-        if rec.expires_at < datetime.datetime.now(timezone.utc):
+        expires_at = rec.expires_at
+        if expires_at.tzinfo is None:
+            # DATETIME columns come back naive (SQLite, MySQL); values are stored in UTC
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if expires_at < datetime.datetime.now(timezone.utc):
             logger.info("Expired refresh token for user_id=%s", rec.user_id)
             # remove expired token
             await session.delete(rec)
@@ -121,6 +127,7 @@ async def logout(payload: dict = None, current_user: User | None = Depends(get_c
                 return {"ok": True}
             await session.delete(rec)
             await session.commit()
+            await invalidate_principal(rec.user_id)
             logger.info("Revoked refresh token for user_id=%s", rec.user_id)
             return {"ok": True}
 
@@ -132,6 +139,7 @@ async def logout(payload: dict = None, current_user: User | None = Depends(get_c
             for t in tokens:
                 await session.delete(t)
             await session.commit()
+            await invalidate_principal(current_user.id)
             logger.info("Revoked %d refresh tokens for user id=%s", len(tokens), current_user.id)
             return {"ok": True}
 
@@ -7,8 +7,9 @@ from app.db.base import get_session
 from app.db.models import Author, User
 from app.schemas.pagination import PagedResponse
 from app.security.dependencies import get_current_user
+from app.api.routing import TimedAPIRoute
 
-router = APIRouter(prefix="/api/v1/authors", tags=["authors"])
+router = APIRouter(prefix="/api/v1/authors", tags=["authors"], route_class=TimedAPIRoute)
 logger = logging.getLogger('app.api.authors')
 
 class AuthorIn(BaseModel):
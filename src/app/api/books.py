@@ -5,16 +5,25 @@ from pydantic import BaseModel
 
 from app.db import get_storage_dep, BlobStorage
 from app.db.base import get_session
+from app.bloom import might_exist, record_lookup_result
 from app.db.models import Book, UserBookLikes, User
-from app.redis_client import get_redis_dep
+from app.hotkeys import record_hot_key
+from app.redis_client import cache_key_prefix, get_redis_dep
 from app.storage import get_storage
 from ..security.dependencies import get_current_user, get_current_admin_user
 from app.schemas.pagination import PagedResponse
+from app.server_timing import timed
+from app.tracing import span
+from app.api.routing import TimedAPIRoute
 
-router = APIRouter(prefix="/api/v1/books", tags=["books"])
+router = APIRouter(prefix="/api/v1/books", tags=["books"], route_class=TimedAPIRoute)
 logger = logging.getLogger('app.api.books')
 
 CACHE_TTL = 60  # seconds
+BOOK_KEY_PREFIX = cache_key_prefix("book")
+
+def _book_cache_key(book_id: str) -> str:
+    return f"{BOOK_KEY_PREFIX}{book_id}"
 
 class BookIn(BaseModel):
     id: str
@@ -73,10 +82,13 @@ async def create_book(book_in: BookIn, current_user: User = Depends(get_current_
 
 @router.get("/{book_id}", response_model=BookOut)
 async def get_book(book_id: str, redis=Depends(get_redis_dep)):
-    cache_key = f"book:{book_id}"
+    if not might_exist("book", book_id):
+        raise HTTPException(status_code=404, detail="Book not found")
+    cache_key = _book_cache_key(book_id)
     cached = await redis.get(cache_key)
     if cached:
         logger.debug("Cache hit for %s", cache_key)
+        record_hot_key("book", book_id)
         # cached is JSON string; return it directly
         from json import loads
         return BookOut.model_validate(loads(cached))
@@ -84,9 +96,12 @@ async def get_book(book_id: str, redis=Depends(get_redis_dep)):
 
     async with get_session() as session:
         b = await session.get(Book, book_id)
+        record_lookup_result("book", b is not None)
         if not b:
             logger.info("Book not found: %s", book_id)
             raise HTTPException(status_code=404, detail="Book not found")
+        # only ids that exist are counted, so 404 probes cannot flood the tracker
+        record_hot_key("book", book_id)
         book_out = BookOut.model_validate(b)
         # cache
         from json import dumps
@@ -94,7 +109,7 @@ async def get_book(book_id: str, redis=Depends(get_redis_dep)):
         return book_out
 
 @router.delete("/{book_id}")
-async def delete_book(book_id: str):
+async def delete_book(book_id: str, redis=Depends(get_redis_dep)):
     async with get_session() as session:
         b = await session.get(Book, book_id)
         if not b:
@@ -109,6 +124,7 @@ async def delete_book(book_id: str):
                 logger.exception("Failed to remove cover file %s: %s", getattr(b, 'cover_path', None), exc)
         await session.delete(b)
         await session.commit()
+        await redis.delete(_book_cache_key(book_id))
         logger.info("Book deleted id=%s", book_id)
         return {"ok": True}
 
@@ -199,11 +215,15 @@ async def like_book(book_id: str, wishlist: bool | None = None, favourite: bool
 
 @router.get("/{book_id}/cover")
 async def get_cover(book_id: str, storage: BlobStorage = Depends(get_storage_dep)):
+    if not might_exist("book", book_id):
+        raise HTTPException(status_code=404, detail="Book not found")
     # Prefer storage abstraction first
     try:
-        blob = await storage.get_blob(book_id)
+        with timed("storage"), span("storage.get_blob", key=book_id):
+            blob = await storage.get_blob(book_id)
         if blob:
             logger.debug("Blob storage returned data for book_id=%s", book_id)
+            record_hot_key("cover", book_id)
             return Response(content=blob, media_type="application/octet-stream")
     except Exception:
         logger.exception("Error fetching blob from storage for book_id=%s", book_id)
@@ -214,13 +234,15 @@ async def get_cover(book_id: str, storage: BlobStorage = Depends(get_storage_dep
         if not book:
             logger.info("Book not found for cover fetch: %s", book_id)
             raise HTTPException(status_code=404, detail="Book not found")
+        record_hot_key("cover", book_id)
         # Prefer filesystem path if present
         if getattr(book, "cover_path", None):
             from pathlib import Path
             p = Path(book.cover_path)
             import asyncio
             try:
-                data = await asyncio.to_thread(p.read_bytes)
+                with timed("storage"), span("storage.read_file", path=str(p)):
+                    data = await asyncio.to_thread(p.read_bytes)
                 return Response(content=data, media_type="application/octet-stream")
             except Exception as exc:
                 logging.getLogger(__name__).exception("Failed to read cover file %s: %s", p, exc)
@@ -231,7 +253,7 @@ async def get_cover(book_id: str, storage: BlobStorage = Depends(get_storage_dep
         raise HTTPException(status_code=404, detail="Cover not found")
 
 @router.put("/{book_id}", response_model=BookOut)
-async def update_book(book_id: str, book_in: BookIn, current_user: User = Depends(get_current_user)):
+async def update_book(book_id: str, book_in: BookIn, current_user: User = Depends(get_current_user), redis=Depends(get_redis_dep)):
     if getattr(current_user, 'type', 0) != 1:
         logger.warning("Unauthorized book update attempt by user id=%s", getattr(current_user, 'id', None))
         raise HTTPException(status_code=403, detail="Admin privileges required")
@@ -247,11 +269,12 @@ async def update_book(book_id: str, book_in: BookIn, current_user: User = Depend
         session.add(b)
         await session.commit()
         await session.refresh(b)
+        await redis.delete(_book_cache_key(book_id))
         logger.info("Book updated id=%s title=%s by user id=%s", b.id, b.title, getattr(current_user, 'id', None))
         return BookOut.model_validate(b)
 
 @router.patch("/{book_id}", response_model=BookOut)
-async def patch_book(book_id: str, book_in: BookIn, current_user: User = Depends(get_current_user)):
+async def patch_book(book_id: str, book_in: BookIn, current_user: User = Depends(get_current_user), redis=Depends(get_redis_dep)):
     if getattr(current_user, 'type', 0) != 1:
         raise HTTPException(status_code=403, detail="Admin privileges required")
     async with get_session() as session:
@@ -269,6 +292,7 @@ async def patch_book(book_id: str, book_in: BookIn, current_user: User = Depends
         session.add(b)
         await session.commit()
         await session.refresh(b)
+        await redis.delete(_book_cache_key(book_id))
         return BookOut.model_validate(b)
 
 @router.post("/{book_id}/cover")
@@ -284,7 +308,8 @@ async def upload_cover(book_id: str, request: Request, current_user: User = Depe
         if not book:
             raise HTTPException(status_code=404, detail="Book not found")
         # if storage.save_cover returns a path, store cover_path; if None, store blob
-        result = await storage.save_cover(book_id, data)
+        with timed("storage"), span("storage.save_cover", key=book_id, size=len(data)):
+            result = await storage.save_cover(book_id, data)
         if result is None:
             # DB storage: write to blob column
             book.cover = data
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Response
 from pydantic import BaseModel
 from ..db.models import Comment, UserBookReview
+from app.bloom import might_exist, record_lookup_result
 from app.db.base import get_session
 from app.db.models import User
 from ..schemas.pagination import PagedResponse
 from ..security.dependencies import get_current_user
+from app.api.routing import TimedAPIRoute
 
-router = APIRouter(prefix="/api/v1/comments", tags=["comments"])
+router = APIRouter(prefix="/api/v1/comments", tags=["comments"], route_class=TimedAPIRoute)
 
 
 class CommentIn(BaseModel):
@@ -43,8 +45,11 @@ async def create_comment(c: CommentIn, current_user: User = Depends(get_current_
 
 @router.get("/{comment_id}", response_model=CommentOut)
 async def get_comment(comment_id: str):
+    if not might_exist("comment", comment_id):
+        raise HTTPException(status_code=404, detail="Comment not found")
     async with get_session() as session:
         cm = await session.get(Comment, comment_id)
+        record_lookup_result("comment", cm is not None)
         if not cm:
             raise HTTPException(status_code=404, detail="Comment not found")
         return CommentOut.model_validate(cm)
@@ -3,8 +3,9 @@ from pydantic import BaseModel
 from ..db.models import UserBookLikes
 from app.db.base import get_session
 from app.db.models import User
+from app.api.routing import TimedAPIRoute
 
-router = APIRouter(prefix="/api/v1/likes", tags=["likes"])
+router = APIRouter(prefix="/api/v1/likes", tags=["likes"], route_class=TimedAPIRoute)
 
 class LikeIn(BaseModel):
     book_id: str
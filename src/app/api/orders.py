@@ -4,8 +4,9 @@ from ..db.models import Order
 from app.db.base import get_session
 from app.security.dependencies import get_current_user
 from app.db.models import User, BookOrderItem, Book
+from app.api.routing import TimedAPIRoute
 
-router = APIRouter(prefix="/api/v1/orders", tags=["orders"])
+router = APIRouter(prefix="/api/v1/orders", tags=["orders"], route_class=TimedAPIRoute)
 
 class OrderIn(BaseModel):
     id: str
@@ -3,12 +3,14 @@ from pydantic import BaseModel
 from sqlalchemy import select, asc, desc, func
 import math
 
+from app.bloom import might_exist, record_lookup_result
 from app.db.base import get_session
 from ..db.models import UserBookReview, Book, User, Comment, CommentLike
 from ..schemas.pagination import PagedResponse
 from ..security.dependencies import get_current_user
+from app.api.routing import TimedAPIRoute
 
-router = APIRouter(prefix="/api/v1/reviews", tags=["reviews"])
+router = APIRouter(prefix="/api/v1/reviews", tags=["reviews"], route_class=TimedAPIRoute)
 
 
 class ReviewIn(BaseModel):
@@ -47,8 +49,11 @@ async def create_review(r: ReviewIn, current_user: User = Depends(get_current_us
 
 @router.get("/{review_id}", response_model=ReviewOut)
 async def get_review(review_id: str):
+    if not might_exist("review", review_id):
+        raise HTTPException(status_code=404, detail="Review not found")
     async with get_session() as session:
         rev = await session.get(UserBookReview, review_id)
+        record_lookup_result("review", rev is not None)
         if not rev:
             raise HTTPException(status_code=404, detail="Review not found")
         return ReviewOut.model_validate(rev)
@@ -0,0 +1,35 @@
+import functools
+import inspect
+import time
+from typing import Any, Callable
+
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+
+from app.server_timing import server_timing
+
+
+def _mark_endpoint_return(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    # sync endpoints keep running in the threadpool, as FastAPI would run them unwrapped
+    is_coroutine = inspect.iscoroutinefunction(endpoint)
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        try:
+            if is_coroutine:
+                return await endpoint(*args, **kwargs)
+            return await run_in_threadpool(endpoint, *args, **kwargs)
+        finally:
+            st = server_timing.get()
+            if st is not None:
+                st.endpoint_returned = time.perf_counter()
+    return wrapper
+
+
+class TimedAPIRoute(APIRoute):
+    """APIRoute recording when the endpoint function returns, so the Server-Timing header can
+    report response rendering (response-model validation and JSON serialization) separately.
+    FastAPI still inspects the original signature through `__wrapped__`.
+    """
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _mark_endpoint_return(endpoint), **kwargs)
@@ -3,16 +3,17 @@ from pydantic import BaseModel, EmailStr
 from app.db.models import User
 from app.db.base import get_session
 from app.schemas.pagination import PagedResponse
-from app.security.password import hash_password
+from app.security.password import hash_password_async
 from app.db.models import UserBookLikes
 from sqlalchemy import select, asc, desc, func
 from app.security.dependencies import get_current_user, get_current_admin_user
 import logging
 import math
+from app.api.routing import TimedAPIRoute
 
 logger = logging.getLogger('app.api.users')
 
-router = APIRouter(prefix="/api/v1/users", tags=["users"])
+router = APIRouter(prefix="/api/v1/users", tags=["users"], route_class=TimedAPIRoute)
 
 class UserIn(BaseModel):
     id: str
@@ -52,7 +53,7 @@ async def create_user(user_in: UserIn, current_user: User = Depends(get_current_
         if existing:
             logger.info("Attempt to create user with existing username/email=%s/%s", user_in.username, user_in.email)
             raise HTTPException(status_code=400, detail="Username or email already in use")
-        u = User(id=user_in.id, username=user_in.username, email=user_in.email, password_hash=hash_password(user_in.password), type=user_in.type)
+        u = User(id=user_in.id, username=user_in.username, email=user_in.email, password_hash=await hash_password_async(user_in.password), type=user_in.type)
         session.add(u)
         await session.commit()
         await session.refresh(u)
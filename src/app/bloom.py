@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import logging
+import math
+
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from app.config import settings
+from app.db.base import get_session
+from app.db.models import Book, UserBookReview, Comment
+from app.metrics import inc_bloom_lookup, register_collector, register_cache_size_source
+
+logger = logging.getLogger(__name__)
+
+# entity name -> model whose primary key `id` is tracked
+BLOOM_ENTITIES = {"book": Book, "review": UserBookReview, "comment": Comment}
+# session.info key for ids deleted in the current transaction (removed from filters on commit)
+_PENDING_DELETES = "bloom_pending_deletes"
+
+
+class CountingBloomFilter:
+    """Bloom filter with 8-bit counters so ids can be removed again.
+    Membership answers are "definitely absent" or "maybe present"; saturated counters are never
+    decremented. `remove` must only be called for keys that were added: a false-positive key would
+    decrement counters shared with real members and cause false negatives.
+    """
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self._counters = bytearray(self.size)
+        self.count = 0
+
+    def _indexes(self, key: str) -> list[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str) -> None:
+        counters = self._counters
+        for idx in self._indexes(key):
+            if counters[idx] < 255:
+                counters[idx] += 1
+        self.count += 1
+
+    def remove(self, key: str) -> None:
+        counters = self._counters
+        for idx in self._indexes(key):
+            if 0 < counters[idx] < 255:
+                counters[idx] -= 1
+        self.count = max(0, self.count - 1)
+
+    def __contains__(self, key: str) -> bool:
+        counters = self._counters
+        return all(counters[idx] for idx in self._indexes(key))
+
+    def fill_ratio(self) -> float:
+        return (self.size - self._counters.count(0)) / self.size
+
+    @property
+    def nbytes(self) -> int:
+        return self.size
+
+
+class _EntityFilter:
+    """The filter for one entity plus the bookkeeping needed to rebuild it without losing inserts."""
+    def __init__(self):
+        self.filter: CountingBloomFilter | None = None
+        # ids inserted while a rebuild is scanning the table; replayed into the new filter
+        self._inserted_during_rebuild: list[str] | None = None
+        # ids this process added to the current filter, the only ones that are safe to remove: a
+        # deleted row may have been inserted elsewhere after the last rebuild and never been added
+        self._added: set[str] = set()
+
+    def add(self, key: str) -> None:
+        if self.filter is not None:
+            self.filter.add(key)
+            self._added.add(key)
+        if self._inserted_during_rebuild is not None:
+            self._inserted_during_rebuild.append(key)
+
+    def remove(self, key: str) -> None:
+        # anything else stays a false positive until the next rebuild drops it
+        if self.filter is not None and key in self._added:
+            self._added.discard(key)
+            self.filter.remove(key)
+
+    async def rebuild(self, model) -> None:
+        self._inserted_during_rebuild = []
+        try:
+            ids: list[str] = []
+            async with get_session() as session:
+                result = await session.stream_scalars(select(model.id).execution_options(yield_per=10_000))
+                async for id_ in result:
+                    ids.append(id_)
+            # leave headroom so the error rate holds while the table grows between rebuilds
+            new = CountingBloomFilter(max(settings.BLOOM_FILTER_CAPACITY, 2 * len(ids)), settings.BLOOM_FILTER_ERROR_RATE)
+            for id_ in ids:
+                new.add(id_)
+            for id_ in self._inserted_during_rebuild:
+                new.add(id_)
+            self.filter = new
+            self._added = set(self._inserted_during_rebuild)
+        finally:
+            self._inserted_during_rebuild = None
+
+
+_filters: dict[str, _EntityFilter] = {name: _EntityFilter() for name in BLOOM_ENTITIES}
+_refresh_task: asyncio.Task | None = None
+
+
+def might_exist(entity: str, entity_id: str) -> bool:
+    """False only when `entity_id` certainly does not exist; True when unknown or filters are not built."""
+    if not settings.BLOOM_FILTER_ENABLED:
+        return True
+    f = _filters[entity].filter
+    if f is None:
+        return True
+    if entity_id in f:
+        return True
+    inc_bloom_lookup(entity, "negative")
+    return False
+
+
+def record_lookup_result(entity: str, found: bool) -> None:
+    """Record the DB outcome of a lookup the filter let through, to track the false-positive rate."""
+    if settings.BLOOM_FILTER_ENABLED and _filters[entity].filter is not None:
+        inc_bloom_lookup(entity, "found" if found else "false_positive")
+
+
+async def rebuild_bloom_filters() -> None:
+    for name, model in BLOOM_ENTITIES.items():
+        try:
+            await _filters[name].rebuild(model)
+        except Exception:
+            logger.exception("Failed to build bloom filter for %s; lookups pass through until the next rebuild", name)
+            _filters[name].filter = None
+    logger.info("Bloom filters built: %s", {n: f.filter.count for n, f in _filters.items() if f.filter is not None})
+
+
+async def _refresh_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        await rebuild_bloom_filters()
+
+
+async def start_bloom_filters() -> None:
+    """Build the filters and start the periodic rebuild that picks up rows written by other processes."""
+    global _refresh_task
+    if not settings.BLOOM_FILTER_ENABLED:
+        return
+    await rebuild_bloom_filters()
+    if settings.BLOOM_FILTER_REFRESH_SECONDS > 0:
+        _refresh_task = asyncio.create_task(_refresh_loop(settings.BLOOM_FILTER_REFRESH_SECONDS))
+
+
+async def stop_bloom_filters() -> None:
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+    for f in _filters.values():
+        f.filter = None
+        f._added.clear()
+
+
+# Keep filters current for writes made through the ORM in this process. Inserts are added at flush
+# (a rolled back insert only leaves a false positive); deletes are applied only after commit.
+def _on_insert(entity: str):
+    def listener(mapper, connection, target) -> None:
+        _filters[entity].add(target.id)
+    return listener
+
+
+def _on_delete(entity: str):
+    def listener(mapper, connection, target) -> None:
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault(_PENDING_DELETES, []).append((entity, target.id))
+    return listener
+
+
+for _entity, _model in BLOOM_ENTITIES.items():
+    event.listen(_model, "after_insert", _on_insert(_entity))
+    event.listen(_model, "after_delete", _on_delete(_entity))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_deletes(session: Session) -> None:
+    for entity, entity_id in session.info.pop(_PENDING_DELETES, ()):
+        _filters[entity].remove(entity_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_deletes(session: Session) -> None:
+    session.info.pop(_PENDING_DELETES, None)
+
+
+class BloomFilterCollector:
+    def collect(self):
+        fill = GaugeMetricFamily("app_bloom_filter_fill_ratio", "Fraction of non-zero counters per entity Bloom filter", labels=("entity",))
+        fpp = GaugeMetricFamily("app_bloom_filter_estimated_fp_rate", "Theoretical false-positive rate at the current fill", labels=("entity",))
+        for name, f in _filters.items():
+            if f.filter is None:
+                continue
+            ratio = f.filter.fill_ratio()
+            fill.add_metric((name,), ratio)
+            fpp.add_metric((name,), ratio ** f.filter.hashes)
+        yield fill
+        yield fpp
+
+
+register_collector(BloomFilterCollector())
+register_cache_size_source("bloom", lambda: (
+    sum(f.filter.count for f in _filters.values() if f.filter is not None),
+    sum(f.filter.nbytes for f in _filters.values() if f.filter is not None),
+))
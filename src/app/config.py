@@ -6,6 +6,15 @@ class StorageKind(StrEnum):
     FS = "fs"
     DB = "db"
 
+class CacheKind(StrEnum):
+    MEMORY = "memory"
+    NULL = "null"
+
+class ServerTimingMode(StrEnum):
+    OFF = "off"
+    ADMIN = "admin"
+    ALL = "all"
+
 class Settings(BaseSettings):
     DATABASE_URL: Optional[str] = None
     REDIS_URL: Optional[str] = None
@@ -17,6 +26,104 @@ class Settings(BaseSettings):
     # storage selection: 'fs' stores files on filesystem, 'db' stores blobs inline
     STORAGE_KIND: StorageKind = StorageKind.FS
 
+    # cache used when REDIS_URL is empty: 'memory' keeps an in-process TTL/LRU cache, 'null' disables caching
+    CACHE_BACKEND: CacheKind = CacheKind.MEMORY
+    # approximate upper bound for the in-process cache (keys + values)
+    CACHE_MEMORY_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Redis circuit breaker: per-call timeout (s), consecutive failures to open, seconds before a half-open probe
+    REDIS_CALL_TIMEOUT: float = 0.1
+    REDIS_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    REDIS_CIRCUIT_RESET_TIMEOUT: float = 10.0
+
+    # hot-key tracking (count-min sketch + top-K) for books, covers and cache lookups
+    HOTKEYS_ENABLED: bool = True
+    HOTKEYS_TOP_K: int = 20
+
+    # Bloom filters of existing book/review/comment ids answer certain 404s without Redis or the DB.
+    # Only safe when this process is the sole writer: rows inserted elsewhere (other workers or
+    # replicas, the seed script, Core inserts) are only picked up by the periodic rebuild (0 disables
+    # it) and get false 404s until then.
+    BLOOM_FILTER_ENABLED: bool = False
+    BLOOM_FILTER_CAPACITY: int = 100_000
+    BLOOM_FILTER_ERROR_RATE: float = 0.01
+    BLOOM_FILTER_REFRESH_SECONDS: float = 300.0
+
+    # seconds an authenticated user is served from the principal cache; 0 disables it
+    PRINCIPAL_CACHE_TTL: int = 30
+
+    # password hashing runs in a process pool of this many workers (0 = default thread pool)
+    PASSWORD_HASH_WORKERS: int = 2
+    # seconds a login/registration may wait for a hashing slot before getting a 503
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = 2.0
+
+    # Server-Timing response header with auth/cache/db/storage/render durations: off, admin (admin requests only) or all
+    SERVER_TIMING: ServerTimingMode = ServerTimingMode.OFF
+
+    # event-loop lag is sampled every this many seconds into app_event_loop_lag_seconds (0 disables it)
+    LOOP_LAG_INTERVAL: float = 0.25
+    # debug aid: a watchdog thread logs the event loop's stack whenever it is blocked longer than the threshold
+    LOOP_WATCHDOG_ENABLED: bool = False
+    LOOP_BLOCK_THRESHOLD: float = 0.1
+
+    # open pooled DB/Redis connections and start the hashing pool before serving (enabled by app.server)
+    WARMUP_ON_STARTUP: bool = False
+    WARMUP_DB_CONNECTIONS: int = 2
+
+    # `python -m app.server` worker processes (0 = one per CPU); workers are recycled after
+    # WORKER_MAX_REQUESTS (+ random jitter) requests or above WORKER_MAX_RSS_MB of memory (0 = never)
+    WEB_CONCURRENCY: int = 1
+    WORKER_MAX_REQUESTS: int = 0
+    WORKER_MAX_REQUESTS_JITTER: int = 0
+    WORKER_MAX_RSS_MB: int = 0
+    # seconds in-flight requests get to finish on shutdown before workers are killed
+    GRACEFUL_TIMEOUT: float = 30.0
+
+    # admission control per worker: at most this many requests run at once (0 disables it); up to
+    # ADMISSION_QUEUE_SIZE more wait by priority, and get a 503 after ADMISSION_QUEUE_TIMEOUT seconds
+    ADMISSION_MAX_IN_FLIGHT: int = 100
+    ADMISSION_QUEUE_SIZE: int = 200
+    ADMISSION_QUEUE_TIMEOUT: float = 1.0
+
+    # seconds a request may take before its handler is cancelled with a 504 (0 disables deadlines);
+    # per-route overrides as `[METHOD ]route=seconds`, e.g. GET /api/v1/books/=5,/api/v1/books/{book_id}/cover=10.
+    # Clients may ask for less with X-Request-Timeout; SQL statements stop at the same deadline.
+    REQUEST_TIMEOUT: float = 30.0
+    ROUTE_TIMEOUTS: str = "GET /api/v1/admin/profile=60"
+
+    # /ready serves cached DB/Redis/storage check results refreshed every READINESS_REFRESH_SECONDS
+    # (0 checks only at startup); it returns 503 while any of the READINESS_REQUIRED checks fails.
+    # Redis is optional by default because the cache falls back to in-process state without it.
+    READINESS_REFRESH_SECONDS: float = 5.0
+    READINESS_CHECK_TIMEOUT: float = 2.0
+    READINESS_REQUIRED: str = "db,storage"
+
+    # warn when one request runs more SQL statements than this (0 disables the warning)
+    DB_QUERY_BUDGET: int = 20
+
+    # requests slower than this (seconds) are logged to app.slow_requests with their SQL (0 disables it)
+    SLOW_REQUEST_SECONDS: float = 1.0
+    # also log EXPLAIN plans of the slow request's SELECTs (run in the background on a separate connection)
+    SLOW_REQUEST_EXPLAIN: bool = False
+
+    # tracing: Zipkin v2 spans go to this collector URL (e.g. http://zipkin:9411/api/v2/spans) or are
+    # appended to this file path; empty disables tracing. The rate is the fraction of requests traced.
+    TRACING_ENDPOINT: str = ""
+    TRACING_SAMPLE_RATE: float = 0.1
+    TRACING_SERVICE_NAME: str = "assignment02-api"
+
+    # log records are queued (at most this many) and written by a background thread; 0 writes synchronously
+    LOG_QUEUE_SIZE: int = 10_000
+    # sampling of INFO/DEBUG records per logger, e.g. app.api.books=0.1,app.security.dependencies=0.1
+    LOG_SAMPLE_RATES: str = ""
+
+    # enable the per-IP/per-user rate limiter (limits live in app.constants). Off by default: clients
+    # are keyed by their socket address, so behind a proxy or load balancer every user shares one budget
+    # unless the proxy addresses are listed in RATE_LIMIT_TRUSTED_PROXIES.
+    RATE_LIMIT_ENABLED: bool = False
+    # comma-separated proxy IPs/CIDRs whose X-Forwarded-For header names the real client, e.g. 10.0.0.0/8
+    RATE_LIMIT_TRUSTED_PROXIES: str = ""
+
     # Comma-separated list of allowed CORS origins. Example:
     # CORS_ORIGINS=http://localhost:3000,https://example.com
     CORS_ORIGINS: str = ""
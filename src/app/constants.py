@@ -10,3 +10,14 @@ RATE_LIMIT_WINDOW_MAX_REQUESTS: Final[int] = 10
 RATE_LIMIT_MIN_INTERVAL: Final[float] = 0.5
 BLACKLIST_DURATION: Final[float] = 10.0
 
+# On-demand sampling profiler (admin endpoint) hard limits
+PROFILER_MAX_SECONDS: Final[float] = 30.0
+PROFILER_MIN_INTERVAL: Final[float] = 0.001
+# fraction of wall time the sampler may spend walking stacks before it backs off
+PROFILER_MAX_OVERHEAD: Final[float] = 0.02
+PROFILER_MAX_DEPTH: Final[int] = 128
+
+# Slow-request log: SQL statements kept per request, and at most this many EXPLAIN runs in flight
+SLOW_REQUEST_MAX_STATEMENTS: Final[int] = 50
+SLOW_REQUEST_MAX_PENDING_EXPLAINS: Final[int] = 2
+
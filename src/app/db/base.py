@@ -1,11 +1,24 @@
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import QueuePool
 from typing import Optional, AsyncGenerator
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+import asyncio
 import logging
 import os
+import re
+import time
 
 from app.config import settings
+from app.constants import SLOW_REQUEST_MAX_STATEMENTS
+from app.metrics import observe_db_statement
+from app.server_timing import record_timing
+from app.tracing import record_span
+from app.db.statement_timeouts import install_statement_timeouts
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +27,70 @@ _engine: Optional[AsyncEngine] = None
 AsyncSessionLocal: Optional[async_sessionmaker[AsyncSession]] = None
 _tables_initialized: bool = False
 
+class QueryStats:
+    """Statements executed and time spent in the DB while handling one request."""
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self, capture: bool = False):
+        self.count = 0
+        self.seconds = 0.0
+        # (statement, parameters, seconds) of the first statements, kept for the slow-request log
+        self.statements: list[tuple[str, object, float]] | None = [] if capture else None
+
+
+# set per request by MetricsMiddleware; the cursor hooks add to whatever is current
+query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+_WHITESPACE = re.compile(r"\s+")
+# per-statement timeouts added by app.db.statement_timeouts are not part of the statement's identity
+_TIMEOUT_HINTS = re.compile(r"^SET STATEMENT max_statement_time=[\d.]+ FOR |(?<=^SELECT) /\*\+ MAX_EXECUTION_TIME\(\d+\) \*/")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAM_LISTS = re.compile(r"\((?:\s*(?:\?|%s|:\w+)\s*,)+\s*(?:\?|%s|:\w+)\s*\)")
+# longer statements are cut so label values stay readable
+MAX_STATEMENT_LABEL = 200
+
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement: str) -> str:
+    """Collapse whitespace, literals and parameter lists so statements differing only in values
+    (or IN-list length) share one metrics label."""
+    s = _WHITESPACE.sub(" ", _TIMEOUT_HINTS.sub("", statement)).strip()
+    s = _LITERALS.sub("?", s)
+    s = _PARAM_LISTS.sub("(?)", s)
+    return s[:MAX_STATEMENT_LABEL]
+
+
+# execution option for the app's own diagnostic queries (e.g. EXPLAIN), which must not show up as
+# application queries in metrics, request stats or traces
+SKIP_INSTRUMENTATION = "skip_instrumentation"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context.execution_options.get(SKIP_INSTRUMENTATION):
+        return
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    observe_db_statement(normalize_statement(statement), elapsed)
+    record_timing("db", elapsed)
+    record_span("db.query", elapsed, "CLIENT", **{"db.statement": normalize_statement(statement)})
+    stats = query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        if stats.statements is not None and len(stats.statements) < SLOW_REQUEST_MAX_STATEMENTS:
+            stats.statements.append((_TIMEOUT_HINTS.sub("", statement), None if executemany else parameters, elapsed))
+
+
+def _install_query_hooks(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
 def _get_env_app_env() -> str:
     return os.environ.get('APP_ENV') or getattr(settings, 'APP_ENV', 'development')
 
@@ -26,6 +103,8 @@ async def init_db(dsn: str) -> None:
     if _engine is None:
         logger.info("Initializing DB engine with dsn=%s", dsn)
         _engine = create_async_engine(dsn, future=True, echo=False)
+        _install_query_hooks(_engine.sync_engine)
+        install_statement_timeouts(_engine.sync_engine)
         AsyncSessionLocal = async_sessionmaker(_engine, expire_on_commit=False, class_=AsyncSession)
 
 async def create_tables() -> None:
@@ -40,7 +119,7 @@ async def create_tables() -> None:
     _tables_initialized = True
 
 async def close_db() -> None:
-    global _engine
+    global _engine, _tables_initialized
     if _engine is not None:
         try:
             await _engine.dispose()
@@ -49,6 +128,23 @@ async def close_db() -> None:
             # raise unexpected exceptions during engine disposal in test shutdown.
             # Swallow exceptions to make test teardown robust and log the issue.
             logger.warning("Error while disposing DB engine during shutdown: %s", exc)
+        # an in-memory DB does not survive dispose; let the next session create the tables again
+        _tables_initialized = False
+
+async def warm_up_db(connections: int) -> None:
+    """Open up to `connections` pooled connections at once so early requests do not pay for connecting."""
+    if _engine is None or connections <= 0:
+        return
+    # single-connection pools (in-memory SQLite) must not be used concurrently
+    if not isinstance(_engine.sync_engine.pool, QueuePool):
+        connections = 1
+
+    async def _ping() -> None:
+        async with _engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(_ping() for _ in range(connections)))
+
 def get_engine() -> AsyncEngine | None:
     return _engine
 
@@ -66,19 +162,12 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         # lazily initialize using env DATABASE_URL or settings
         dsn = _get_env_database_url()
         await init_db(dsn)
-    # In test env, ensure tables exist but avoid dropping/creating on every session
-    if _get_env_app_env() == 'test' and not _tables_initialized:
+    # Ensure tables exist once per process (normally done by create_tables at startup); running
+    # create_all on every session would add a round of schema queries to each request
+    if not _tables_initialized:
         try:
             await create_tables()
         except Exception as exc:
             logger.exception("Failed to create tables during lazy init: %s", exc)
-    else:
-        # ensure tables exist at least once
-        if _engine is not None:
-            try:
-                async with _engine.begin() as conn:
-                    await conn.run_sync(Base.metadata.create_all)
-            except Exception:
-                pass
     async with AsyncSessionLocal() as session:
         yield session
@@ -0,0 +1,52 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.deadlines import request_deadline
+
+# SQLite calls the progress handler every this many VM instructions
+SQLITE_PROGRESS_STEPS = 1000
+# connection.info key holding the deadline of the statement currently running on it (SQLite)
+_DEADLINE_KEY = "statement_deadline"
+
+
+def _sqlite_on_connect(dbapi_connection, connection_record) -> None:
+    info = connection_record.info
+
+    def _interrupt() -> int:
+        # runs in the driver thread; a non-zero result aborts the statement with "interrupted"
+        deadline = info.get(_DEADLINE_KEY)
+        return 1 if deadline is not None and time.monotonic() > deadline else 0
+
+    if hasattr(dbapi_connection, "run_async"):
+        dbapi_connection.run_async(lambda conn: conn.set_progress_handler(_interrupt, SQLITE_PROGRESS_STEPS))
+    else:
+        dbapi_connection.set_progress_handler(_interrupt, SQLITE_PROGRESS_STEPS)
+
+
+def _sqlite_before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info[_DEADLINE_KEY] = request_deadline.get()
+
+
+def _mysql_before_execute(conn, cursor, statement, parameters, context, executemany):
+    """Bound SELECTs by the request's remaining time with a per-statement server-side limit.
+    MySQL only supports the limit for SELECT; MariaDB uses its own syntax."""
+    deadline = request_deadline.get()
+    if deadline is None or executemany or not statement.startswith("SELECT"):
+        return statement, parameters
+    ms = max(1, int((deadline - time.monotonic()) * 1000))
+    if conn.dialect.is_mariadb:
+        return f"SET STATEMENT max_statement_time={ms / 1000:.3f} FOR {statement}", parameters
+    return f"SELECT /*+ MAX_EXECUTION_TIME({ms}) */{statement[6:]}", parameters
+
+
+def install_statement_timeouts(engine: Engine) -> None:
+    """Make statements run during a request with a deadline stop at that deadline
+    (SQLite progress handler, MySQL MAX_EXECUTION_TIME hint, MariaDB max_statement_time)."""
+    name = engine.dialect.name
+    if name == "sqlite":
+        event.listen(engine, "connect", _sqlite_on_connect)
+        event.listen(engine, "before_cursor_execute", _sqlite_before_execute)
+    elif name in ("mysql", "mariadb"):
+        event.listen(engine, "before_cursor_execute", _mysql_before_execute, retval=True)
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+
+from sqlalchemy.exc import DBAPIError
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.metrics import inc_http_request_timeout
+from app.response.json_error import JSONError
+
+logger = logging.getLogger(__name__)
+
+# header a client may send to shorten the time it is willing to wait (seconds, e.g. "2.5")
+TIMEOUT_HEADER = "x-request-timeout"
+
+# time.monotonic() by which the current request must be done; set by DeadlineMiddleware
+request_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+def remaining() -> float | None:
+    """Seconds left for the current request, or None when it has no deadline."""
+    deadline = request_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+@lru_cache(maxsize=8)
+def parse_route_timeouts(spec: str) -> dict[tuple[str | None, str], float]:
+    """Parse `[METHOD ]route=seconds` pairs such as `GET /api/v1/books/=5,/api/v1/books/{book_id}/cover=10`.
+    Routes are templates as declared on the routers; without a method the timeout applies to all."""
+    timeouts: dict[tuple[str | None, str], float] = {}
+    for part in spec.split(","):
+        route, sep, seconds = part.strip().rpartition("=")
+        if not sep or not route.strip():
+            continue
+        method, _, path = route.strip().rpartition(" ")
+        timeouts[(method.upper() or None, path)] = float(seconds)
+    return timeouts
+
+
+def route_timeout(spec: str, default: float, method: str, path: str) -> float:
+    timeouts = parse_route_timeouts(spec)
+    return timeouts.get((method, path), timeouts.get((None, path), default))
+
+
+def client_timeout(headers) -> float | None:
+    """The timeout requested by the client, if it sent a valid positive one."""
+    value = headers.get(TIMEOUT_HEADER)
+    if value is None:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        return None
+    return seconds if seconds > 0 else None
+
+
+
+class _RequestTimer:
+    """Deadline state of one request, shared by DeadlineMiddleware and apply_route_deadline."""
+    __slots__ = ("cm", "started", "client", "timeout", "source")
+
+    def __init__(self, started: float, client: float | None):
+        self.cm: asyncio.Timeout | None = None
+        self.started = started
+        self.client = client
+        self.timeout = 0.0
+        self.source = "route"
+
+    @property
+    def deadline(self) -> float | None:
+        return self.started + self.timeout if self.timeout > 0 else None
+
+    def apply(self, method: str, route: str) -> None:
+        timeout = route_timeout(settings.ROUTE_TIMEOUTS, settings.REQUEST_TIMEOUT, method, route)
+        source = "route"
+        if self.client is not None and (timeout <= 0 or self.client < timeout):
+            timeout, source = self.client, "client"
+        self.timeout, self.source = timeout, source
+        deadline = self.deadline
+        request_deadline.set(deadline)
+        if self.cm is not None:
+            # asyncio.Timeout runs on the loop clock, which need not be time.monotonic()
+            loop_now = asyncio.get_running_loop().time()
+            self.cm.reschedule(None if deadline is None else loop_now + (deadline - time.monotonic()))
+
+
+_timer: ContextVar[_RequestTimer | None] = ContextVar("request_timer", default=None)
+
+
+def timeout_response(path: str) -> JSONResponse:
+    error = JSONError.from_exception(path, 504, "REQUEST_TIMEOUT", "Request timed out")
+    return JSONResponse(status_code=504, content=error.model_dump(mode="json"))
+
+
+class DeadlineMiddleware:
+    """Pure ASGI middleware enforcing request deadlines.
+
+    The timeout is settings.REQUEST_TIMEOUT or the route's ROUTE_TIMEOUTS entry, shortened by a
+    client's X-Request-Timeout. Routes are only known once the router has matched the request, so the
+    deadline starts from the request path and `apply_route_deadline` (an app-wide dependency)
+    adjusts it for the matched route template. The handler, dependencies included, is cancelled at
+    the deadline and the client gets a 504; SQL statements run under the same deadline
+    (app.db.statement_timeouts), and a statement aborted by it also yields a 504.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        timer = _RequestTimer(time.monotonic(), client_timeout(Headers(scope=scope)))
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        deadline_token = request_deadline.set(None)
+        timer_token = _timer.set(timer)
+        try:
+            async with asyncio.timeout(None) as cm:
+                timer.cm = cm
+                timer.apply(method, scope["path"])
+                await self.app(scope, receive, send_wrapper)
+            return
+        except TimeoutError:
+            if not cm.expired():
+                raise
+        except DBAPIError:
+            deadline = timer.deadline
+            if deadline is None or time.monotonic() < deadline:
+                raise
+        finally:
+            _timer.reset(timer_token)
+            request_deadline.reset(deadline_token)
+        route = getattr(scope.get("route"), "path", None) or scope["path"]
+        inc_http_request_timeout(method, route, timer.source)
+        logger.warning("%s %s exceeded its %.2fs deadline (%s)", method, scope["path"], timer.timeout, timer.source)
+        if response_started:
+            # too late for a 504; the client sees the response cut short
+            return
+        await timeout_response(scope["path"])(scope, receive, send)
+
+
+async def apply_route_deadline(request: Request) -> None:
+    """App-wide dependency: switch the request's deadline to the matched route's timeout."""
+    timer = _timer.get()
+    route = getattr(request.scope.get("route"), "path", None)
+    if timer is not None and route is not None and route != request.scope["path"]:
+        timer.apply(request.method, route)
@@ -0,0 +1,146 @@
+from array import array
+import logging
+import time
+
+from prometheus_client.core import GaugeMetricFamily
+
+from app.config import settings
+from app.metrics import register_collector, register_cache_size_source
+
+logger = logging.getLogger(__name__)
+
+# Categories fed by the request paths; keys are book ids for book/cover and full cache keys for cache
+HOTKEY_CATEGORIES: tuple[str, ...] = ("book", "cover", "cache")
+# how many of the hottest keys per category are exported as metrics (by rank; the keys themselves
+# are only shown on the admin endpoint, as they contain client-supplied ids and user ids)
+METRICS_TOP_N = 10
+
+
+class CountMinSketch:
+    """Fixed-size frequency estimator: estimates never undercount and overcount by at most
+    ~e/width of the total count with probability 1 - e^-depth.
+    """
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self._rows = [array("L", bytes(array("L").itemsize * width)) for _ in range(depth)]
+
+    def _indexes(self, key: str):
+        # double hashing: derive `depth` row indexes from one 64-bit hash
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Add `count` occurrences of `key` and return its new estimate."""
+        estimate = None
+        for row, idx in zip(self._rows, self._indexes(key)):
+            row[idx] += count
+            if estimate is None or row[idx] < estimate:
+                estimate = row[idx]
+        return estimate or 0
+
+    def estimate(self, key: str) -> int:
+        return min(row[idx] for row, idx in zip(self._rows, self._indexes(key)))
+
+    def decay(self) -> None:
+        """Halve every counter so old traffic fades out."""
+        for row in self._rows:
+            for i, v in enumerate(row):
+                if v:
+                    row[i] = v >> 1
+
+    @property
+    def nbytes(self) -> int:
+        return sum(row.itemsize * len(row) for row in self._rows)
+
+
+class HeavyHitters:
+    """Top-K heavy hitters over a count-min sketch. Counts are halved every `decay_seconds`
+    so the ranking follows current traffic rather than all-time totals.
+    """
+    def __init__(self, k: int = 20, width: int = 2048, depth: int = 4, decay_seconds: float = 60.0):
+        self.k = k
+        self.decay_seconds = decay_seconds
+        self.sketch = CountMinSketch(width, depth)
+        self._top: dict[str, int] = {}
+        self._min_key: str | None = None
+        self._next_decay = time.monotonic() + decay_seconds
+
+    def _maybe_decay(self) -> None:
+        now = time.monotonic()
+        if now < self._next_decay:
+            return
+        self._next_decay = now + self.decay_seconds
+        self.sketch.decay()
+        self._top = {k: c >> 1 for k, c in self._top.items() if c >> 1}
+        self._min_key = min(self._top, key=self._top.__getitem__) if self._top else None
+
+    def add(self, key: str) -> None:
+        self._maybe_decay()
+        estimate = self.sketch.add(key)
+        top = self._top
+        if key in top:
+            top[key] = estimate
+            if key == self._min_key:
+                self._min_key = min(top, key=top.__getitem__)
+            return
+        if len(top) < self.k:
+            top[key] = estimate
+            if self._min_key is None or estimate < top[self._min_key]:
+                self._min_key = key
+            return
+        if estimate > top[self._min_key]:
+            del top[self._min_key]
+            top[key] = estimate
+            self._min_key = min(top, key=top.__getitem__)
+
+    def top(self, n: int | None = None) -> list[tuple[str, int]]:
+        items = sorted(self._top.items(), key=lambda kv: kv[1], reverse=True)
+        return items[:n] if n is not None else items
+
+
+_trackers: dict[str, HeavyHitters] = {c: HeavyHitters(k=settings.HOTKEYS_TOP_K) for c in HOTKEY_CATEGORIES}
+
+
+def record_hot_key(category: str, key: str) -> None:
+    """Count one access to `key`; cheap enough for every request (a few array updates)."""
+    if not settings.HOTKEYS_ENABLED:
+        return
+    try:
+        _trackers[category].add(key)
+    except Exception:
+        # tracking must never break the request path
+        logger.debug("Failed to record hot key category=%s key=%s", category, key, exc_info=True)
+
+
+def top_hot_keys(category: str, n: int | None = None) -> list[tuple[str, int]]:
+    return _trackers[category].top(n)
+
+
+def reset_hot_keys() -> None:
+    for c in HOTKEY_CATEGORIES:
+        _trackers[c] = HeavyHitters(k=settings.HOTKEYS_TOP_K)
+
+
+class HotKeyCollector:
+    """Exports the counts of the current top keys per category at scrape time, labelled by rank
+    rather than by key so the series set stays fixed as the ranking changes.
+    """
+    def collect(self):
+        g = GaugeMetricFamily(
+            "app_hotkey_estimated_count",
+            "Estimated recent access count of the N-th hottest key (count-min sketch, decayed)",
+            labels=("category", "rank"),
+        )
+        for category, tracker in _trackers.items():
+            for rank, (_, count) in enumerate(tracker.top(METRICS_TOP_N), start=1):
+                g.add_metric((category, str(rank)), count)
+        yield g
+
+
+register_collector(HotKeyCollector())
+register_cache_size_source("hotkeys", lambda: (
+    sum(len(t._top) for t in _trackers.values()),
+    sum(t.sketch.nbytes for t in _trackers.values()),
+))
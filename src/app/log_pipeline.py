@@ -0,0 +1,106 @@
+import atexit
+import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+
+from app.metrics import inc_log_records_dropped
+
+# queue handler -> (listener draining it, the handlers it replaced)
+_pipelines: dict[QueueHandler, tuple[QueueListener, list[logging.Handler]]] = {}
+
+
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    """Parse `logger=rate` pairs such as `app.api.books=0.1,app.security.dependencies=0.05`."""
+    rates: dict[str, float] = {}
+    for part in spec.split(","):
+        name, sep, rate = part.strip().partition("=")
+        if not sep or not name.strip():
+            continue
+        rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of INFO/DEBUG records from the configured loggers (and their children).
+    WARNING and above always pass.
+    """
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        # longest prefix first so the most specific logger wins
+        self.rates = sorted(rates.items(), key=lambda kv: len(kv[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        name = record.name
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + "."):
+                if rate >= 1.0 or random.random() < rate:
+                    return True
+                inc_log_records_dropped("sampled")
+                return False
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the caller: records are dropped (and counted) when the queue is full."""
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            inc_log_records_dropped("queue_full")
+
+
+def _all_loggers() -> list[logging.Logger]:
+    return [logging.getLogger()] + [lg for lg in logging.Logger.manager.loggerDict.values() if isinstance(lg, logging.Logger)]
+
+
+def stop_log_pipeline() -> None:
+    """Flush queued records, stop the listener threads and give loggers their original handlers back."""
+    for lg in _all_loggers():
+        for h in list(lg.handlers):
+            if h in _pipelines:
+                lg.removeHandler(h)
+                for original in _pipelines[h][1]:
+                    lg.addHandler(original)
+    while _pipelines:
+        _, (listener, _) = _pipelines.popitem()
+        listener.stop()
+
+
+def install_log_pipeline(max_size: int, sample_rates: dict[str, float] | None = None) -> None:
+    """Move the handlers of the root logger and every configured logger behind queues drained by
+    background listener threads, so logging from the event loop never waits on file or console I/O.
+    Loggers sharing the same handlers share one queue. `max_size` 0 keeps handlers synchronous
+    and only applies sampling.
+    """
+    stop_log_pipeline()
+    sampler = SamplingFilter(sample_rates or {})
+    queue_handlers: dict[tuple[int, ...], QueueHandler] = {}
+    for lg in _all_loggers():
+        handlers = list(lg.handlers)
+        if not handlers:
+            continue
+        if max_size <= 0:
+            for h in handlers:
+                for old in [f for f in h.filters if isinstance(f, SamplingFilter)]:
+                    h.removeFilter(old)
+                h.addFilter(sampler)
+            continue
+        group = tuple(sorted(id(h) for h in handlers))
+        qh = queue_handlers.get(group)
+        if qh is None:
+            q: queue.Queue = queue.Queue(maxsize=max_size)
+            qh = DroppingQueueHandler(q)
+            qh.addFilter(sampler)
+            listener = QueueListener(q, *handlers, respect_handler_level=True)
+            listener.start()
+            _pipelines[qh] = (listener, handlers)
+            queue_handlers[group] = qh
+        for h in handlers:
+            lg.removeHandler(h)
+        lg.addHandler(qh)
+
+
+atexit.register(stop_log_pipeline)
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from app.config import settings
+from app.metrics import inc_event_loop_blocked, observe_event_loop_lag
+
+logger = logging.getLogger(__name__)
+
+# frames of the blocked stack included in a watchdog report
+WATCHDOG_STACK_LIMIT = 30
+
+
+async def _measure_lag(interval: float) -> None:
+    """Sleep `interval` repeatedly; anything beyond it is time the loop was too busy to wake us."""
+    loop = asyncio.get_running_loop()
+    while True:
+        due = loop.time() + interval
+        await asyncio.sleep(interval)
+        observe_event_loop_lag(max(0.0, loop.time() - due))
+
+
+class BlockingWatchdog:
+    """Thread that pings the event loop every `threshold` seconds. When a ping is not answered in
+    time the loop is stuck in some callback, so the loop thread's current stack is logged (once
+    per stall) - that stack points at the blocking call.
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop, threshold: float):
+        self.loop = loop
+        self.threshold = threshold
+        self.loop_thread_id = threading.get_ident()
+        self._answered = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="loop-watchdog", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=self.threshold * 2 + 1)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._answered.clear()
+            sent = time.monotonic()
+            try:
+                self.loop.call_soon_threadsafe(self._answered.set)
+            except RuntimeError:
+                # loop closed
+                return
+            if self._answered.wait(self.threshold):
+                self._stop.wait(self.threshold)
+                continue
+            if self._stop.is_set():
+                return
+            self._report()
+            # wait for the loop to recover before probing again, so one stall gives one report
+            while not self._answered.wait(self.threshold):
+                if self._stop.is_set():
+                    return
+            logger.warning("Event loop unblocked after %.3fs", time.monotonic() - sent)
+
+    def _report(self) -> None:
+        inc_event_loop_blocked()
+        frame = sys._current_frames().get(self.loop_thread_id)
+        if frame is None:
+            return
+        stack = "".join(traceback.format_stack(frame, limit=WATCHDOG_STACK_LIMIT))
+        frame = None
+        logger.warning("Event loop blocked for more than %.3fs; loop thread stack:\n%s", self.threshold, stack)
+
+
+_lag_task: asyncio.Task | None = None
+_watchdog: BlockingWatchdog | None = None
+
+
+async def start_loop_monitor() -> None:
+    """Start the lag sampler and, when enabled, the watchdog; call from the running loop's thread."""
+    global _lag_task, _watchdog
+    if settings.LOOP_LAG_INTERVAL > 0:
+        _lag_task = asyncio.create_task(_measure_lag(settings.LOOP_LAG_INTERVAL))
+    if settings.LOOP_WATCHDOG_ENABLED:
+        _watchdog = BlockingWatchdog(asyncio.get_running_loop(), settings.LOOP_BLOCK_THRESHOLD)
+        _watchdog.start()
+
+
+async def stop_loop_monitor() -> None:
+    global _lag_task, _watchdog
+    if _watchdog is not None:
+        _watchdog.stop()
+        _watchdog = None
+    if _lag_task is not None:
+        _lag_task.cancel()
+        try:
+            await _lag_task
+        except asyncio.CancelledError:
+            pass
+        _lag_task = None
@@ -1,16 +1,29 @@
 import logging
 import logging.config
 import os
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from starlette.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
 
 from .config import settings
+from .log_pipeline import install_log_pipeline, parse_sample_rates
 from .constants import API_TITLE, API_DESCRIPTION, API_VERSION
 from app.db.base import init_db, close_db, create_tables
 from .redis_client import init_redis, close_redis
+from .security.password import shutdown_hash_pool
+from .bloom import start_bloom_filters, stop_bloom_filters
+from .loop_monitor import start_loop_monitor, stop_loop_monitor
+from .warmup import warm_up
+from .readiness import start_readiness, stop_readiness, readiness
 
 from .middleware.logging_middleware import LoggingMiddleware
+from .middleware.rate_limit_middleware import RateLimitMiddleware
+from .middleware.metrics_middleware import MetricsMiddleware
+from .middleware.server_timing_middleware import ServerTimingMiddleware
+from .middleware.tracing_middleware import TracingMiddleware
+from .middleware.admission_middleware import AdmissionControlMiddleware
+from .deadlines import DeadlineMiddleware, apply_route_deadline
+from .tracing import flush_traces
 from .api.auth_router import router as auth_router
 
 # Include app package routers
@@ -21,6 +34,7 @@ from app.api.reviews import router as reviews_router
 from app.api.comments import router as comments_router
 from app.api.likes import router as likes_router
 from app.api.orders import router as orders_router
+from app.api.admin import router as admin_router
 from app.metrics import metrics_response
 
 # Added import for CORS middleware
@@ -28,7 +42,19 @@ from starlette.middleware.cors import CORSMiddleware
 
 
 def configure_logging():
+    """Load the logging configuration, then route handlers through the queue-based pipeline
+    (see app.log_pipeline) so log calls never do I/O on the event loop.
+    """
+    _load_logging_config()
+    try:
+        install_log_pipeline(settings.LOG_QUEUE_SIZE, parse_sample_rates(settings.LOG_SAMPLE_RATES))
+    except Exception:
+        logging.getLogger(__name__).exception('Failed to install queued logging; handlers stay synchronous')
+
+
+def _load_logging_config():
     """Load logging configuration from YAML file specified in LOGGING_CONFIG env or default package file.
+    Relative log file names are placed in the LOG_DIR env directory when it is set.
     Falls back to a reasonable basicConfig if loading fails.
     """
     try:
@@ -47,9 +73,12 @@ def configure_logging():
             # If file contains a path for file handlers, ensure directories exist
             # Walk handlers to find filenames
             handlers = cfg.get('handlers', {}) if isinstance(cfg, dict) else {}
+            log_dir = os.environ.get('LOG_DIR')
             for h in handlers.values():
                 fname = h.get('filename') if isinstance(h, dict) else None
                 if fname:
+                    if log_dir and not os.path.isabs(fname):
+                        fname = h['filename'] = os.path.join(log_dir, os.path.basename(fname))
                     d = os.path.dirname(fname)
                     if d and not os.path.exists(d):
                         try:
@@ -73,11 +102,29 @@ configure_logging()
 logger = logging.getLogger(__name__)
 
 
-def create_app() -> FastAPI:
-    app = FastAPI(title=API_TITLE, description=API_DESCRIPTION, version=API_VERSION, docs_url="/docs", redoc_url="/redoc")
-
-    # Add middleware
+def create_app(enable_rate_limiting: bool | None = None) -> FastAPI:
+    """Build the application. `enable_rate_limiting` defaults to settings.RATE_LIMIT_ENABLED."""
+    app = FastAPI(
+        title=API_TITLE, description=API_DESCRIPTION, version=API_VERSION, docs_url="/docs", redoc_url="/redoc",
+        # route-specific deadlines (ROUTE_TIMEOUTS) are applied once the route has been matched
+        dependencies=[Depends(apply_route_deadline)],
+    )
+    if enable_rate_limiting is None:
+        enable_rate_limiting = settings.RATE_LIMIT_ENABLED
+
+    # Add middleware (last added runs outermost, so rejections still get logged and counted)
+    # innermost: the deadline covers the handler, not time spent waiting for admission
+    app.add_middleware(DeadlineMiddleware)
+    # inside LoggingMiddleware: traces are keyed by the correlation id it assigns
+    app.add_middleware(TracingMiddleware)
+    # sheds excess load before any per-request work, but inside logging/metrics so 503s are recorded
+    app.add_middleware(AdmissionControlMiddleware)
+    # outside admission control: rate-limited clients get their 429 without taking a slot or queueing
+    if enable_rate_limiting:
+        app.add_middleware(RateLimitMiddleware)
     app.add_middleware(LoggingMiddleware)
+    app.add_middleware(ServerTimingMiddleware)
+    app.add_middleware(MetricsMiddleware)
 
     # Add CORS middleware when configured via settings.cors_origins
     origins = settings.cors_origins
@@ -89,6 +136,7 @@ def create_app() -> FastAPI:
             allow_credentials=True,
             allow_methods=["*"],
             allow_headers=["*"],
+            expose_headers=["X-Correlation-ID", "Server-Timing"],
         )
 
     # Global exception handler with helpful JSON in non-production
@@ -117,15 +165,25 @@ def create_app() -> FastAPI:
         redis_dsn = settings.REDIS_URL or ""
         if redis_dsn:
             await init_redis(redis_dsn)
+        await start_bloom_filters()
+        if settings.WARMUP_ON_STARTUP:
+            await warm_up()
+        await start_loop_monitor()
+        await start_readiness()
         try:
             yield
         finally:
             # shutdown
             logger.info("Shutting down: close DB and Redis")
+            await stop_readiness()
+            await stop_loop_monitor()
+            await stop_bloom_filters()
             redis_dsn = settings.REDIS_URL or ""
             if redis_dsn:
                 await close_redis()
             await close_db()
+            shutdown_hash_pool()
+            flush_traces()
 
     # noinspection PyUnresolvedReferences
     app.router.lifespan_context = lifespan
@@ -134,6 +192,12 @@ def create_app() -> FastAPI:
     async def health() -> JSONResponse:
         return JSONResponse({"status": "ok", "version": API_VERSION})
 
+    @app.get("/ready")
+    async def ready() -> JSONResponse:
+        # answered from results cached by the background refresh, so probes cost no DB/Redis round trips
+        is_ready, body = readiness()
+        return JSONResponse(body, status_code=200 if is_ready else 503)
+
     @app.get("/metrics")
     async def metrics() -> Response:
         # Return prometheus metrics (text format)
@@ -148,6 +212,7 @@ def create_app() -> FastAPI:
     app.include_router(comments_router)
     app.include_router(likes_router)
     app.include_router(orders_router)
+    app.include_router(admin_router)
 
     return app
 
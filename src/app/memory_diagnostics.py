@@ -0,0 +1,119 @@
+import itertools
+import linecache
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from prometheus_client.core import GaugeMetricFamily
+
+from app.metrics import register_collector
+
+# snapshots kept per process; the oldest is dropped when a new one would exceed this
+MAX_SNAPSHOTS = 5
+KEY_TYPES = ("lineno", "filename", "traceback")
+
+# allocations made by tracemalloc/import machinery itself are noise when hunting leaks
+_FILTERS = (
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+)
+
+_lock = threading.Lock()
+_snapshots: OrderedDict[int, tuple[float, tracemalloc.Snapshot]] = OrderedDict()
+_ids = itertools.count(1)
+
+
+class SnapshotNotFound(Exception):
+    pass
+
+
+def start_tracing(frames: int = 1) -> bool:
+    """Start tracemalloc keeping `frames` frames per allocation; returns False if already tracing.
+    Tracing slows allocations down noticeably, so stop it once done."""
+    if tracemalloc.is_tracing():
+        return False
+    tracemalloc.start(frames)
+    return True
+
+
+def stop_tracing() -> None:
+    """Stop tracing and drop the stored snapshots (they are meaningless across tracing sessions)."""
+    tracemalloc.stop()
+    with _lock:
+        _snapshots.clear()
+
+
+def tracing_status() -> dict:
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "tracing": tracemalloc.is_tracing(),
+        "frames": tracemalloc.get_traceback_limit(),
+        "traced_current_bytes": current,
+        "traced_peak_bytes": peak,
+        "snapshots": list_snapshots(),
+    }
+
+
+def take_snapshot() -> int:
+    """Take a filtered snapshot and store it; blocking, run it off the event loop."""
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is not tracing")
+    snap = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+    with _lock:
+        snapshot_id = next(_ids)
+        _snapshots[snapshot_id] = (time.time(), snap)
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    return snapshot_id
+
+
+def list_snapshots() -> list[dict]:
+    with _lock:
+        items = list(_snapshots.items())
+    return [{"id": sid, "taken_at": taken_at, "traces": len(snap.traces)} for sid, (taken_at, snap) in items]
+
+
+def _get(snapshot_id: int) -> tracemalloc.Snapshot:
+    with _lock:
+        entry = _snapshots.get(snapshot_id)
+    if entry is None:
+        raise SnapshotNotFound(snapshot_id)
+    return entry[1]
+
+
+def _site(traceback: tracemalloc.Traceback, key_type: str) -> str:
+    if key_type == "traceback":
+        return " <- ".join(f"{f.filename}:{f.lineno}" for f in traceback)
+    frame = traceback[0]
+    return frame.filename if key_type == "filename" else f"{frame.filename}:{frame.lineno}"
+
+
+def top_allocations(snapshot_id: int, key_type: str = "lineno", limit: int = 20) -> list[dict]:
+    stats = _get(snapshot_id).statistics(key_type)
+    return [{"site": _site(s.traceback, key_type), "size_bytes": s.size, "count": s.count} for s in stats[:limit]]
+
+
+def diff_snapshots(snapshot_id: int, base_id: int, key_type: str = "lineno", limit: int = 20) -> list[dict]:
+    """Allocation sites that grew the most from `base_id` to `snapshot_id`."""
+    stats = _get(snapshot_id).compare_to(_get(base_id), key_type)
+    return [
+        {"site": _site(s.traceback, key_type), "size_bytes": s.size, "size_diff_bytes": s.size_diff, "count": s.count, "count_diff": s.count_diff}
+        for s in stats[:limit]
+    ]
+
+
+class TracemallocCollector:
+    """Traced memory while tracemalloc is running (nothing is exported otherwise)."""
+    def collect(self):
+        g = GaugeMetricFamily("app_tracemalloc_traced_bytes", "Memory traced by tracemalloc (current and peak)", labels=("kind",))
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            g.add_metric(("current",), current)
+            g.add_metric(("peak",), peak)
+        yield g
+
+
+register_collector(TracemallocCollector())
@@ -1,39 +1,281 @@
-from prometheus_client import Counter, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
 from prometheus_client import PLATFORM_COLLECTOR, PROCESS_COLLECTOR, GC_COLLECTOR
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily
 from starlette.responses import Response
+from typing import Callable
+import os
+
+# Multiprocess mode: with PROMETHEUS_MULTIPROC_DIR set (before prometheus_client is imported), every
+# worker writes its metric values to mmap'd files in that directory and /metrics aggregates them all,
+# whichever worker answers. The directory must be emptied before the workers start.
+MULTIPROCESS: bool = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
 
 # Default registry used by the app; tests can replace it via set_registry
 _registry: CollectorRegistry = CollectorRegistry()
-_registry.register(GC_COLLECTOR)
-_registry.register(PROCESS_COLLECTOR)
-_registry.register(PLATFORM_COLLECTOR)
-# Labeled counter for redis cache hit/miss
-_redis_hitrate = Counter(
-    "app_cache_redis_hitrate_total",
-    "Redis cache hitrate counts by result and cache",
-    labelnames=("result", "cache"),
-    registry=_registry,
-)
+if not MULTIPROCESS:
+    # process/GC stats would only describe the worker answering the scrape
+    _registry.register(GC_COLLECTOR)
+    _registry.register(PROCESS_COLLECTOR)
+    _registry.register(PLATFORM_COLLECTOR)
+# Custom (scrape-time) collectors registered by app modules; re-registered by set_registry
+_custom_collectors: list = []
 
 
-def set_registry(registry: CollectorRegistry) -> None:
-    """Replace the module registry (useful for tests).
-    This re-creates the redis hitrate counter registered to the provided registry.
-    """
-    global _registry, _redis_hitrate
-    _registry = registry
+def _create_metrics(registry: CollectorRegistry) -> None:
+    """(Re)create every app metric bound to `registry`."""
+    global _redis_hitrate, _jwt_cache
+    global _password_hash_seconds, _password_hash_queue_depth, _password_hash_rejected
+    global _rate_limit_rejections
+    global _redis_circuit_state, _redis_circuit_transitions, _redis_circuit_fallbacks
+    global _cache_ops, _cache_op_seconds, _cache_payload_bytes
+    global _bloom_lookups, _log_records_dropped
+    global _http_requests, _http_request_seconds, _http_in_flight, _http_request_bytes, _http_response_bytes
+    global _db_statement_seconds, _http_request_db_queries, _http_request_db_seconds
+    global _event_loop_lag_seconds, _event_loop_blocked, _trace_spans_dropped
+    global _admission_queue_depth, _admission_queue_wait_seconds, _admission_rejections
+    global _http_request_timeouts
+    # Labeled counter for redis cache hit/miss. Superseded by app_cache_operations_total (which adds
+    # the key namespace and latency); still fed so existing dashboards and alerts keep working.
     _redis_hitrate = Counter(
         "app_cache_redis_hitrate_total",
         "Redis cache hitrate counts by result and cache",
         labelnames=("result", "cache"),
-        registry=_registry,
+        registry=registry,
+    )
+    _cache_ops = Counter(
+        "app_cache_operations_total",
+        "Cache operations by backend, operation, key namespace and result (hit/miss/ok/error)",
+        labelnames=("cache", "op", "namespace", "result"),
+        registry=registry,
+    )
+    _cache_op_seconds = Histogram(
+        "app_cache_operation_seconds",
+        "Cache operation latency by backend, operation and key namespace",
+        labelnames=("cache", "op", "namespace"),
+        buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+        registry=registry,
+    )
+    _cache_payload_bytes = Histogram(
+        "app_cache_payload_bytes",
+        "Size of cached values read (hits) and written, by backend, operation and key namespace",
+        labelnames=("cache", "op", "namespace"),
+        buckets=(64, 256, 1024, 4096, 16384, 65536, 262144, 1048576),
+        registry=registry,
+    )
+    _jwt_cache = Counter(
+        "app_jwt_cache_total",
+        "Verified JWT payload cache lookups by result",
+        labelnames=("result",),
+        registry=registry,
+    )
+    _password_hash_seconds = Histogram(
+        "app_password_hash_seconds",
+        "Time spent hashing/verifying passwords in the hashing pool",
+        labelnames=("op",),
+        buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+        registry=registry,
+    )
+    _password_hash_queue_depth = Gauge(
+        "app_password_hash_queue_depth",
+        "Password hashing jobs waiting for a pool slot",
+        multiprocess_mode="livesum",
+        registry=registry,
+    )
+    _password_hash_rejected = Counter(
+        "app_password_hash_rejected_total",
+        "Password hashing jobs rejected after waiting too long for a pool slot",
+        labelnames=("op",),
+        registry=registry,
+    )
+    _rate_limit_rejections = Counter(
+        "app_rate_limit_rejections_total",
+        "Requests rejected by the rate limiter by identity kind (ip/user) and reason",
+        labelnames=("scope", "reason"),
+        registry=registry,
+    )
+    _redis_circuit_state = Gauge(
+        "app_redis_circuit_state",
+        "Redis circuit breaker state (0=closed, 1=half_open, 2=open)",
+        multiprocess_mode="livemax",
+        registry=registry,
+    )
+    _redis_circuit_transitions = Counter(
+        "app_redis_circuit_transitions_total",
+        "Redis circuit breaker state transitions",
+        labelnames=("from_state", "to_state"),
+        registry=registry,
+    )
+    _redis_circuit_fallbacks = Counter(
+        "app_redis_circuit_fallbacks_total",
+        "Redis calls served by the local fallback (circuit open or call failed)",
+        labelnames=("op",),
+        registry=registry,
+    )
+    _bloom_lookups = Counter(
+        "app_bloom_lookups_total",
+        "Bloom filter id lookups (negative=answered 404 early, found/false_positive=outcome of the DB lookup)",
+        labelnames=("entity", "result"),
+        registry=registry,
+    )
+    _log_records_dropped = Counter(
+        "app_log_records_dropped_total",
+        "Log records dropped before reaching a handler (reason=sampled or queue_full)",
+        labelnames=("reason",),
+        registry=registry,
+    )
+    # RED metrics; `route` is the matched route template (e.g. /api/v1/books/{book_id}), never the raw path
+    _http_requests = Counter(
+        "app_http_requests_total",
+        "HTTP requests by method, route template and status code",
+        labelnames=("method", "route", "status"),
+        registry=registry,
+    )
+    _http_request_seconds = Histogram(
+        "app_http_request_duration_seconds",
+        "HTTP request latency by method, route template and status code",
+        labelnames=("method", "route", "status"),
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+        registry=registry,
+    )
+    _http_in_flight = Gauge(
+        "app_http_requests_in_flight",
+        "HTTP requests currently being handled, by method",
+        labelnames=("method",),
+        multiprocess_mode="livesum",
+        registry=registry,
     )
+    _http_request_bytes = Histogram(
+        "app_http_request_size_bytes",
+        "HTTP request body size by method and route template",
+        labelnames=("method", "route"),
+        buckets=(0, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+        registry=registry,
+    )
+    _http_response_bytes = Histogram(
+        "app_http_response_size_bytes",
+        "HTTP response body size by method and route template",
+        labelnames=("method", "route"),
+        buckets=(0, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+        registry=registry,
+    )
+    _db_statement_seconds = Histogram(
+        "app_db_statement_seconds",
+        "SQL statement latency by normalized statement (literals and parameter lists collapsed)",
+        labelnames=("statement",),
+        buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+        registry=registry,
+    )
+    _http_request_db_queries = Histogram(
+        "app_http_request_db_queries",
+        "SQL statements executed per HTTP request by method and route template",
+        labelnames=("method", "route"),
+        buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55),
+        registry=registry,
+    )
+    _http_request_db_seconds = Histogram(
+        "app_http_request_db_seconds",
+        "Time spent executing SQL per HTTP request by method and route template",
+        labelnames=("method", "route"),
+        buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+        registry=registry,
+    )
+    _event_loop_lag_seconds = Histogram(
+        "app_event_loop_lag_seconds",
+        "Delay between when the loop monitor's timer was due and when the event loop ran it",
+        buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+        registry=registry,
+    )
+    _event_loop_blocked = Counter(
+        "app_event_loop_blocked_total",
+        "Times the blocking-call watchdog found the event loop stalled past its threshold",
+        registry=registry,
+    )
+    _trace_spans_dropped = Counter(
+        "app_trace_spans_dropped_total",
+        "Spans of sampled traces lost because the export queue was full or the export failed",
+        registry=registry,
+    )
+    _admission_queue_depth = Gauge(
+        "app_admission_queue_depth",
+        "Requests waiting for an admission slot",
+        multiprocess_mode="livesum",
+        registry=registry,
+    )
+    _admission_queue_wait_seconds = Histogram(
+        "app_admission_queue_wait_seconds",
+        "Time admitted requests waited for a slot, by priority class",
+        labelnames=("priority",),
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+        registry=registry,
+    )
+    _admission_rejections = Counter(
+        "app_admission_rejections_total",
+        "Requests shed by admission control by priority class and reason (queue_full, evicted, timeout)",
+        labelnames=("priority", "reason"),
+        registry=registry,
+    )
+    _http_request_timeouts = Counter(
+        "app_http_request_timeouts_total",
+        "Requests answered 504 because their deadline passed, by method, route template and whether the client shortened it",
+        labelnames=("method", "route", "source"),
+        registry=registry,
+    )
+
+
+_create_metrics(_registry)
+
+
+def set_registry(registry: CollectorRegistry) -> None:
+    """Replace the module registry (useful for tests).
+    This re-creates all app metrics registered to the provided registry.
+    """
+    global _registry
+    _registry = registry
+    _create_metrics(_registry)
+    for collector in _custom_collectors:
+        _registry.register(collector)
 
 
 def get_registry() -> CollectorRegistry:
     return _registry
 
 
+def register_collector(collector) -> None:
+    """Register a custom collector (an object with `collect()`) on the current and any future registry.
+    Custom collectors run at scrape time, so in multiprocess mode they report the answering worker only."""
+    _custom_collectors.append(collector)
+    _registry.register(collector)
+
+
+# cache name -> callable returning (entries, approximate bytes or None) for an in-process cache
+_cache_size_sources: dict[str, Callable[[], tuple[int, int | None]]] = {}
+
+
+def register_cache_size_source(name: str, source: Callable[[], tuple[int, int | None]]) -> None:
+    """Export the size of an in-process cache as app_inprocess_cache_entries/bytes{cache=name} at scrape time."""
+    _cache_size_sources[name] = source
+
+
+class _CacheSizeCollector:
+    def collect(self):
+        entries = GaugeMetricFamily("app_inprocess_cache_entries", "Entries held by in-process caches", labels=("cache",))
+        nbytes = GaugeMetricFamily("app_inprocess_cache_bytes", "Approximate memory held by in-process caches", labels=("cache",))
+        for name, source in list(_cache_size_sources.items()):
+            try:
+                count, size = source()
+            except Exception:
+                continue
+            entries.add_metric((name,), count)
+            if size is not None:
+                nbytes.add_metric((name,), size)
+        yield entries
+        yield nbytes
+
+
+register_collector(_CacheSizeCollector())
+
+
 def inc_redis_hitrate(result: str, cache_name: str = "redis") -> None:
     """Increment the redis hitrate counter with result in ("hit","miss","error")
     """
@@ -44,8 +286,188 @@ def inc_redis_hitrate(result: str, cache_name: str = "redis") -> None:
         return
 
 
+def observe_cache_op(cache_name: str, op: str, namespace: str, result: str, seconds: float, payload_bytes: int | None = None) -> None:
+    """Record one cache operation; `payload_bytes` is the value size for get hits and sets."""
+    try:
+        _cache_ops.labels(cache=cache_name, op=op, namespace=namespace, result=result).inc()
+        _cache_op_seconds.labels(cache=cache_name, op=op, namespace=namespace).observe(seconds)
+        if payload_bytes is not None:
+            _cache_payload_bytes.labels(cache=cache_name, op=op, namespace=namespace).observe(payload_bytes)
+    except Exception:
+        return
+
+
+def inc_jwt_cache(result: str) -> None:
+    """Increment the verified-token cache counter with result in ("hit","miss","expired")"""
+    try:
+        _jwt_cache.labels(result=result).inc()
+    except Exception:
+        return
+
+
+def observe_password_hash(op: str, seconds: float) -> None:
+    try:
+        _password_hash_seconds.labels(op=op).observe(seconds)
+    except Exception:
+        return
+
+
+def set_password_hash_queue_depth(depth: int) -> None:
+    try:
+        _password_hash_queue_depth.set(depth)
+    except Exception:
+        return
+
+
+def inc_password_hash_rejected(op: str) -> None:
+    try:
+        _password_hash_rejected.labels(op=op).inc()
+    except Exception:
+        return
+
+
+def inc_rate_limit_rejection(scope: str, reason: str) -> None:
+    try:
+        _rate_limit_rejections.labels(scope=scope, reason=reason).inc()
+    except Exception:
+        return
+
+
+def set_redis_circuit_state(value: int) -> None:
+    try:
+        _redis_circuit_state.set(value)
+    except Exception:
+        return
+
+
+def inc_redis_circuit_transition(from_state: str, to_state: str) -> None:
+    try:
+        _redis_circuit_transitions.labels(from_state=from_state, to_state=to_state).inc()
+    except Exception:
+        return
+
+
+def inc_redis_circuit_fallback(op: str) -> None:
+    try:
+        _redis_circuit_fallbacks.labels(op=op).inc()
+    except Exception:
+        return
+
+
+def inc_bloom_lookup(entity: str, result: str) -> None:
+    try:
+        _bloom_lookups.labels(entity=entity, result=result).inc()
+    except Exception:
+        return
+
+
+def inc_log_records_dropped(reason: str) -> None:
+    try:
+        _log_records_dropped.labels(reason=reason).inc()
+    except Exception:
+        return
+
+
+def inc_http_in_flight(method: str, delta: int) -> None:
+    try:
+        _http_in_flight.labels(method=method).inc(delta)
+    except Exception:
+        return
+
+
+def observe_http_request(method: str, route: str, status: int, seconds: float, request_bytes: int, response_bytes: int) -> None:
+    try:
+        code = str(status)
+        _http_requests.labels(method=method, route=route, status=code).inc()
+        _http_request_seconds.labels(method=method, route=route, status=code).observe(seconds)
+        _http_request_bytes.labels(method=method, route=route).observe(request_bytes)
+        _http_response_bytes.labels(method=method, route=route).observe(response_bytes)
+    except Exception:
+        return
+
+
+def observe_db_statement(statement: str, seconds: float) -> None:
+    try:
+        _db_statement_seconds.labels(statement=statement).observe(seconds)
+    except Exception:
+        return
+
+
+def observe_request_db_usage(method: str, route: str, queries: int, seconds: float) -> None:
+    try:
+        _http_request_db_queries.labels(method=method, route=route).observe(queries)
+        _http_request_db_seconds.labels(method=method, route=route).observe(seconds)
+    except Exception:
+        return
+
+
+def observe_event_loop_lag(seconds: float) -> None:
+    try:
+        _event_loop_lag_seconds.observe(seconds)
+    except Exception:
+        return
+
+
+def inc_event_loop_blocked() -> None:
+    try:
+        _event_loop_blocked.inc()
+    except Exception:
+        return
+
+
+def inc_trace_spans_dropped(count: int) -> None:
+    try:
+        _trace_spans_dropped.inc(count)
+    except Exception:
+        return
+
+
+def set_admission_queue_depth(depth: int) -> None:
+    try:
+        _admission_queue_depth.set(depth)
+    except Exception:
+        return
+
+
+def observe_admission_wait(priority: str, seconds: float) -> None:
+    try:
+        _admission_queue_wait_seconds.labels(priority=priority).observe(seconds)
+    except Exception:
+        return
+
+
+def inc_admission_rejection(priority: str, reason: str) -> None:
+    try:
+        _admission_rejections.labels(priority=priority, reason=reason).inc()
+    except Exception:
+        return
+
+
+def inc_http_request_timeout(method: str, route: str, source: str) -> None:
+    try:
+        _http_request_timeouts.labels(method=method, route=route, source=source).inc()
+    except Exception:
+        return
+
+
+def _scrape_registry() -> CollectorRegistry:
+    if not MULTIPROCESS:
+        return _registry
+    # aggregate the files of all (live and dead) workers, plus this worker's scrape-time collectors
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for collector in _custom_collectors:
+        registry.register(collector)
+    return registry
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop the live-gauge files of an exited worker (call from the process supervising the workers)."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
+
+
 def metrics_response() -> Response:
     """Return a Starlette Response with the latest metrics for mounting at /metrics."""
-    data = generate_latest(_registry)
+    data = generate_latest(_scrape_registry())
     return Response(content=data, media_type=CONTENT_TYPE_LATEST)
-
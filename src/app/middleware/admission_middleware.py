@@ -0,0 +1,153 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from enum import IntEnum
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+from app.metrics import inc_admission_rejection, observe_admission_wait, set_admission_queue_depth
+
+logger = logging.getLogger('app.middleware.admission')
+
+# Never queued or shed: probes and scrapes must answer while the worker is overloaded
+DEFAULT_EXEMPT_PATHS: frozenset[str] = frozenset({"/health", "/ready", "/metrics"})
+# path prefixes served ahead of everything else (logins/refreshes and operators)
+DEFAULT_HIGH_PRIORITY_PREFIXES: tuple[str, ...] = ("/api/v1/auth/", "/api/v1/admin/")
+
+
+class Priority(IntEnum):
+    """Lower values are admitted first and shed last."""
+    HIGH = 0
+    AUTHENTICATED = 1
+    ANONYMOUS = 2
+
+
+class AdmissionControlMiddleware:
+    """Pure ASGI concurrency limiter with a bounded priority queue, per worker process.
+
+    At most `max_in_flight` requests run at once. Others wait in a queue of `queue_size`, ordered by
+    priority (auth/admin paths, then requests with credentials, then anonymous ones) and arrival.
+    When the queue is full a newcomer displaces the lowest-priority waiter if it outranks it,
+    otherwise it is rejected. Requests still waiting after `queue_timeout` seconds are rejected too.
+    Rejections are immediate 503s with `Retry-After`, so a burst fails fast instead of piling up
+    until the DB pool times out for everyone.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_in_flight: int | None = None,
+        queue_size: int | None = None,
+        queue_timeout: float | None = None,
+        exempt_paths: frozenset[str] = DEFAULT_EXEMPT_PATHS,
+        high_priority_prefixes: tuple[str, ...] = DEFAULT_HIGH_PRIORITY_PREFIXES,
+    ):
+        self.app = app
+        self.max_in_flight = settings.ADMISSION_MAX_IN_FLIGHT if max_in_flight is None else max_in_flight
+        self.queue_size = settings.ADMISSION_QUEUE_SIZE if queue_size is None else queue_size
+        self.queue_timeout = settings.ADMISSION_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self.exempt_paths = exempt_paths
+        self.high_priority_prefixes = high_priority_prefixes
+        self.in_flight = 0
+        # heap of (priority, seq, future); futures resolve to True (admitted) or False (evicted)
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    def _priority(self, scope: Scope) -> Priority:
+        if scope["path"].startswith(self.high_priority_prefixes):
+            return Priority.HIGH
+        for name, _ in scope.get("headers", ()):
+            if name == b"authorization":
+                return Priority.AUTHENTICATED
+        return Priority.ANONYMOUS
+
+    def _queued(self) -> int:
+        return sum(1 for _, _, fut in self._waiters if not fut.done())
+
+    def _pop_waiter(self) -> asyncio.Future | None:
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                return fut
+        return None
+
+    def _evict_lowest(self, priority: Priority) -> bool:
+        """Reject the lowest-priority, latest waiter if `priority` outranks it."""
+        pending = [w for w in self._waiters if not w[2].done()]
+        if not pending:
+            return False
+        worst = max(pending, key=lambda w: (w[0], w[1]))
+        if worst[0] <= priority:
+            return False
+        worst[2].set_result(False)
+        self._waiters = pending
+        self._waiters.remove(worst)
+        heapq.heapify(self._waiters)
+        return True
+
+    def _release(self) -> None:
+        fut = self._pop_waiter()
+        if fut is None:
+            self.in_flight -= 1
+        else:
+            # hand the slot straight to the next waiter
+            fut.set_result(True)
+        set_admission_queue_depth(self._queued())
+
+    async def _acquire(self, priority: Priority) -> str | None:
+        """Take a slot; returns the rejection reason when the request must be shed."""
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return None
+        if self._queued() >= self.queue_size and not self._evict_lowest(priority):
+            return "queue_full"
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        set_admission_queue_depth(self._queued())
+        start = time.perf_counter()
+        try:
+            admitted = await asyncio.wait_for(asyncio.shield(fut), self.queue_timeout)
+        except TimeoutError:
+            if fut.done() and fut.result():
+                # the slot arrived together with the timeout; take it
+                admitted = True
+            else:
+                fut.cancel()
+                set_admission_queue_depth(self._queued())
+                return "timeout"
+        except BaseException:
+            # client went away while waiting; give back a slot handed to us meanwhile
+            if fut.done() and not fut.cancelled() and fut.result():
+                self._release()
+            else:
+                fut.cancel()
+            raise
+        if not admitted:
+            return "evicted"
+        observe_admission_wait(priority.name.lower(), time.perf_counter() - start)
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.max_in_flight <= 0 or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+        priority = self._priority(scope)
+        reason = await self._acquire(priority)
+        if reason is not None:
+            inc_admission_rejection(priority.name.lower(), reason)
+            logger.info("Shed %s %s priority=%s reason=%s in_flight=%d", scope["method"], scope["path"], priority.name.lower(), reason, self.in_flight)
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Server is overloaded, retry later"},
+                headers={"Retry-After": str(max(1, math.ceil(self.queue_timeout)))},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._release()
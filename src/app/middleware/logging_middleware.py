@@ -1,28 +1,85 @@
 import logging
+import re
 import time
-from typing import Callable, Awaitable
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+import uuid
+from contextvars import ContextVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 logger = logging.getLogger('app.middleware')
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
-        client_host = request.client.host if request.client else "unknown"
-        path = request.url.path
-        qs = f"?{request.url.query}" if request.url.query else ""
-        cid = request.headers.get('X-Correlation-ID') or request.headers.get('X-Request-ID')
-        logger.info("%s - %s %s%s - start (cid=%s)", client_host, request.method, path, qs, cid)
-        start = time.time()
+CORRELATION_ID_HEADER = "X-Correlation-ID"
+# incoming ids are echoed back and logged, so only accept short, header-safe values
+_VALID_CORRELATION_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+# correlation id of the request being handled, for log records and downstream calls
+correlation_id: ContextVar[str | None] = ContextVar("correlation_id", default=None)
+
+
+def get_correlation_id() -> str | None:
+    return correlation_id.get()
+
+
+def _incoming_correlation_id(scope: Scope) -> str | None:
+    for name, value in scope.get("headers", ()):
+        if name in (b"x-correlation-id", b"x-request-id"):
+            cid = value.decode("latin-1")
+            if _VALID_CORRELATION_ID.match(cid):
+                return cid
+    return None
+
+
+class LoggingMiddleware:
+    """Pure ASGI access logger: one line per request with status, response size and latency.
+
+    The correlation id is taken from `X-Correlation-ID`/`X-Request-ID` (or generated), stored in
+    `request.state.correlation_id` and the `correlation_id` context variable, and echoed back in the
+    `X-Correlation-ID` response header. Streaming bodies are passed through untouched.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        cid = _incoming_correlation_id(scope) or uuid.uuid4().hex
+        scope.setdefault("state", {})["correlation_id"] = cid
+        token = correlation_id.set(cid)
+        status_code = 0
+        size = 0
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.append((b"x-correlation-id", cid.encode("latin-1")))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
         try:
-            response = await call_next(request)
-            elapsed_ms = (time.time() - start) * 1000
-            size = response.headers.get('content-length') or 'unknown'
-            logger.info("%s - %s %s%s - %s - %s bytes - %.2fms (cid=%s)", client_host, request.method, path, qs, response.status_code, size, elapsed_ms, cid)
-            return response
-        except Exception as exc:
-            elapsed_ms = (time.time() - start) * 1000
-            logger.exception("%s - %s %s%s - ERROR after %.2fms (cid=%s): %s", client_host, request.method, path, qs, elapsed_ms, cid, exc)
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            logger.exception("%s - %s %s%s - ERROR after %.2fms (cid=%s)", *self._request_line(scope), elapsed_ms, cid)
             raise
+        else:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            logger.info("%s - %s %s%s - %s - %d bytes - %.2fms (cid=%s)", *self._request_line(scope), status_code, size, elapsed_ms, cid)
+        finally:
+            correlation_id.reset(token)
 
+    @staticmethod
+    def _request_line(scope: Scope) -> tuple[str, str, str, str]:
+        client = scope.get("client")
+        qs = scope.get("query_string", b"")
+        return (
+            client[0] if client else "unknown",
+            scope["method"],
+            scope["path"],
+            f"?{qs.decode('latin-1')}" if qs else "",
+        )
@@ -0,0 +1,75 @@
+import logging
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.db.base import QueryStats, query_stats
+from app.metrics import inc_http_in_flight, observe_http_request, observe_request_db_usage
+from app.slow_requests import report_slow_request
+
+logger = logging.getLogger('app.middleware.metrics')
+
+# label for requests that never reached a route (unknown paths, rejections by outer middleware)
+UNMATCHED_ROUTE = "<unmatched>"
+_KNOWN_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording RED metrics per route template, method and status, plus
+    in-flight requests and request/response body sizes (see app.metrics). It also collects the
+    SQL statements run per request, warns when a request exceeds `settings.DB_QUERY_BUDGET` and
+    hands requests slower than `settings.SLOW_REQUEST_SECONDS` to the slow-request log.
+
+    The route template is read from `scope["route"]`, which the router fills in while dispatching,
+    so ids in paths never become label values. Unhandled exceptions are recorded as 500s.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"] if scope["method"] in _KNOWN_METHODS else "OTHER"
+        status_code = 500
+        request_bytes = 0
+        response_bytes = 0
+
+        async def receive_wrapper() -> Message:
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        slow_threshold = settings.SLOW_REQUEST_SECONDS
+        stats = QueryStats(capture=slow_threshold > 0)
+        token = query_stats.set(stats)
+        inc_http_in_flight(method, 1)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            inc_http_in_flight(method, -1)
+            query_stats.reset(token)
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            observe_http_request(method, route, status_code, elapsed, request_bytes, response_bytes)
+            observe_request_db_usage(method, route, stats.count, stats.seconds)
+            budget = settings.DB_QUERY_BUDGET
+            if budget > 0 and stats.count > budget:
+                logger.warning(
+                    "%s %s ran %d SQL statements (budget %d), %.1fms in DB of %.1fms total",
+                    scope["method"], scope["path"], stats.count, budget, stats.seconds * 1000, elapsed * 1000,
+                )
+            if 0 < slow_threshold <= elapsed:
+                report_slow_request(scope, status_code, elapsed, stats)
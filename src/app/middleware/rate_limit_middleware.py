@@ -0,0 +1,208 @@
+import ipaddress
+import logging
+import math
+import time
+import uuid
+from collections import deque
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+from app.constants import RATE_LIMIT_WINDOW_SECONDS, RATE_LIMIT_WINDOW_MAX_REQUESTS, RATE_LIMIT_MIN_INTERVAL, BLACKLIST_DURATION
+from app.metrics import inc_rate_limit_rejection
+from app.redis_client import get_redis_client, get_redis_breaker
+from app.security.jwt import decode_token
+
+logger = logging.getLogger('app.middleware.rate_limit')
+
+# Paths never rate limited: docs, probes and metrics scrapes
+DEFAULT_EXEMPT_PATHS: frozenset[str] = frozenset({"/docs", "/redoc", "/openapi.json", "/docs/oauth2-redirect", "/health", "/ready", "/metrics"})
+
+# KEYS[1] = sorted set of request timestamps, KEYS[2] = blacklist flag
+# ARGV = now, window, max_requests, min_interval, blacklist_duration, unique member
+# Returns {reason, retry_after}; reason is '' when the request is allowed. Numbers are returned
+# as strings because Redis truncates Lua floats to integers.
+_SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local max_requests = tonumber(ARGV[3])
+local min_interval = tonumber(ARGV[4])
+local blacklist = tonumber(ARGV[5])
+local ttl = redis.call('PTTL', KEYS[2])
+if ttl > 0 then
+  return {'blacklisted', tostring(ttl / 1000)}
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local last = redis.call('ZREVRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+if last[2] and now - tonumber(last[2]) < min_interval then
+  return {'min_interval', tostring(min_interval - (now - tonumber(last[2])))}
+end
+if redis.call('ZCARD', KEYS[1]) >= max_requests then
+  redis.call('SET', KEYS[2], '1', 'PX', math.ceil(blacklist * 1000))
+  redis.call('DEL', KEYS[1])
+  return {'window', tostring(blacklist)}
+end
+redis.call('ZADD', KEYS[1], now, ARGV[6])
+redis.call('PEXPIRE', KEYS[1], math.ceil(window * 1000))
+return {'', '0'}
+"""
+
+
+class _MemoryRateLimiter:
+    """Per-process sliding window log used when Redis is not configured (or fails)."""
+    # prune idle identities every this many checks to keep memory bounded
+    _SWEEP_EVERY = 1024
+
+    def __init__(self, window: float, max_requests: int, min_interval: float, blacklist_duration: float):
+        self.window = window
+        self.max_requests = max_requests
+        self.min_interval = min_interval
+        self.blacklist_duration = blacklist_duration
+        self._hits: dict[str, deque[float]] = {}
+        self._blacklist: dict[str, float] = {}
+        self._checks = 0
+
+    def _sweep(self, now: float) -> None:
+        for key in [k for k, until in self._blacklist.items() if until <= now]:
+            del self._blacklist[key]
+        for key in [k for k, hits in self._hits.items() if not hits or hits[-1] <= now - self.window]:
+            del self._hits[key]
+
+    async def check(self, key: str, now: float) -> tuple[str, float]:
+        self._checks += 1
+        if self._checks % self._SWEEP_EVERY == 0:
+            self._sweep(now)
+        until = self._blacklist.get(key)
+        if until is not None:
+            if until > now:
+                return "blacklisted", until - now
+            del self._blacklist[key]
+        hits = self._hits.setdefault(key, deque())
+        while hits and hits[0] <= now - self.window:
+            hits.popleft()
+        if hits and now - hits[-1] < self.min_interval:
+            return "min_interval", self.min_interval - (now - hits[-1])
+        if len(hits) >= self.max_requests:
+            self._blacklist[key] = now + self.blacklist_duration
+            hits.clear()
+            return "window", self.blacklist_duration
+        hits.append(now)
+        return "", 0.0
+
+
+class _RedisRateLimiter:
+    """Sliding window log shared by all workers, evaluated atomically in a Lua script."""
+    def __init__(self, client, window: float, max_requests: int, min_interval: float, blacklist_duration: float):
+        self.client = client
+        self._script = client.register_script(_SLIDING_WINDOW_LUA)
+        self._args = (window, max_requests, min_interval, blacklist_duration)
+
+    async def check(self, key: str, now: float) -> tuple[str, float]:
+        reason, retry_after = await self._script(keys=[key, f"{key}:blacklist"], args=[now, *self._args, f"{now}:{uuid.uuid4().hex}"])
+        return reason, float(retry_after)
+
+
+class RateLimitMiddleware:
+    """Pure ASGI rate limiter applying the sliding-window limits from `app.constants`
+    per client IP and, for bearer-authenticated requests, per user.
+
+    A client may send at most `max_requests` requests per `window` seconds and no two requests
+    closer than `min_interval`; exceeding the window blacklists it for `blacklist_duration`.
+    Rejections get a 429 with `Retry-After`. State lives in Redis when configured, otherwise in-process.
+
+    Requests arriving from one of `trusted_proxies` (IPs or CIDRs) are keyed by the right-most
+    X-Forwarded-For address that is not itself a trusted proxy.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        window: float = RATE_LIMIT_WINDOW_SECONDS,
+        max_requests: int = RATE_LIMIT_WINDOW_MAX_REQUESTS,
+        min_interval: float = RATE_LIMIT_MIN_INTERVAL,
+        blacklist_duration: float = BLACKLIST_DURATION,
+        exempt_paths: frozenset[str] = DEFAULT_EXEMPT_PATHS,
+        trusted_proxies: str | None = None,
+    ):
+        self.app = app
+        self.exempt_paths = exempt_paths
+        if trusted_proxies is None:
+            trusted_proxies = settings.RATE_LIMIT_TRUSTED_PROXIES
+        self._trusted = [ipaddress.ip_network(p.strip(), strict=False) for p in trusted_proxies.split(",") if p.strip()]
+        self._limits = (window, max_requests, min_interval, blacklist_duration)
+        self._memory = _MemoryRateLimiter(*self._limits)
+        self._redis: _RedisRateLimiter | None = None
+
+    def _redis_limiter(self) -> _RedisRateLimiter | None:
+        # Redis is initialized in the app lifespan, after middleware construction
+        client = get_redis_client()
+        if client is None:
+            return None
+        if self._redis is None or self._redis.client is not client:
+            self._redis = _RedisRateLimiter(client, *self._limits)
+        return self._redis
+
+    def _is_trusted(self, host: str) -> bool:
+        try:
+            addr = ipaddress.ip_address(host)
+        except ValueError:
+            return False
+        return any(addr in net for net in self._trusted)
+
+    def _client_ip(self, scope: Scope) -> str:
+        client = scope.get("client")
+        peer = client[0] if client else "unknown"
+        if not self._trusted or not self._is_trusted(peer):
+            return peer
+        forwarded = [v.decode("latin-1") for k, v in scope.get("headers", ()) if k == b"x-forwarded-for"]
+        hops = [h.strip() for h in ",".join(forwarded).split(",") if h.strip()]
+        # walk back from the nearest hop; entries left of the first untrusted one are client-controlled
+        for hop in reversed(hops):
+            if not self._is_trusted(hop):
+                return hop
+        return hops[0] if hops else peer
+
+    @staticmethod
+    def _user_id(scope: Scope) -> str | None:
+        for name, value in scope.get("headers", ()):
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer" or not token:
+                    return None
+                try:
+                    return decode_token(token).get("sub")
+                except Exception:
+                    # invalid tokens are rejected by the auth dependencies; limit them by IP only
+                    return None
+        return None
+
+    async def _check(self, key: str) -> tuple[str, float]:
+        now = time.time()
+        limiter = self._redis_limiter()
+        breaker = get_redis_breaker()
+        if limiter is None or breaker is None:
+            return await self._memory.check(key, now)
+        # the breaker falls back to the in-process limiter while Redis is failing
+        return await breaker.call("ratelimit", lambda: limiter.check(key, now), lambda: self._memory.check(key, now))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+        identities = [("ip", self._client_ip(scope))]
+        user_id = self._user_id(scope)
+        if user_id:
+            identities.append(("user", user_id))
+        for kind, ident in identities:
+            reason, retry_after = await self._check(f"ratelimit:{kind}:{ident}")
+            if reason:
+                inc_rate_limit_rejection(kind, reason)
+                logger.info("Rate limited %s=%s reason=%s retry_after=%.2fs", kind, ident, reason, retry_after)
+                response = JSONResponse(
+                    status_code=429,
+                    content={"detail": "Too Many Requests"},
+                    headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
@@ -0,0 +1,40 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings, ServerTimingMode
+from app.server_timing import ServerTiming, server_timing
+
+
+class ServerTimingMiddleware:
+    """Pure ASGI middleware adding a `Server-Timing` header with the per-phase breakdown collected
+    through app.server_timing (auth, cache, db, storage, render) plus the total.
+
+    `settings.SERVER_TIMING` selects who gets it: `off`, `admin` (requests authenticated as an
+    admin) or `all`. Headers go out before streamed bodies, so only work done up to then is shown.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        mode = settings.SERVER_TIMING
+        if scope["type"] != "http" or mode == ServerTimingMode.OFF:
+            await self.app(scope, receive, send)
+            return
+        st = ServerTiming()
+        token = server_timing.set(st)
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and (mode == ServerTimingMode.ALL or st.is_admin):
+                now = time.perf_counter()
+                if st.endpoint_returned is not None:
+                    st.add("render", now - st.endpoint_returned)
+                value = st.header_value(now - start)
+                message = {**message, "headers": [*message.get("headers", ()), (b"server-timing", value.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            server_timing.reset(token)
@@ -0,0 +1,43 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.middleware.logging_middleware import get_correlation_id
+from app.tracing import begin_trace, end_trace
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware opening the root (SERVER) span of sampled requests; see app.tracing.
+
+    It must run inside LoggingMiddleware: the trace id is derived from the request's correlation
+    id, so a trace can be found from any log line of the request (and vice versa).
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.TRACING_ENDPOINT:
+            await self.app(scope, receive, send)
+            return
+        cid = get_correlation_id() or scope.get("state", {}).get("correlation_id")
+        handle = begin_trace(cid, scope["method"], **{"http.method": scope["method"], "http.path": scope["path"]}) if cid else None
+        if handle is None:
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            tags = {"http.status_code": status_code}
+            if route:
+                tags["http.route"] = route
+            if status_code >= 500:
+                tags["error"] = str(status_code)
+            end_trace(handle, f"{scope['method']} {route}" if route else None, **tags)
@@ -0,0 +1,86 @@
+import sys
+import threading
+import time
+from collections import Counter
+
+from app.constants import PROFILER_MAX_SECONDS, PROFILER_MIN_INTERVAL, PROFILER_MAX_OVERHEAD, PROFILER_MAX_DEPTH
+
+# only one profile may run per process at a time
+_running = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is still running."""
+
+
+class ProfileResult:
+    def __init__(self, stacks: Counter, samples: int, duration: float, interval: float, overhead: float):
+        self.stacks = stacks
+        self.samples = samples
+        self.duration = duration
+        # final sampling interval; it grows when stack walking exceeds the overhead budget
+        self.interval = interval
+        self.overhead = overhead
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack format (`frame;frame;frame count`), as read by
+        flamegraph.pl, speedscope and inferno."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _collapse(frame, thread_name: str) -> str:
+    labels = []
+    while frame is not None and len(labels) < PROFILER_MAX_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    labels.reverse()
+    return ";".join(labels)
+
+
+def sample_stacks(seconds: float, interval: float) -> ProfileResult:
+    """Sample the stacks of every other thread in this process every `interval` seconds for
+    `seconds` (both clamped to the hard limits in app.constants). Blocking; run it off the event loop.
+
+    The event-loop thread shows whichever coroutine is executing at each sample, so time spent
+    awaiting I/O appears under the selector rather than the endpoint.
+    """
+    seconds = min(max(seconds, 0.0), PROFILER_MAX_SECONDS)
+    interval = max(interval, PROFILER_MIN_INTERVAL)
+    if not _running.acquire(blocking=False):
+        raise ProfilerBusy()
+    try:
+        own = threading.get_ident()
+        stacks: Counter = Counter()
+        samples = 0
+        spent = 0.0
+        start = time.perf_counter()
+        deadline = start + seconds
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            names = {t.ident: t.name for t in threading.enumerate()}
+            frames = sys._current_frames()
+            for ident, frame in frames.items():
+                if ident != own:
+                    stacks[_collapse(frame, names.get(ident, str(ident)))] += 1
+            # drop frame references right away so sampled frames can be freed
+            frames = frame = None
+            samples += 1
+            spent += time.perf_counter() - now
+            elapsed = time.perf_counter() - start
+            # keep the sampler's own share of CPU under the budget by sampling less often
+            if elapsed > 0 and spent / elapsed > PROFILER_MAX_OVERHEAD:
+                interval = min(interval * 2, 1.0)
+            time.sleep(interval)
+        duration = time.perf_counter() - start
+        return ProfileResult(stacks, samples, duration, interval, spent / duration if duration else 0.0)
+    finally:
+        _running.release()
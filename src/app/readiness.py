@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import text
+
+from app.config import settings, StorageKind
+from app.db.base import get_engine
+from app.metrics import register_collector
+from app.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+OK = "ok"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+@dataclass(frozen=True, slots=True)
+class CheckResult:
+    status: str
+    latency_ms: float
+    checked_at: float
+    detail: str | None = None
+
+    def as_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "latency_ms": round(self.latency_ms, 2),
+            "checked_at": self.checked_at,
+            "detail": self.detail,
+        }
+
+
+async def _check_db() -> str | None:
+    engine = get_engine()
+    if engine is None:
+        raise RuntimeError("database engine not initialized")
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    return None
+
+
+async def _check_redis() -> str | None:
+    # the raw client, not the circuit breaker: the probe must see Redis itself, not the fallback
+    client = get_redis_client()
+    if client is None:
+        return SKIPPED
+    await client.ping()
+    return None
+
+
+def _storage_dir_writable() -> None:
+    from app.storage.fs_storage import STORAGE_DIR
+    if not STORAGE_DIR.is_dir():
+        raise RuntimeError(f"{STORAGE_DIR} is not a directory")
+    if not os.access(STORAGE_DIR, os.W_OK | os.X_OK):
+        raise RuntimeError(f"{STORAGE_DIR} is not writable")
+
+
+async def _check_storage() -> str | None:
+    if settings.STORAGE_KIND != StorageKind.FS:
+        # blobs live in the database, which has its own check
+        return SKIPPED
+    await asyncio.to_thread(_storage_dir_writable)
+    return None
+
+
+CHECKS = {"db": _check_db, "redis": _check_redis, "storage": _check_storage}
+
+_results: dict[str, CheckResult] = {}
+_refresh_task: asyncio.Task | None = None
+
+
+async def _run_check(name: str, check, timeout: float) -> CheckResult:
+    start = time.perf_counter()
+    try:
+        outcome = await asyncio.wait_for(check(), timeout=timeout)
+    except TimeoutError:
+        status, detail = FAILED, f"timed out after {timeout:g}s"
+    except Exception as exc:
+        status, detail = FAILED, f"{type(exc).__name__}: {exc}"
+    else:
+        status, detail = (SKIPPED, "not configured") if outcome == SKIPPED else (OK, None)
+    result = CheckResult(status, (time.perf_counter() - start) * 1000, time.time(), detail)
+    previous = _results.get(name)
+    if status == FAILED and (previous is None or previous.status != FAILED):
+        logger.warning("Readiness check %s failed: %s", name, detail)
+    elif status != FAILED and previous is not None and previous.status == FAILED:
+        logger.info("Readiness check %s recovered", name)
+    return result
+
+
+async def refresh_readiness() -> None:
+    """Run every dependency check concurrently and replace the cached results."""
+    timeout = settings.READINESS_CHECK_TIMEOUT
+    names = list(CHECKS)
+    results = await asyncio.gather(*(_run_check(n, CHECKS[n], timeout) for n in names))
+    _results.update(zip(names, results))
+
+
+def required_checks() -> frozenset[str]:
+    return frozenset(s.strip() for s in settings.READINESS_REQUIRED.split(",") if s.strip())
+
+
+def readiness() -> tuple[bool, dict]:
+    """Readiness from the cached results only; never touches a dependency.
+
+    Not ready while a required check is failing, before the first refresh, or when the results
+    are older than three refresh intervals (the refresh loop itself is stuck).
+    """
+    now = time.time()
+    max_age = 3 * max(settings.READINESS_REFRESH_SECONDS, settings.READINESS_CHECK_TIMEOUT)
+    required = required_checks()
+    ready = bool(_results)
+    checks = {}
+    for name in CHECKS:
+        result = _results.get(name)
+        if result is None:
+            ready = ready and name not in required
+            continue
+        entry = result.as_dict()
+        entry["required"] = name in required
+        stale = now - result.checked_at > max_age
+        if stale:
+            entry["detail"] = f"stale: last checked {now - result.checked_at:.0f}s ago"
+        if name in required and (result.status == FAILED or stale):
+            ready = False
+        checks[name] = entry
+    return ready, {"status": "ready" if ready else "not ready", "checks": checks}
+
+
+async def _refresh_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await refresh_readiness()
+        except Exception:
+            logger.exception("Readiness refresh failed")
+
+
+async def start_readiness() -> None:
+    """Run the checks once so /ready answers from the start, then refresh them in the background."""
+    global _refresh_task
+    await refresh_readiness()
+    if settings.READINESS_REFRESH_SECONDS > 0:
+        _refresh_task = asyncio.create_task(_refresh_loop(settings.READINESS_REFRESH_SECONDS))
+
+
+async def stop_readiness() -> None:
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+    _results.clear()
+
+
+class ReadinessCollector:
+    """Exports the cached check results at scrape time; scrapes never run a check either."""
+    def collect(self):
+        up = GaugeMetricFamily("app_dependency_up", "1 if the last readiness check of the dependency passed, 0 if it failed", labels=("dependency",))
+        latency = GaugeMetricFamily("app_dependency_check_seconds", "Duration of the last readiness check of the dependency", labels=("dependency",))
+        for name, result in list(_results.items()):
+            if result.status == SKIPPED:
+                continue
+            up.add_metric((name,), 1 if result.status == OK else 0)
+            latency.add_metric((name,), result.latency_ms / 1000)
+        yield up
+        yield latency
+
+
+register_collector(ReadinessCollector())
@@ -1,13 +1,31 @@
 import redis.asyncio as aioredis
-from typing import Optional, Any, Protocol, runtime_checkable
-from .config import settings
+from collections import OrderedDict
+from typing import Optional, Any, Awaitable, Callable, Protocol, TypeVar, runtime_checkable
+from .config import settings, CacheKind
+import asyncio
 import logging
+import sys
+import time
 
-from app.metrics import inc_redis_hitrate
+from app.hotkeys import record_hot_key
+from app.server_timing import record_timing
+from app.tracing import record_span
+from app.metrics import inc_redis_hitrate, observe_cache_op, set_redis_circuit_state, inc_redis_circuit_transition, inc_redis_circuit_fallback
+from app.metrics import register_cache_size_source
 
 logger = logging.getLogger(__name__)
 
 _redis: Optional[aioredis.Redis] = None
+_memory_cache: Optional["_MemoryRedis"] = None
+_breaker: Optional["_CircuitBreakerRedis"] = None
+# long-lived local cache client: (CACHE_BACKEND it was built for, client)
+_local: Optional[tuple[CacheKind, "RedisLike"]] = None
+
+# Key prefixes (before the first ':') reported as their own metrics namespace; anything else is 'other'.
+# Filled by the key builders through cache_key_prefix, so every cached entity gets its own label.
+KNOWN_CACHE_NAMESPACES: set[str] = set()
+
+T = TypeVar("T")
 
 
 @runtime_checkable
@@ -17,6 +35,24 @@ class RedisLike(Protocol):
     async def delete(self, *keys: str) -> int: ...
 
 
+def cache_key_prefix(namespace: str) -> str:
+    """Register `namespace` as a metrics label and return the key prefix for it, e.g. 'book:'."""
+    KNOWN_CACHE_NAMESPACES.add(namespace)
+    return f"{namespace}:"
+
+
+def cache_namespace(key: str) -> str:
+    """Bounded metrics label for a cache key, e.g. 'book:123' -> 'book'."""
+    prefix, sep, _ = key.partition(":")
+    return prefix if sep and prefix in KNOWN_CACHE_NAMESPACES else "other"
+
+
+def _payload_size(value: Any) -> int | None:
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return None
+
+
 class _NullRedis(RedisLike):
     """A lightweight async-compatible Redis stub used when Redis isn't configured.
     Methods mimic the aioredis.Redis async API used by the app: get, set, delete.
@@ -25,6 +61,7 @@ class _NullRedis(RedisLike):
         logger.debug("NullRedis.get called for key=%s", key)
         # treat NullRedis get as a cache miss
         inc_redis_hitrate("miss")
+        observe_cache_op("null", "get", cache_namespace(key), "miss", 0.0)
         return None
 
     async def set(self, key: str, value: Any, ex: int | None = None) -> bool:
@@ -36,9 +73,75 @@ class _NullRedis(RedisLike):
         return 0
 
 
+class _MemoryRedis(RedisLike):
+    """In-process RedisLike used when Redis isn't configured.
+    Supports per-key TTLs and evicts least-recently-used keys once the approximate size of
+    stored keys and values exceeds `max_bytes`.
+    """
+    # rough per-entry bookkeeping overhead (tuple, OrderedDict node, key object)
+    _ENTRY_OVERHEAD = 64
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        # key -> (expires_at monotonic or None, value, accounted size)
+        self._data: OrderedDict[str, tuple[float | None, Any, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @classmethod
+    def _sizeof(cls, key: str, value: Any) -> int:
+        if isinstance(value, (str, bytes)):
+            size = len(value)
+        else:
+            size = sys.getsizeof(value)
+        return len(key) + size + cls._ENTRY_OVERHEAD
+
+    def _pop(self, key: str) -> bool:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return False
+        self.nbytes -= entry[2]
+        return True
+
+    async def get(self, key: str) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._pop(key)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ex: int | None = None) -> bool:
+        size = self._sizeof(key, value)
+        self._pop(key)
+        if size > self.max_bytes:
+            logger.debug("MemoryRedis.set skipping key=%s: %d bytes exceeds cache size", key, size)
+            return True
+        while self._data and self.nbytes + size > self.max_bytes:
+            oldest = next(iter(self._data))
+            self._pop(oldest)
+        expires_at = time.monotonic() + ex if ex else None
+        self._data[key] = (expires_at, value, size)
+        self.nbytes += size
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(1 for k in keys if self._pop(k))
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.nbytes = 0
+
+
 class _InstrumentedRedis:
-    """A small proxy that wraps a real redis client and instruments `get` calls to record hit/miss.
-    It delegates other attributes to the underlying client.
+    """A proxy that wraps a redis-like client and records, per key namespace, the result, latency and
+    payload size of get/set/delete calls. It delegates other attributes to the underlying client.
+    Instances are long-lived (one per backend), not created per request.
     """
     def __init__(self, client, cache_name: str = "redis"):
         self._client = client
@@ -47,32 +150,190 @@ class _InstrumentedRedis:
     def __getattr__(self, item):
         return getattr(self._client, item)
 
+    def _record_timing(self, op: str, namespace: str, result: str, elapsed: float) -> None:
+        record_timing("cache", elapsed)
+        record_span(f"cache.{op}", elapsed, "CLIENT", cache=self._cache_name, namespace=namespace, result=result)
+
     async def get(self, key: str):
+        namespace = cache_namespace(key)
+        start = time.perf_counter()
         try:
             val = await self._client.get(key)
-            if val is None:
-                inc_redis_hitrate("miss", cache_name=self._cache_name)
-            else:
-                inc_redis_hitrate("hit", cache_name=self._cache_name)
-            return val
         except Exception:
             # record error and re-raise
-            try:
-                inc_redis_hitrate("error", cache_name=self._cache_name)
-            except Exception:
-                pass
+            elapsed = time.perf_counter() - start
+            inc_redis_hitrate("error", cache_name=self._cache_name)
+            observe_cache_op(self._cache_name, "get", namespace, "error", elapsed)
+            self._record_timing("get", namespace, "error", elapsed)
+            raise
+        elapsed = time.perf_counter() - start
+        result = "miss" if val is None else "hit"
+        if val is not None:
+            # hits only: misses include keys derived from arbitrary client-supplied ids
+            record_hot_key("cache", key)
+        inc_redis_hitrate(result, cache_name=self._cache_name)
+        observe_cache_op(self._cache_name, "get", namespace, result, elapsed, _payload_size(val))
+        self._record_timing("get", namespace, result, elapsed)
+        return val
+
+    async def set(self, key: str, value: Any, ex: int | None = None):
+        namespace = cache_namespace(key)
+        start = time.perf_counter()
+        try:
+            res = await self._client.set(key, value, ex=ex)
+        except Exception:
+            elapsed = time.perf_counter() - start
+            observe_cache_op(self._cache_name, "set", namespace, "error", elapsed)
+            self._record_timing("set", namespace, "error", elapsed)
             raise
+        elapsed = time.perf_counter() - start
+        observe_cache_op(self._cache_name, "set", namespace, "ok", elapsed, _payload_size(value))
+        self._record_timing("set", namespace, "ok", elapsed)
+        return res
+
+    async def delete(self, *keys: str):
+        namespace = cache_namespace(keys[0]) if keys else "other"
+        start = time.perf_counter()
+        try:
+            res = await self._client.delete(*keys)
+        except Exception:
+            elapsed = time.perf_counter() - start
+            observe_cache_op(self._cache_name, "delete", namespace, "error", elapsed)
+            self._record_timing("delete", namespace, "error", elapsed)
+            raise
+        elapsed = time.perf_counter() - start
+        observe_cache_op(self._cache_name, "delete", namespace, "ok", elapsed)
+        self._record_timing("delete", namespace, "ok", elapsed)
+        return res
+
+
+class _CircuitBreakerRedis:
+    """Guards a Redis client with per-call timeouts and a circuit breaker.
+
+    closed: calls go to Redis; `failure_threshold` consecutive failures/timeouts open the circuit.
+    open: calls go straight to `fallback` (local cache or NullRedis, i.e. the DB) for `reset_timeout` seconds.
+    half_open: a single probe call goes to Redis; success closes the circuit, failure re-opens it.
+    Failed calls are served by the fallback too, so callers never see Redis errors.
+    """
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, client, fallback: RedisLike, failure_threshold: int, reset_timeout: float, call_timeout: float):
+        self._client = client
+        self._fallback = fallback
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.call_timeout = call_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        set_redis_circuit_state(self._STATE_VALUES[self.state])
+
+    def __getattr__(self, item):
+        return getattr(self._client, item)
+
+    def _transition(self, new_state: str) -> None:
+        if new_state == self.state:
+            return
+        logger.warning("Redis circuit %s -> %s", self.state, new_state)
+        inc_redis_circuit_transition(self.state, new_state)
+        set_redis_circuit_state(self._STATE_VALUES[new_state])
+        self.state = new_state
+        if new_state == self.OPEN:
+            self._opened_at = time.monotonic()
+
+    def _allow_request(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._transition(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def _on_success(self) -> None:
+        self._failures = 0
+        if self.state == self.HALF_OPEN:
+            self._transition(self.CLOSED)
+
+    def _on_failure(self) -> None:
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            self._transition(self.OPEN)
+
+    async def call(self, op: str, primary: Callable[[], Awaitable[T]], fallback: Callable[[], Awaitable[T]]) -> T:
+        """Run `primary` against Redis under the breaker, or `fallback` when the circuit is open or the call fails."""
+        if not self._allow_request():
+            inc_redis_circuit_fallback(op)
+            return await fallback()
+        probe = self.state == self.HALF_OPEN
+        try:
+            result = await asyncio.wait_for(primary(), timeout=self.call_timeout)
+        except Exception as exc:
+            self._on_failure()
+            logger.warning("Redis %s failed (%s: %s); serving from fallback", op, type(exc).__name__, exc)
+            inc_redis_circuit_fallback(op)
+            return await fallback()
+        finally:
+            if probe:
+                self._probe_in_flight = False
+        self._on_success()
+        return result
+
+    async def get(self, key: str) -> Any:
+        return await self.call("get", lambda: self._client.get(key), lambda: self._fallback.get(key))
+
+    async def set(self, key: str, value: Any, ex: int | None = None) -> bool:
+        return await self.call("set", lambda: self._client.set(key, value, ex=ex), lambda: self._fallback.set(key, value, ex=ex))
+
+    async def delete(self, *keys: str) -> int:
+        return await self.call("delete", lambda: self._client.delete(*keys), lambda: self._fallback.delete(*keys))
+
+
+def _local_cache() -> RedisLike:
+    """The cache selected by CACHE_BACKEND for when Redis is unavailable (built once per backend kind)."""
+    global _local
+    kind = settings.CACHE_BACKEND
+    if _local is None or _local[0] != kind:
+        if kind == CacheKind.MEMORY:
+            _local = (kind, _InstrumentedRedis(get_memory_cache(), cache_name="memory"))
+        else:
+            logger.debug("Redis not configured - using NullRedis")
+            _local = (kind, _NullRedis())
+    return _local[1]
 
 
 async def init_redis(dsn: str) -> None:
-    global _redis
+    global _redis, _breaker
     if _redis is None:
         logger.info("Initializing Redis client with dsn=%s", dsn)
         _redis = aioredis.from_url(dsn, encoding="utf-8", decode_responses=True)
+        _breaker = _CircuitBreakerRedis(
+            _InstrumentedRedis(_redis),
+            fallback=_local_cache(),
+            failure_threshold=settings.REDIS_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.REDIS_CIRCUIT_RESET_TIMEOUT,
+            call_timeout=settings.REDIS_CALL_TIMEOUT,
+        )
+
+
+async def warm_up_redis() -> None:
+    """Open the first pooled Redis connection before traffic arrives."""
+    if _redis is None:
+        return
+    try:
+        await asyncio.wait_for(_redis.ping(), timeout=max(settings.REDIS_CALL_TIMEOUT, 1.0))
+    except Exception as exc:
+        logger.warning("Redis warm-up ping failed: %s", exc)
 
 
 async def close_redis() -> None:
-    global _redis
+    global _redis, _breaker
     if _redis is not None:
         logger.info("Closing Redis client")
         try:
@@ -80,18 +341,45 @@ async def close_redis() -> None:
         except Exception as exc:
             logger.exception("Error while closing Redis client: %s", exc)
         _redis = None
+        _breaker = None
+
+
+def get_memory_cache() -> _MemoryRedis:
+    """Return the process-wide in-memory cache, creating it on first use."""
+    global _memory_cache
+    if _memory_cache is None:
+        _memory_cache = _MemoryRedis(max_bytes=settings.CACHE_MEMORY_MAX_BYTES)
+    return _memory_cache
+
+
+def _memory_cache_size() -> tuple[int, int | None]:
+    if _memory_cache is None:
+        return 0, 0
+    return len(_memory_cache), _memory_cache.nbytes
+
+
+register_cache_size_source("memory", _memory_cache_size)
 
 
 def get_redis() -> RedisLike:
-    """Return the initialized redis client or a null-implementation when none.
+    """Return the initialized redis client, or the local cache selected by CACHE_BACKEND when none.
     This keeps handlers simple and avoids crashing when REDIS_URL is not provided
     (for tests/local dev). The returned object instruments `get` calls for metrics.
     """
-    if _redis is None:
-        logger.debug("Redis not configured - returning NullRedis")
-        return _NullRedis()
-    logger.debug("Returning configured Redis client (instrumented)")
-    return _InstrumentedRedis(_redis)
+    if _breaker is None:
+        return _local_cache()
+    logger.debug("Returning configured Redis client (instrumented, circuit breaker)")
+    return _breaker
+
+def get_redis_client() -> Optional[aioredis.Redis]:
+    """Return the raw (uninstrumented) Redis client, or None when Redis isn't configured.
+    For callers that need commands beyond RedisLike, e.g. Lua scripts; run them through
+    `get_redis_breaker().call(...)` so they respect the circuit breaker.
+    """
+    return _redis
+
+def get_redis_breaker() -> Optional[_CircuitBreakerRedis]:
+    return _breaker
 
 # FastAPI dependency
 def get_redis_dep() -> RedisLike:
@@ -6,6 +6,9 @@ import logging
 from ..security.jwt import decode_token
 from app.db.base import get_session
 from ..db.models import User
+from .principal_cache import principal_cache
+from app.server_timing import timed, mark_admin
+from app.tracing import span
 
 security = HTTPBearer(auto_error=False)
 logger = logging.getLogger(__name__)
@@ -14,7 +17,7 @@ async def _extract_sub_from_token(token: str, raise_on_error: bool) -> str | Non
     try:
         payload = decode_token(token)
         sub = payload.get("sub")
-        logger.debug("Token decoded payload: keys=%s sub=%s", list(payload.keys()), sub)
+        logger.debug("Token decoded for sub=%s", sub)
         if not sub:
             if raise_on_error:
                 logger.warning("Token decoded but missing subject")
@@ -29,14 +32,23 @@ async def _extract_sub_from_token(token: str, raise_on_error: bool) -> str | Non
         return None
 
 async def _get_user_by_sub(sub: str) -> User | None:
+    cached = await principal_cache.get(sub)
+    if cached is not None:
+        return cached
     async with get_session() as session:
         try:
             u = await session.get(User, sub)
         except Exception:
             u = None
-        return u
+    if u is not None:
+        await principal_cache.set(u)
+    return u
 
 async def get_current_user(creds: HTTPAuthorizationCredentials = Depends(security)) -> User:
+    with timed("auth"), span("auth.get_current_user"):
+        return await _authenticate(creds)
+
+async def _authenticate(creds: HTTPAuthorizationCredentials | None) -> User:
     if not creds:
         logger.debug("No credentials provided to get_current_user")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing Authorization")
@@ -51,6 +63,8 @@ async def get_current_user(creds: HTTPAuthorizationCredentials = Depends(securit
         logger.warning("Token subject %s did not match any user", sub)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     logger.debug("Authenticated user id=%s username=%s type=%s", u.id, getattr(u, 'username', None), getattr(u, 'type', None))
+    if getattr(u, 'type', 0) == 1:
+        mark_admin()
     return u
 
 async def get_current_user_optional(creds: HTTPAuthorizationCredentials = Depends(security)) -> User | None:
@@ -61,10 +75,13 @@ async def get_current_user_optional(creds: HTTPAuthorizationCredentials = Depend
     if scheme != "bearer":
         return None
     token = creds.credentials
-    sub = await _extract_sub_from_token(token, raise_on_error=False)
-    if not sub:
-        return None
-    u = await _get_user_by_sub(sub)
+    with timed("auth"), span("auth.get_current_user_optional"):
+        sub = await _extract_sub_from_token(token, raise_on_error=False)
+        if not sub:
+            return None
+        u = await _get_user_by_sub(sub)
+    if u is not None and getattr(u, 'type', 0) == 1:
+        mark_admin()
     return u
 
 async def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
@@ -1,16 +1,27 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 from jose import jwt
+import hashlib
 import logging
 import secrets
+import time
 
 from ..config import settings
+from ..metrics import inc_jwt_cache, register_cache_size_source
 
 logger = logging.getLogger(__name__)
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 REFRESH_TOKEN_EXPIRE_DAYS = 30
+# upper bound on verified payloads kept in-process (LRU eviction beyond this)
+TOKEN_CACHE_MAX_ENTRIES = 4096
+
+# sha256(token) -> (exp as unix timestamp, verified payload)
+_token_cache: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+# secret the cached payloads were verified with; rotating JWT_SECRET drops the cache
+_token_cache_secret: str | None = None
 
 def create_access_token(subject: str, expires_delta: Optional[timedelta] = None, user_type: Optional[int] = None, extra_claims: Optional[Dict[str, Any]] = None) -> str:
     # use timezone-aware UTC datetimes
@@ -23,14 +34,54 @@ def create_access_token(subject: str, expires_delta: Optional[timedelta] = None,
     logger.debug("Creating access token for sub=%s type=%s exp=%s", subject, to_encode.get("type"), expire)
     return jwt.encode(to_encode, settings.JWT_SECRET, algorithm=ALGORITHM)
 
+def _cached_payload(digest: bytes) -> dict | None:
+    global _token_cache_secret
+    if _token_cache_secret != settings.JWT_SECRET:
+        _token_cache.clear()
+        _token_cache_secret = settings.JWT_SECRET
+        return None
+    entry = _token_cache.get(digest)
+    if entry is None:
+        inc_jwt_cache("miss")
+        return None
+    exp, payload = entry
+    if exp <= time.time():
+        # let jwt.decode raise the usual ExpiredSignatureError
+        del _token_cache[digest]
+        inc_jwt_cache("expired")
+        return None
+    _token_cache.move_to_end(digest)
+    inc_jwt_cache("hit")
+    return payload
+
+
 def decode_token(token: str) -> dict:
+    """Verify and decode a token. Verified payloads are cached by token digest until their `exp`,
+    so repeat requests with the same bearer token skip signature verification.
+    """
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = _cached_payload(digest)
+    if payload is not None:
+        return dict(payload)
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[ALGORITHM])
         logger.debug("Decoded token payload keys=%s", list(payload.keys()))
-        return payload
     except Exception as exc:
         logger.exception("Failed to decode token: %s", exc)
         raise
+    exp = payload.get("exp")
+    # tokens without exp are not cached: there is no expiry to honor
+    if isinstance(exp, (int, float)):
+        _token_cache[digest] = (float(exp), dict(payload))
+        while len(_token_cache) > TOKEN_CACHE_MAX_ENTRIES:
+            _token_cache.popitem(last=False)
+    return payload
+
+
+def clear_token_cache() -> None:
+    _token_cache.clear()
+
+register_cache_size_source("jwt", lambda: (len(_token_cache), None))
 
 def create_refresh_token_string() -> str:
     # use a URL-safe random token
@@ -1,31 +1,123 @@
+from concurrent.futures import Executor, ProcessPoolExecutor
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 from app.config import settings
+from app.metrics import observe_password_hash, set_password_hash_queue_depth, inc_password_hash_rejected
+import asyncio
 import logging
+import math
+import multiprocessing
+import time
 
 logger = logging.getLogger(__name__)
 
 # Use pbkdf2_sha256 which is pure-python and avoids native bcrypt issues in some envs
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
-def hash_password(password: str) -> str:
+_hash_pool: Executor | None = None
+# (loop, semaphore) pair; a semaphore must not be shared between event loops
+_hash_slots: tuple[asyncio.AbstractEventLoop, asyncio.Semaphore] | None = None
+_hash_waiting: int = 0
+
+def _peppered(password: str) -> str:
     # ensure str and not bytes
     if isinstance(password, bytes):
         password = password.decode("utf-8", errors="ignore")
     # apply pepper (global secret) before hashing
     if settings.PEPPER:
         password = password + settings.PEPPER
-    logger.debug("Hashing password with pepper present=%s", bool(settings.PEPPER))
+    return password
+
+def _hash_peppered(password: str) -> str:
     return pwd_context.hash(password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    if isinstance(plain_password, bytes):
-        plain_password = plain_password.decode("utf-8", errors="ignore")
-    if settings.PEPPER:
-        plain_password = plain_password + settings.PEPPER
+def _verify_peppered(plain_password: str, hashed_password: str) -> bool:
     try:
-        ok = pwd_context.verify(plain_password, hashed_password)
-        logger.debug("Password verification result=%s", ok)
-        return ok
+        return pwd_context.verify(plain_password, hashed_password)
     except Exception as exc:
         logger.exception("Error during password verification: %s", exc)
         return False
+
+def hash_password(password: str) -> str:
+    logger.debug("Hashing password with pepper present=%s", bool(settings.PEPPER))
+    return _hash_peppered(_peppered(password))
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    ok = _verify_peppered(_peppered(plain_password), hashed_password)
+    logger.debug("Password verification result=%s", ok)
+    return ok
+
+def _get_hash_pool() -> Executor | None:
+    """Lazily start the hashing process pool; None (default thread pool) when PASSWORD_HASH_WORKERS <= 0."""
+    global _hash_pool
+    if _hash_pool is None and settings.PASSWORD_HASH_WORKERS > 0:
+        logger.info("Starting password hashing pool with %d workers", settings.PASSWORD_HASH_WORKERS)
+        # spawn avoids forking a process that already runs event loop and logging threads
+        _hash_pool = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _hash_pool
+
+def _get_hash_slots() -> asyncio.Semaphore:
+    global _hash_slots
+    loop = asyncio.get_running_loop()
+    if _hash_slots is None or _hash_slots[0] is not loop:
+        _hash_slots = (loop, asyncio.Semaphore(max(settings.PASSWORD_HASH_WORKERS, 1)))
+    return _hash_slots[1]
+
+async def _run_hash_job(op: str, fn, *args):
+    """Run a hashing job off the event loop with at most PASSWORD_HASH_WORKERS jobs in flight.
+    Jobs waiting longer than PASSWORD_HASH_QUEUE_TIMEOUT for a slot are rejected with 503.
+    """
+    global _hash_waiting
+    slots = _get_hash_slots()
+    _hash_waiting += 1
+    set_password_hash_queue_depth(_hash_waiting)
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT)
+    except TimeoutError:
+        inc_password_hash_rejected(op)
+        logger.warning("Password %s rejected: hashing queue wait exceeded %.2fs", op, settings.PASSWORD_HASH_QUEUE_TIMEOUT)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service busy, retry later",
+            headers={"Retry-After": str(max(1, math.ceil(settings.PASSWORD_HASH_QUEUE_TIMEOUT)))},
+        )
+    finally:
+        _hash_waiting -= 1
+        set_password_hash_queue_depth(_hash_waiting)
+    start = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_hash_pool(), fn, *args)
+    finally:
+        slots.release()
+        observe_password_hash(op, time.perf_counter() - start)
+
+async def hash_password_async(password: str) -> str:
+    """Async variant of hash_password for request handlers; hashing runs in the hashing pool."""
+    return await _run_hash_job("hash", _hash_peppered, _peppered(password))
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Async variant of verify_password for request handlers; verification runs in the hashing pool."""
+    ok = await _run_hash_job("verify", _verify_peppered, _peppered(plain_password), hashed_password)
+    logger.debug("Password verification result=%s", ok)
+    return ok
+
+def _warm_up_worker() -> None:
+    # a real hash loads the passlib handler and its backend, which the first login would pay for
+    pwd_context.hash("warm-up")
+
+async def warm_up_hash_pool() -> None:
+    """Start every hashing process (and its imports) now rather than on the first logins.
+    The pool spawns a worker per submitted job until it is full, so one job per worker starts them all.
+    """
+    pool = _get_hash_pool()
+    if pool is None:
+        return
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.run_in_executor(pool, _warm_up_worker) for _ in range(settings.PASSWORD_HASH_WORKERS)))
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    if _hash_pool is not None:
+        logger.info("Shutting down password hashing pool")
+        _hash_pool.shutdown(wait=True, cancel_futures=True)
+        _hash_pool = None
@@ -0,0 +1,100 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any
+
+from app.config import settings
+from app.db.models import User
+from app.metrics import register_cache_size_source
+from app.redis_client import cache_key_prefix, get_redis, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_KEY_PREFIX = cache_key_prefix("principal")
+# Only the fields handlers read from the authenticated user; the password hash never leaves the DB
+_PRINCIPAL_FIELDS = ("id", "username", "email", "active_order_id", "type")
+
+
+class PrincipalCache:
+    """Cache of authenticated users keyed by user id, stored in the shared cache client.
+    With a real Redis an in-process L1 sits in front of it to save the round trip; without one the
+    cache client is already in-process, so there is a single layer.
+    Entries are short-lived so changes made by other workers become visible within `ttl` seconds;
+    local changes must call `invalidate` explicitly.
+    """
+    def __init__(self, ttl: int, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"{PRINCIPAL_KEY_PREFIX}{user_id}"
+
+    @staticmethod
+    def _to_user(data: dict[str, Any]) -> User:
+        # detached instance; callers only read attributes from the principal
+        return User(**data)
+
+    @staticmethod
+    def _use_local() -> bool:
+        return get_redis_client() is not None
+
+    def _store_local(self, user_id: str, data: dict[str, Any]) -> None:
+        if not self._use_local():
+            return
+        self._local[user_id] = (time.monotonic() + self.ttl, data)
+        self._local.move_to_end(user_id)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def get(self, user_id: str) -> User | None:
+        if self.ttl <= 0:
+            return None
+        entry = self._local.get(user_id) if self._use_local() else None
+        if entry is not None:
+            expires_at, data = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(user_id)
+                return self._to_user(data)
+            self._local.pop(user_id, None)
+        try:
+            raw = await get_redis().get(self._key(user_id))
+        except Exception as exc:
+            logger.warning("Principal cache lookup failed for user id=%s: %s", user_id, exc)
+            return None
+        if not raw:
+            return None
+        data = json.loads(raw)
+        self._store_local(user_id, data)
+        return self._to_user(data)
+
+    async def set(self, user: User) -> None:
+        if self.ttl <= 0:
+            return
+        data = {f: getattr(user, f, None) for f in _PRINCIPAL_FIELDS}
+        self._store_local(data["id"], data)
+        try:
+            await get_redis().set(self._key(data["id"]), json.dumps(data), ex=self.ttl)
+        except Exception as exc:
+            logger.warning("Principal cache store failed for user id=%s: %s", data["id"], exc)
+
+    async def invalidate(self, user_id: str) -> None:
+        self._local.pop(user_id, None)
+        try:
+            await get_redis().delete(self._key(user_id))
+        except Exception as exc:
+            logger.warning("Principal cache invalidation failed for user id=%s: %s", user_id, exc)
+
+    def clear(self) -> None:
+        self._local.clear()
+
+
+principal_cache = PrincipalCache(ttl=settings.PRINCIPAL_CACHE_TTL)
+register_cache_size_source("principal", lambda: (len(principal_cache._local), None))
+
+
+async def invalidate_principal(user_id: str) -> None:
+    """Drop the cached principal for `user_id`; call whenever a user's type, credentials or tokens change."""
+    await principal_cache.invalidate(user_id)
@@ -0,0 +1,229 @@
+"""Pre-fork launcher: `python -m app.server [--host H] [--port P] [--workers N]`.
+
+The supervisor imports the app and binds the listening socket once, then forks the workers, which
+share the socket and serve it with their own uvicorn server. Each worker runs the app lifespan
+(including warm-up) before it starts accepting. Workers are replaced when they exit, e.g. after
+WORKER_MAX_REQUESTS requests, or above WORKER_MAX_RSS_MB of memory. SIGTERM/SIGINT drain all
+workers for up to GRACEFUL_TIMEOUT seconds.
+
+Only the standard library and app.config may be imported at module level: multiprocess metrics
+must be configured before prometheus_client is imported.
+"""
+import argparse
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+from app.config import settings
+
+logger = logging.getLogger("app.server")
+
+# how often the supervisor reaps exited workers and checks their memory
+SUPERVISE_INTERVAL = 1.0
+# workers failing sooner than this after start are respawned with a delay (crash loop protection)
+MIN_WORKER_LIFETIME = 2.0
+
+
+def _rss_bytes(pid: int) -> int | None:
+    """Resident memory of `pid` from /proc (Linux only; None elsewhere)."""
+    try:
+        with open(f"/proc/{pid}/statm", "rb") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _prepare_multiprocess_metrics() -> None:
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not directory:
+        directory = tempfile.mkdtemp(prefix="prometheus-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    os.makedirs(directory, exist_ok=True)
+    # files left by a previous run would be aggregated with ours
+    for name in os.listdir(directory):
+        if name.endswith(".db"):
+            os.unlink(os.path.join(directory, name))
+
+
+def _bind(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Supervisor:
+    """Forks and watches the worker processes."""
+    def __init__(self, app, sock: socket.socket, workers: int):
+        self.app = app
+        self.sock = sock
+        self.size = workers
+        self.workers: dict[int, float] = {}
+        self.retiring: set[int] = set()
+        self.stopping = False
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker()
+            except BaseException:
+                logger.exception("Worker %d crashed", os.getpid())
+                code = 1
+            finally:
+                logging.shutdown()
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+        logger.info("Started worker %d", pid)
+
+    def _run_worker(self) -> None:
+        import uvicorn
+        from app.main import configure_logging
+
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(sig, signal.SIG_DFL)
+        # the supervisor's logging threads do not exist in the child
+        configure_logging()
+        random.seed()
+        max_requests = settings.WORKER_MAX_REQUESTS
+        if max_requests > 0 and settings.WORKER_MAX_REQUESTS_JITTER > 0:
+            # spread restarts so workers do not all recycle at once
+            max_requests += random.randint(0, settings.WORKER_MAX_REQUESTS_JITTER)
+        config = uvicorn.Config(
+            self.app,
+            lifespan="on",
+            log_config=None,
+            limit_max_requests=max_requests or None,
+            timeout_graceful_shutdown=settings.GRACEFUL_TIMEOUT,
+        )
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def _on_signal(self, signum, frame) -> None:
+        self.stopping = True
+
+    def _reap(self) -> None:
+        from app.metrics import mark_process_dead
+
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, None)
+            self.retiring.discard(pid)
+            mark_process_dead(pid)
+            if started is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            logger.info("Worker %d exited with %d after %.0fs", pid, code, time.monotonic() - started)
+            if code != 0 and not self.stopping and time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+
+    def _check_memory(self) -> None:
+        limit = settings.WORKER_MAX_RSS_MB * 1024 * 1024
+        if limit <= 0:
+            return
+        for pid in list(self.workers):
+            rss = _rss_bytes(pid)
+            if pid in self.retiring or rss is None or rss <= limit:
+                continue
+            logger.warning("Recycling worker %d: RSS %.0fMB above %dMB", pid, rss / 1048576, settings.WORKER_MAX_RSS_MB)
+            # start the replacement first so capacity does not drop while the old worker drains
+            self.retiring.add(pid)
+            self.spawn()
+            os.kill(pid, signal.SIGTERM)
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._on_signal)
+        signal.signal(signal.SIGINT, self._on_signal)
+        for _ in range(self.size):
+            self.spawn()
+        while not self.stopping:
+            self._reap()
+            if self.stopping:
+                break
+            self._check_memory()
+            for _ in range(self.size - (len(self.workers) - len(self.retiring))):
+                self.spawn()
+            time.sleep(SUPERVISE_INTERVAL)
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        logger.info("Stopping %d workers (graceful timeout %.0fs)", len(self.workers), settings.GRACEFUL_TIMEOUT)
+        for pid in self.workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        # uvicorn stops accepting, finishes in-flight requests and runs the lifespan shutdown
+        deadline = time.monotonic() + settings.GRACEFUL_TIMEOUT + 5
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in self.workers:
+            logger.warning("Killing worker %d after the graceful timeout", pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        while self.workers:
+            self._reap()
+            time.sleep(0.05)
+        self.sock.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.server", description="Run the API with pre-forked workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY, help="0 = one per CPU")
+    args = parser.parse_args(argv)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+
+    if "WARMUP_ON_STARTUP" not in settings.model_fields_set:
+        settings.WARMUP_ON_STARTUP = True
+    # a recycled worker has to be replaced, so recycling needs the supervisor even for one worker
+    recycling = settings.WORKER_MAX_REQUESTS > 0 or settings.WORKER_MAX_RSS_MB > 0
+    supervised = (workers > 1 or recycling) and hasattr(os, "fork")
+    if supervised:
+        _prepare_multiprocess_metrics()
+    if workers > 1 and supervised:
+        if settings.BLOOM_FILTER_ENABLED:
+            # each worker's filters miss ids inserted by the others until the next rebuild
+            logger.warning("BLOOM_FILTER_ENABLED with %d workers: rows written by other workers get 404s until the next rebuild", workers)
+
+    from app.main import create_app
+    from app.log_pipeline import stop_log_pipeline
+
+    app = create_app()
+    if not supervised:
+        import uvicorn
+
+        if recycling:
+            logger.warning("Worker recycling (WORKER_MAX_REQUESTS/WORKER_MAX_RSS_MB) needs os.fork; ignored on this platform")
+        # a single process without a supervisor: a request limit would stop the server for good
+        uvicorn.run(
+            app, host=args.host, port=args.port, log_config=None,
+            timeout_graceful_shutdown=settings.GRACEFUL_TIMEOUT,
+        )
+        return
+    sock = _bind(args.host, args.port)
+    # forking while queue listener threads hold locks could deadlock the children; the supervisor
+    # logs little, so it writes synchronously and each worker installs its own pipeline
+    stop_log_pipeline()
+    logger.info("Listening on %s:%d with %d workers", args.host, args.port, workers)
+    Supervisor(app, sock, workers).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+# metric names emitted in the header, in this order; anything else follows
+_ORDER = ("auth", "cache", "db", "storage", "render")
+
+
+class ServerTiming:
+    """Time spent per phase (auth, cache, db, storage, render) while handling one request.
+    Phases may overlap (e.g. the user lookup counts towards both auth and db).
+    """
+    __slots__ = ("phases", "is_admin", "endpoint_returned")
+
+    def __init__(self):
+        self.phases: dict[str, list[float]] = {}
+        self.is_admin = False
+        # perf_counter when the endpoint function returned (set by app.api.routing.TimedAPIRoute)
+        self.endpoint_returned: float | None = None
+
+    def add(self, name: str, seconds: float) -> None:
+        phase = self.phases.get(name)
+        if phase is None:
+            self.phases[name] = [seconds, 1]
+        else:
+            phase[0] += seconds
+            phase[1] += 1
+
+    def header_value(self, total_seconds: float) -> str:
+        names = [n for n in _ORDER if n in self.phases] + sorted(n for n in self.phases if n not in _ORDER)
+        parts = [f'{n};dur={self.phases[n][0] * 1000:.2f};desc="{int(self.phases[n][1])}x"' for n in names]
+        parts.append(f"total;dur={total_seconds * 1000:.2f}")
+        return ", ".join(parts)
+
+
+# set per request by ServerTimingMiddleware when the header is enabled; None otherwise
+server_timing: ContextVar[ServerTiming | None] = ContextVar("server_timing", default=None)
+
+
+def record_timing(name: str, seconds: float) -> None:
+    st = server_timing.get()
+    if st is not None:
+        st.add(name, seconds)
+
+
+def mark_admin() -> None:
+    """Called once the request is authenticated as an admin (enables the header in admin mode)."""
+    st = server_timing.get()
+    if st is not None:
+        st.is_admin = True
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Add the time spent in the block to phase `name` of the current request, if timing is on."""
+    st = server_timing.get()
+    if st is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        st.add(name, time.perf_counter() - start)
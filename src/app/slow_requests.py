@@ -0,0 +1,97 @@
+import asyncio
+import contextvars
+import logging
+import re
+
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+from starlette.types import Scope
+
+from app.config import settings
+from app.constants import SLOW_REQUEST_MAX_PENDING_EXPLAINS
+from app.db.base import SKIP_INSTRUMENTATION, QueryStats, get_engine
+
+logger = logging.getLogger(__name__)
+
+# plan statement per dialect; other dialects are logged without plans
+_EXPLAIN_PREFIX = {"sqlite": "EXPLAIN QUERY PLAN ", "mysql": "EXPLAIN ", "mariadb": "EXPLAIN "}
+_WHITESPACE = re.compile(r"\s+")
+# statements longer than this are cut in the log
+MAX_LOGGED_STATEMENT = 2000
+
+_explain_tasks: set[asyncio.Task] = set()
+# (application engine, unpooled engine for EXPLAIN built from its URL)
+_explain_engine: tuple[AsyncEngine, AsyncEngine] | None = None
+
+
+def _request_line(scope: Scope, status: int, elapsed: float, stats: QueryStats) -> str:
+    route = getattr(scope.get("route"), "path", None) or scope["path"]
+    return (
+        f"Slow request {scope['method']} {scope['path']} -> {status} in {elapsed * 1000:.1f}ms "
+        f"(route={route} path_params={scope.get('path_params') or {}} "
+        f"query={scope.get('query_string', b'').decode('latin-1')!r}); "
+        f"{stats.count} SQL statements, {stats.seconds * 1000:.1f}ms in DB"
+    )
+
+
+def _format(header: str, statements: list, plans: dict[str, list[str]] | None) -> str:
+    lines = [header]
+    for statement, _params, seconds in statements:
+        lines.append(f"  {seconds * 1000:8.2f}ms  {_WHITESPACE.sub(' ', statement).strip()[:MAX_LOGGED_STATEMENT]}")
+        for row in (plans or {}).get(statement, ()):
+            lines.append(f"              plan: {row}")
+    return "\n".join(lines)
+
+
+def _engine_for_explain(engine: AsyncEngine) -> AsyncEngine:
+    """An unpooled engine so EXPLAIN never holds a connection requests are waiting for. An in-memory
+    SQLite database only exists behind the application's own connection, so it has to share it."""
+    global _explain_engine
+    if engine.dialect.name == "sqlite" and engine.url.database in (None, "", ":memory:"):
+        return engine
+    if _explain_engine is None or _explain_engine[0] is not engine:
+        _explain_engine = (engine, create_async_engine(engine.url, poolclass=NullPool))
+    return _explain_engine[1]
+
+
+async def explain_statements(statements: list) -> dict[str, list[str]]:
+    """EXPLAIN each distinct SELECT once (repeated N+1 queries share a plan) on a fresh connection."""
+    engine = get_engine()
+    prefix = _EXPLAIN_PREFIX.get(engine.dialect.name) if engine is not None else None
+    plans: dict[str, list[str]] = {}
+    if prefix is None:
+        return plans
+    async with _engine_for_explain(engine).connect() as conn:
+        conn = await conn.execution_options(**{SKIP_INSTRUMENTATION: True})
+        for statement, params, _seconds in statements:
+            if statement in plans or params is None or not statement.lstrip().upper().startswith("SELECT"):
+                continue
+            try:
+                result = await conn.exec_driver_sql(prefix + statement, params)
+                plans[statement] = [" | ".join(str(v) for v in row) for row in result.fetchall()]
+            except Exception as exc:
+                plans[statement] = [f"EXPLAIN failed: {exc}"]
+    return plans
+
+
+async def _explain_and_log(header: str, statements: list) -> None:
+    try:
+        plans = await explain_statements(statements)
+    except Exception:
+        logger.debug("EXPLAIN of slow request statements failed", exc_info=True)
+        plans = None
+    logger.warning(_format(header, statements, plans))
+
+
+def report_slow_request(scope: Scope, status: int, elapsed: float, stats: QueryStats) -> None:
+    """Log a slow request with its statements. Plans, when enabled, are fetched by a background task
+    after the response has been sent; if too many are already pending the request is logged without them."""
+    header = _request_line(scope, status, elapsed, stats)
+    statements = stats.statements or []
+    if settings.SLOW_REQUEST_EXPLAIN and statements and len(_explain_tasks) < SLOW_REQUEST_MAX_PENDING_EXPLAINS:
+        # a fresh context: the request's query stats, trace and deadline must not apply to the EXPLAINs
+        task = asyncio.create_task(_explain_and_log(header, statements), context=contextvars.Context())
+        _explain_tasks.add(task)
+        task.add_done_callback(_explain_tasks.discard)
+        return
+    logger.warning(_format(header, statements, None))
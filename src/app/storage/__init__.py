@@ -14,8 +14,8 @@ from .db_storage import DBBlobStorage
 
 logger = logging.getLogger(__name__)
 
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
+UPLOAD_DIR = Path(os.environ.get("UPLOAD_DIR") or "uploads")
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 class Storage(Protocol):
     async def save_cover(self, book_id: str, data: bytes) -> Optional[str]:
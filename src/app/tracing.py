@@ -0,0 +1,227 @@
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from app.config import settings
+from app.metrics import inc_trace_spans_dropped
+
+logger = logging.getLogger(__name__)
+
+# finished traces waiting for the exporter thread; traces are dropped (and counted) when it is full
+EXPORT_QUEUE_SIZE = 1000
+# spans sent per file write / HTTP request
+EXPORT_BATCH_SIZE = 500
+HTTP_EXPORT_TIMEOUT = 5.0
+_HEX_ID = re.compile(r"^(?:[0-9a-f]{16}|[0-9a-f]{32})$")
+
+
+class Span:
+    """One timed operation in Zipkin v2 terms; timestamps and durations are in microseconds."""
+    __slots__ = ("id", "parent_id", "name", "kind", "timestamp", "duration", "tags")
+
+    def __init__(self, name: str, parent_id: str | None, kind: str | None = None, tags: dict | None = None):
+        self.id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.timestamp = int(time.time() * 1_000_000)
+        self.duration = 0
+        self.tags = tags or {}
+
+    def finish(self, seconds: float) -> None:
+        self.duration = max(1, int(seconds * 1_000_000))
+
+
+class Trace:
+    """The spans of one sampled request. Only sampled requests get a Trace, so unsampled ones pay
+    for a single context variable lookup per instrumented call."""
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: list[Span] = []
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_current_span_id: ContextVar[str | None] = ContextVar("current_span_id", default=None)
+
+
+def trace_id_for(correlation_id: str) -> str:
+    """Use the correlation id as trace id when it already is one (our generated ids are 32 hex
+    chars), otherwise derive a stable 128-bit id from it."""
+    if _HEX_ID.match(correlation_id):
+        return correlation_id
+    return hashlib.blake2b(correlation_id.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def is_sampled(trace_id: str, rate: float) -> bool:
+    """Decide from the trace id, so every service seeing the same correlation id decides alike."""
+    if rate <= 0:
+        return False
+    return rate >= 1 or int(trace_id[-8:], 16) < rate * 0x100000000
+
+
+@contextmanager
+def span(name: str, kind: str | None = None, **tags) -> Iterator[Span | None]:
+    """Record the block as a child of the current span, if the request is being traced."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    s = Span(name, _current_span_id.get(), kind, tags)
+    token = _current_span_id.set(s.id)
+    start = time.perf_counter()
+    try:
+        yield s
+    except BaseException as exc:
+        s.tags.setdefault("error", type(exc).__name__)
+        raise
+    finally:
+        s.finish(time.perf_counter() - start)
+        _current_span_id.reset(token)
+        trace.spans.append(s)
+
+
+def record_span(name: str, seconds: float, kind: str | None = None, **tags) -> None:
+    """Record an already timed operation that just ended (used by hooks that measure themselves)."""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    s = Span(name, _current_span_id.get(), kind, tags)
+    s.timestamp -= int(seconds * 1_000_000)
+    s.finish(seconds)
+    trace.spans.append(s)
+
+
+def begin_trace(correlation_id: str, name: str, **tags) -> tuple | None:
+    """Start tracing the current request (in the caller's context) if it is sampled.
+    Returns a handle for `end_trace`, or None when the request is not traced."""
+    if not settings.TRACING_ENDPOINT:
+        return None
+    trace_id = trace_id_for(correlation_id)
+    if not is_sampled(trace_id, settings.TRACING_SAMPLE_RATE):
+        return None
+    trace = Trace(trace_id)
+    root = Span(name, None, "SERVER", {**tags, "correlation_id": correlation_id})
+    return trace, root, _current_trace.set(trace), _current_span_id.set(root.id), time.perf_counter()
+
+
+def end_trace(handle: tuple, name: str | None = None, **tags) -> Trace:
+    """Finish the root span, restore the context and queue the trace for export."""
+    trace, root, trace_token, span_token, start = handle
+    root.finish(time.perf_counter() - start)
+    if name:
+        root.name = name
+    root.tags.update(tags)
+    _current_span_id.reset(span_token)
+    _current_trace.reset(trace_token)
+    trace.spans.append(root)
+    _exporter.submit(trace)
+    return trace
+
+
+def to_zipkin(trace: Trace, service_name: str) -> list[dict]:
+    endpoint = {"serviceName": service_name}
+    out = []
+    for s in trace.spans:
+        d = {
+            "traceId": trace.trace_id,
+            "id": s.id,
+            "name": s.name,
+            "timestamp": s.timestamp,
+            "duration": s.duration,
+            "localEndpoint": endpoint,
+            "tags": {k: str(v) for k, v in s.tags.items()},
+        }
+        if s.parent_id:
+            d["parentId"] = s.parent_id
+        if s.kind:
+            d["kind"] = s.kind
+        out.append(d)
+    return out
+
+
+class _Exporter:
+    """Background thread sending finished traces to the Zipkin v2 HTTP endpoint or appending them
+    to a file (one JSON array of spans per line). Requests only ever do a non-blocking queue put."""
+    def __init__(self):
+        self._queue: queue.Queue[Trace | None] = queue.Queue(EXPORT_QUEUE_SIZE)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, trace: Trace) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            inc_trace_spans_dropped(len(trace.spans))
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Export everything queued so far and stop the thread (it restarts on the next trace)."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch: list[Trace] = []
+            done = item is None
+            if item is not None:
+                batch.append(item)
+            while not done and sum(len(t.spans) for t in batch) < EXPORT_BATCH_SIZE:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    done = True
+                else:
+                    batch.append(item)
+            if batch:
+                self._export(batch)
+            if done:
+                return
+
+    def _export(self, batch: list[Trace]) -> None:
+        spans = [d for t in batch for d in to_zipkin(t, settings.TRACING_SERVICE_NAME)]
+        target = settings.TRACING_ENDPOINT
+        try:
+            if target.startswith(("http://", "https://")):
+                req = urllib.request.Request(
+                    target, data=json.dumps(spans).encode("utf-8"), headers={"Content-Type": "application/json"}, method="POST",
+                )
+                with urllib.request.urlopen(req, timeout=HTTP_EXPORT_TIMEOUT):
+                    pass
+            else:
+                os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+                with open(target, "a", encoding="utf-8") as fh:
+                    fh.write(json.dumps(spans) + "\n")
+        except Exception as exc:
+            inc_trace_spans_dropped(len(spans))
+            logger.warning("Failed to export %d spans to %s: %s", len(spans), target, exc)
+
+
+_exporter = _Exporter()
+
+
+def flush_traces() -> None:
+    _exporter.flush()
@@ -0,0 +1,25 @@
+import logging
+import time
+
+from app.config import settings
+from app.db.base import warm_up_db
+from app.redis_client import warm_up_redis
+from app.security.password import warm_up_hash_pool
+
+logger = logging.getLogger(__name__)
+
+
+async def warm_up() -> None:
+    """Pay connection and process start-up costs during startup, before the server accepts
+    connections, instead of on the first requests. Failures are logged, never fatal."""
+    start = time.perf_counter()
+    for name, step in (
+        ("db", lambda: warm_up_db(settings.WARMUP_DB_CONNECTIONS)),
+        ("redis", warm_up_redis),
+        ("password hashing pool", warm_up_hash_pool),
+    ):
+        try:
+            await step()
+        except Exception:
+            logger.warning("Warm-up of %s failed", name, exc_info=True)
+    logger.info("Warm-up finished in %.0fms", (time.perf_counter() - start) * 1000)
@@ -1,9 +1,18 @@
 import os
 import pathlib
+import tempfile
 from typing import Any
 
+# keep log files and uploaded covers written by the app out of the working tree
+_artifacts_dir = tempfile.mkdtemp(prefix="assignment02-tests-")
+os.environ.setdefault("LOG_DIR", os.path.join(_artifacts_dir, "logs"))
+os.environ.setdefault("UPLOAD_DIR", os.path.join(_artifacts_dir, "uploads"))
+
 import pytest
+from contextlib import contextmanager
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from app.security.jwt import create_access_token
 from app.security.password import hash_password
 
@@ -51,12 +60,50 @@ def test_app() -> TestClient:
             db_path.unlink()
         except Exception:
             pass
-    app = create_app()
+    app = create_app(enable_rate_limiting=False)
     with TestClient(app) as client:
         yield client
 
 type UserWithLogin = tuple[User, dict[str, Any]]
 
+
+class QueryCounter:
+    """SQL statements and commits seen while counting; each one is a round trip to the DB."""
+    def __init__(self):
+        self.statements: list[str] = []
+        self.commits = 0
+
+    @property
+    def round_trips(self) -> int:
+        return len(self.statements) + self.commits
+
+    def __repr__(self) -> str:
+        listing = "\n  ".join(self.statements)
+        return f"{len(self.statements)} statements, {self.commits} commits:\n  {listing}"
+
+
+@pytest.fixture
+def count_queries():
+    """Context manager factory counting statements executed on any engine inside the block."""
+    @contextmanager
+    def _count():
+        counter = QueryCounter()
+
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            counter.statements.append(statement)
+
+        def on_commit(conn):
+            counter.commits += 1
+
+        event.listen(Engine, "before_cursor_execute", on_execute)
+        event.listen(Engine, "commit", on_commit)
+        try:
+            yield counter
+        finally:
+            event.remove(Engine, "before_cursor_execute", on_execute)
+            event.remove(Engine, "commit", on_commit)
+    return _count
+
 @pytest.fixture
 def admin_user(test_app: TestClient) -> UserWithLogin:
     # create admin in DB and return Authorization header; depends on test_app to ensure DB is reset
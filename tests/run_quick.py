@@ -3,7 +3,7 @@ from app.main import create_app
 import uuid
 import sys
 
-app = create_app()
+app = create_app(enable_rate_limiting=False)
 client = TestClient(app)
 
 def run():
@@ -8,8 +8,10 @@ from app.db.base import get_session
 from conftest import UserWithLogin
 
 
-def test_redis_null_impl_returns_null():
-    # ensure no redis url env
+def test_redis_null_impl_returns_null(monkeypatch):
+    # ensure no redis url env and caching explicitly disabled
+    from app.config import settings, CacheKind
+    monkeypatch.setattr(settings, "CACHE_BACKEND", CacheKind.NULL)
     r = get_redis()
     assert isinstance(r, _NullRedis)
 
@@ -0,0 +1,109 @@
+import asyncio
+
+import httpx
+import pytest
+from starlette.responses import PlainTextResponse
+
+from app.middleware.admission_middleware import AdmissionControlMiddleware
+
+
+class _GatedApp:
+    """ASGI app whose requests block until released, recording the order they started in."""
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.started: list[str] = []
+
+    async def __call__(self, scope, receive, send):
+        self.started.append(scope["path"])
+        await self.gate.wait()
+        await PlainTextResponse("ok")(scope, receive, send)
+
+
+def _client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+async def _until(predicate) -> None:
+    for _ in range(200):
+        if predicate():
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError("condition not reached")
+
+
+@pytest.mark.asyncio
+async def test_waiting_requests_time_out_with_retry_after():
+    inner = _GatedApp()
+    mw = AdmissionControlMiddleware(inner, max_in_flight=1, queue_size=5, queue_timeout=0.05)
+    async with _client(mw) as client:
+        first = asyncio.create_task(client.get("/api/v1/books/"))
+        await _until(lambda: inner.started)
+        r = await client.get("/api/v1/books/")
+        assert r.status_code == 503 and r.headers["Retry-After"] == "1"
+        # probes are never queued
+        health = asyncio.create_task(client.get("/health"))
+        await _until(lambda: len(inner.started) == 2)
+        inner.gate.set()
+        assert (await first).status_code == 200 and (await health).status_code == 200
+    assert mw.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_priority_order_and_eviction():
+    inner = _GatedApp()
+    mw = AdmissionControlMiddleware(inner, max_in_flight=1, queue_size=2, queue_timeout=5)
+    async with _client(mw) as client:
+        running = asyncio.create_task(client.get("/api/v1/books/"))
+        await _until(lambda: inner.started)
+        anon = asyncio.create_task(client.get("/api/v1/books/anon"))
+        user = asyncio.create_task(client.get("/api/v1/books/user", headers={"Authorization": "Bearer x"}))
+        await _until(lambda: mw._queued() == 2)
+        # queue full: an auth request displaces the anonymous waiter
+        login = asyncio.create_task(client.post("/api/v1/auth/login"))
+        assert (await anon).status_code == 503
+        # ...and a second anonymous request is rejected outright
+        assert (await client.get("/api/v1/books/late")).status_code == 503
+        inner.gate.set()
+        for t in (running, user, login):
+            assert (await t).status_code == 200
+    assert inner.started == ["/api/v1/books/", "/api/v1/auth/login", "/api/v1/books/user"]
+    assert mw.in_flight == 0 and mw._queued() == 0
+
+
+@pytest.mark.asyncio
+async def test_disabled_when_limit_is_zero():
+    inner = _GatedApp()
+    inner.gate.set()
+    mw = AdmissionControlMiddleware(inner, max_in_flight=0)
+    async with _client(mw) as client:
+        results = await asyncio.gather(*(client.get("/api/v1/books/") for _ in range(5)))
+    assert all(r.status_code == 200 for r in results)
+
+
+def test_rate_limiter_runs_before_admission_control():
+    from app.main import create_app
+    from app.middleware.rate_limit_middleware import RateLimitMiddleware
+    order = [m.cls for m in create_app(enable_rate_limiting=True).user_middleware]
+    assert order.index(RateLimitMiddleware) < order.index(AdmissionControlMiddleware)
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_client_cannot_hold_admission_slots():
+    from app.middleware.rate_limit_middleware import RateLimitMiddleware
+    inner = _GatedApp()
+    mw = AdmissionControlMiddleware(inner, max_in_flight=1, queue_size=5, queue_timeout=5)
+    app = RateLimitMiddleware(mw, window=60.0, max_requests=1, min_interval=0.0, blacklist_duration=30.0)
+    legit = httpx.AsyncClient(transport=httpx.ASGITransport(app=app, client=("10.0.0.1", 1000)), base_url="http://test")
+    flood = httpx.AsyncClient(transport=httpx.ASGITransport(app=app, client=("10.0.0.2", 1000)), base_url="http://test")
+    async with legit, flood:
+        running = asyncio.create_task(legit.get("/api/v1/books/"))
+        await _until(lambda: inner.started)
+        queued = asyncio.create_task(flood.get("/api/v1/books/"))
+        await _until(lambda: mw._queued() == 1)
+        # over its limit, the flooding client is turned away before reaching the queue
+        for _ in range(5):
+            assert (await flood.get("/api/v1/books/")).status_code == 429
+        assert mw._queued() == 1
+        inner.gate.set()
+        assert (await running).status_code == 200
+        assert (await queued).status_code == 200
@@ -0,0 +1,69 @@
+import pytest
+from prometheus_client import CollectorRegistry
+
+from app import metrics
+from app.bloom import CountingBloomFilter, _EntityFilter
+from app.config import settings
+from conftest import UserWithLogin
+
+
+@pytest.fixture(autouse=True)
+def bloom_enabled(monkeypatch):
+    # off by default; enabled before test_app so the lifespan builds the filters
+    monkeypatch.setattr(settings, "BLOOM_FILTER_ENABLED", True)
+
+
+def test_counting_bloom_filter_add_remove():
+    f = CountingBloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f"id-{i}" for i in range(1000)]
+    for k in keys:
+        f.add(k)
+    assert all(k in f for k in keys)
+    false_positives = sum(f"other-{i}" in f for i in range(10_000))
+    assert false_positives < 300
+    f.remove("id-0")
+    assert "id-0" not in f
+    assert all(k in f for k in keys[1:])
+
+
+def test_only_ids_added_by_this_process_are_removed():
+    entity = _EntityFilter()
+    entity.filter = CountingBloomFilter(capacity=10, error_rate=0.5)
+    keys = [f"id-{i}" for i in range(10)]
+    for k in keys:
+        entity.add(k)
+    # a deleted row this filter never saw (e.g. inserted by another process) may be a false
+    # positive; decrementing its counters would turn real members into false negatives
+    positives = [f"other-{i}" for i in range(1000) if f"other-{i}" in entity.filter]
+    assert positives
+    for k in positives:
+        entity.remove(k)
+    assert all(k in entity.filter for k in keys)
+    assert entity.filter.count == 10
+    entity.remove("id-0")
+    assert entity.filter.count == 9
+    assert all(k in entity.filter for k in keys[1:])
+
+
+def test_unknown_ids_short_circuit(test_app, admin_user: UserWithLogin):
+    metrics.set_registry(CollectorRegistry())
+    assert test_app.get("/api/v1/books/missing-book").status_code == 404
+    assert test_app.get("/api/v1/books/missing-book/cover").status_code == 404
+    assert test_app.get("/api/v1/reviews/missing-review").status_code == 404
+    assert test_app.get("/api/v1/comments/missing-comment").status_code == 404
+    out = metrics.metrics_response().body.decode("utf-8")
+    assert 'app_bloom_lookups_total{entity="book",result="negative"} 2.0' in out
+    assert 'app_bloom_lookups_total{entity="review",result="negative"} 1.0' in out
+    assert 'app_bloom_lookups_total{entity="comment",result="negative"} 1.0' in out
+    assert 'app_bloom_filter_fill_ratio{entity="book"}' in out
+
+
+def test_filters_follow_creates_and_deletes(test_app, admin_user: UserWithLogin):
+    metrics.set_registry(CollectorRegistry())
+    assert test_app.post("/api/v1/books/", json={"id": "bloom-book", "title": "B"}, headers=admin_user[1]).status_code == 201
+    assert test_app.get("/api/v1/books/bloom-book").status_code == 200
+    assert test_app.delete("/api/v1/books/bloom-book").status_code == 200
+    assert test_app.get("/api/v1/books/bloom-book").status_code == 404
+    out = metrics.metrics_response().body.decode("utf-8")
+    assert 'app_bloom_lookups_total{entity="book",result="found"} 1.0' in out
+    assert 'app_bloom_lookups_total{entity="book",result="negative"} 1.0' in out
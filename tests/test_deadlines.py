@@ -0,0 +1,120 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db import get_storage_dep
+from app.db.base import normalize_statement
+from app.db.statement_timeouts import _mysql_before_execute, install_statement_timeouts
+from app.deadlines import parse_route_timeouts, request_deadline, route_timeout
+from conftest import UserWithLogin
+
+_ENDLESS = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"
+
+
+class _SlowStorage:
+    async def get_blob(self, key: str):
+        await asyncio.sleep(5)
+
+
+def test_route_timeout_lookup():
+    spec = "GET /api/v1/books/=5, /api/v1/books/{book_id}/cover=10"
+    assert parse_route_timeouts(spec)[("GET", "/api/v1/books/")] == 5
+    assert route_timeout(spec, 30, "GET", "/api/v1/books/") == 5
+    assert route_timeout(spec, 30, "POST", "/api/v1/books/") == 30
+    assert route_timeout(spec, 30, "PUT", "/api/v1/books/{book_id}/cover") == 10
+
+
+def test_client_deadline_cancels_handler(test_app, admin_user: UserWithLogin):
+    assert test_app.post("/api/v1/books/", json={"id": "dl-1", "title": "Slow cover"}, headers=admin_user[1]).status_code == 201
+    test_app.app.dependency_overrides[get_storage_dep] = lambda: _SlowStorage()
+    try:
+        start = time.monotonic()
+        r = test_app.get("/api/v1/books/dl-1/cover", headers={"X-Request-Timeout": "0.1"})
+        assert r.status_code == 504
+        assert r.json()["code"] == "REQUEST_TIMEOUT" and r.json()["message"] == "Request timed out"
+        assert time.monotonic() - start < 2
+    finally:
+        test_app.app.dependency_overrides.clear()
+    out = test_app.get("/metrics").text
+    assert 'app_http_request_timeouts_total{method="GET",route="/api/v1/books/{book_id}/cover",source="client"} 1.0' in out
+    # an invalid header falls back to the route timeout
+    assert test_app.get("/api/v1/books/dl-1", headers={"X-Request-Timeout": "soon"}).status_code == 200
+
+
+def test_route_timeout_from_settings(test_app, admin_user: UserWithLogin, monkeypatch):
+    from app.config import settings
+    assert test_app.post("/api/v1/books/", json={"id": "dl-2", "title": "Slow cover"}, headers=admin_user[1]).status_code == 201
+    test_app.app.dependency_overrides[get_storage_dep] = lambda: _SlowStorage()
+    monkeypatch.setattr(settings, "ROUTE_TIMEOUTS", "/api/v1/books/{book_id}/cover=0.05")
+    try:
+        r = test_app.get("/api/v1/books/dl-2/cover")
+    finally:
+        test_app.app.dependency_overrides.clear()
+    assert r.status_code == 504
+
+
+@pytest.mark.asyncio
+async def test_sqlite_statement_stops_at_deadline():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    install_statement_timeouts(engine.sync_engine)
+    try:
+        async with engine.connect() as conn:
+            token = request_deadline.set(time.monotonic() + 0.05)
+            try:
+                with pytest.raises(OperationalError, match="interrupted"):
+                    await conn.execute(text(_ENDLESS))
+            finally:
+                request_deadline.reset(token)
+            # without a deadline the same connection runs statements normally
+            assert (await conn.execute(text("SELECT 1"))).scalar_one() == 1
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.parametrize("mariadb, expected", [
+    (False, "SELECT /*+ MAX_EXECUTION_TIME("),
+    (True, "SET STATEMENT max_statement_time="),
+])
+def test_mysql_statement_timeout_hint(mariadb, expected):
+    conn = SimpleNamespace(dialect=SimpleNamespace(is_mariadb=mariadb))
+    stmt = "SELECT books.id FROM books WHERE books.title LIKE %s"
+    token = request_deadline.set(time.monotonic() + 2)
+    try:
+        rewritten, params = _mysql_before_execute(conn, None, stmt, ("%a%",), None, False)
+        untouched, _ = _mysql_before_execute(conn, None, "UPDATE books SET title=%s", ("x",), None, False)
+    finally:
+        request_deadline.reset(token)
+    assert rewritten.startswith(expected) and rewritten.endswith(stmt[6:]) and params == ("%a%",)
+    assert untouched == "UPDATE books SET title=%s"
+    assert normalize_statement(rewritten) == normalize_statement(stmt)
+    assert _mysql_before_execute(conn, None, stmt, (), None, False)[0] == stmt
+
+
+def test_deadlines_apply_to_every_route(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.config import settings
+    from app.main import create_app
+
+    app = create_app(enable_rate_limiting=False)
+
+    # a plain route, not declared through the API routers' route class
+    @app.get("/plain/{seconds}")
+    async def plain(seconds: float):
+        await asyncio.sleep(seconds)
+        return {"slept": seconds}
+
+    monkeypatch.setattr(settings, "REQUEST_TIMEOUT", 0.05)
+    with TestClient(app) as client:
+        r = client.get("/plain/0.5")
+        assert r.status_code == 504 and r.json()["message"] == "Request timed out"
+        # the matched route's template selects its ROUTE_TIMEOUTS entry
+        monkeypatch.setattr(settings, "ROUTE_TIMEOUTS", "GET /plain/{seconds}=2")
+        assert client.get("/plain/0.2").status_code == 200
+        # a shorter client timeout still wins over the route's
+        assert client.get("/plain/0.5", headers={"X-Request-Timeout": "0.05"}).status_code == 504
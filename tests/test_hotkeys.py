@@ -0,0 +1,57 @@
+from prometheus_client import CollectorRegistry
+
+from app import metrics
+from app.hotkeys import CountMinSketch, HeavyHitters, reset_hot_keys
+from conftest import UserWithLogin
+
+
+def test_count_min_sketch_never_undercounts():
+    s = CountMinSketch(width=64, depth=4)
+    for i in range(500):
+        s.add(f"k{i % 50}")
+    assert all(s.estimate(f"k{i}") >= 10 for i in range(50))
+    s.decay()
+    assert s.estimate("k0") >= 5
+
+
+def test_heavy_hitters_tracks_top_k():
+    hh = HeavyHitters(k=3, width=512, depth=4)
+    for i in range(200):
+        hh.add("hot")
+        if i % 2 == 0:
+            hh.add("warm")
+        hh.add(f"cold-{i}")
+    top = hh.top()
+    assert len(top) == 3
+    assert top[0] == ("hot", 200)
+    assert top[1][0] == "warm"
+
+
+def test_admin_hotkeys_endpoint_and_metrics(test_app, admin_user: UserWithLogin, normal_user: UserWithLogin):
+    metrics.set_registry(CollectorRegistry())
+    reset_hot_keys()
+    book_id = "hot-book"
+    assert test_app.post("/api/v1/books/", json={"id": book_id, "title": "Hot"}, headers=admin_user[1]).status_code == 201
+    for _ in range(5):
+        test_app.get(f"/api/v1/books/{book_id}")
+    r = test_app.get("/api/v1/admin/hotkeys", params={"category": "book"}, headers=admin_user[1])
+    assert r.status_code == 200
+    assert r.json()["book"][0] == {"key": book_id, "count": 5}
+    # cache lookups are tracked by full key
+    r = test_app.get("/api/v1/admin/hotkeys", params={"category": "cache"}, headers=admin_user[1])
+    assert r.json()["cache"][0]["key"] == f"book:{book_id}"
+    assert test_app.get("/api/v1/admin/hotkeys", params={"category": "nope"}, headers=admin_user[1]).status_code == 400
+    assert test_app.get("/api/v1/admin/hotkeys", headers=normal_user[1]).status_code == 403
+    out = metrics.metrics_response().body.decode("utf-8")
+    # metrics carry ranks, never the keys themselves
+    assert 'app_hotkey_estimated_count{category="book",rank="1"} 5.0' in out
+    assert book_id not in out
+
+
+def test_missing_ids_are_not_tracked(test_app, admin_user: UserWithLogin):
+    reset_hot_keys()
+    for i in range(5):
+        assert test_app.get(f"/api/v1/books/probe-{i}").status_code == 404
+        assert test_app.get(f"/api/v1/books/probe-{i}/cover").status_code == 404
+    r = test_app.get("/api/v1/admin/hotkeys", headers=admin_user[1])
+    assert r.json() == {"book": [], "cover": [], "cache": []}
@@ -0,0 +1,45 @@
+from prometheus_client import CollectorRegistry
+
+from app import metrics
+from conftest import UserWithLogin
+
+
+def test_red_metrics_use_route_templates(test_app, admin_user: UserWithLogin):
+    metrics.set_registry(CollectorRegistry())
+    assert test_app.post("/api/v1/books/", json={"id": "red-1", "title": "Red"}, headers=admin_user[1]).status_code == 201
+    test_app.get("/api/v1/books/red-1")
+    test_app.get("/api/v1/books/red-2")
+    test_app.get("/no/such/path")
+    out = metrics.metrics_response().body.decode("utf-8")
+    assert 'app_http_requests_total{method="GET",route="/api/v1/books/{book_id}",status="200"} 1.0' in out
+    assert 'app_http_requests_total{method="GET",route="/api/v1/books/{book_id}",status="404"} 1.0' in out
+    assert 'app_http_requests_total{method="GET",route="<unmatched>",status="404"} 1.0' in out
+    assert 'app_http_requests_total{method="POST",route="/api/v1/books/",status="201"} 1.0' in out
+    assert not [line for line in out.splitlines() if line.startswith("app_http") and "red-" in line]
+    assert 'app_http_request_duration_seconds_count{method="GET",route="/api/v1/books/{book_id}",status="200"} 1.0' in out
+    assert 'app_http_requests_in_flight{method="GET"} 0.0' in out
+    assert 'app_http_request_size_bytes_count{method="POST",route="/api/v1/books/"} 1.0' in out
+    assert 'app_http_response_size_bytes_count{method="GET",route="/api/v1/books/{book_id}"} 2.0' in out
+
+
+def test_normalize_statement():
+    from app.db.base import normalize_statement
+    assert normalize_statement("SELECT a FROM t1\n  WHERE id = 5 AND name = 'o''x' AND c IN (?, ?, ?)") == (
+        "SELECT a FROM t1 WHERE id = ? AND name = ? AND c IN (?)"
+    )
+    assert normalize_statement("SELECT * FROM t WHERE x IN (%s, %s)") == "SELECT * FROM t WHERE x IN (?)"
+
+
+def test_request_query_count_and_budget(test_app, admin_user: UserWithLogin, caplog, monkeypatch):
+    from app.config import settings
+    metrics.set_registry(CollectorRegistry())
+    assert test_app.post("/api/v1/books/", json={"id": "q-1", "title": "Q"}, headers=admin_user[1]).status_code == 201
+    monkeypatch.setattr(settings, "DB_QUERY_BUDGET", 0)
+    test_app.get("/api/v1/books/q-1")
+    out = metrics.metrics_response().body.decode("utf-8")
+    assert 'app_http_request_db_queries_sum{method="GET",route="/api/v1/books/{book_id}"} 1.0' in out
+    assert 'app_db_statement_seconds_count{statement="SELECT books.id' in out
+    monkeypatch.setattr(settings, "DB_QUERY_BUDGET", 1)
+    with caplog.at_level("WARNING", logger="app.middleware.metrics"):
+        test_app.get("/api/v1/books/", params={"q": "Q"})
+    assert any("SQL statements (budget 1)" in r.getMessage() for r in caplog.records)
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+import pytest
+from jose import ExpiredSignatureError
+from prometheus_client import CollectorRegistry
+
+from app import metrics
+from app.security import jwt as jwt_mod
+from app.security.jwt import create_access_token, decode_token, clear_token_cache
+
+
+def test_decode_token_served_from_cache(monkeypatch):
+    metrics.set_registry(CollectorRegistry())
+    clear_token_cache()
+    token = create_access_token(subject="cached-sub")
+    assert decode_token(token)["sub"] == "cached-sub"
+    # a cached token must not be re-verified
+    def _fail(*args, **kwargs):
+        raise AssertionError("signature verification should be skipped")
+    monkeypatch.setattr(jwt_mod.jwt, "decode", _fail)
+    assert decode_token(token)["sub"] == "cached-sub"
+    out = metrics.metrics_response().body.decode("utf-8")
+    assert 'app_jwt_cache_total{result="hit"} 1.0' in out
+
+
+def test_decode_token_cache_honors_exp_and_bound(monkeypatch):
+    clear_token_cache()
+    expired = create_access_token(subject="old", expires_delta=timedelta(seconds=-1))
+    with pytest.raises(ExpiredSignatureError):
+        decode_token(expired)
+    assert len(jwt_mod._token_cache) == 0
+    monkeypatch.setattr(jwt_mod, "TOKEN_CACHE_MAX_ENTRIES", 2)
+    for i in range(3):
+        decode_token(create_access_token(subject=f"s{i}"))
+    assert len(jwt_mod._token_cache) == 2
@@ -0,0 +1,66 @@
+import logging
+import queue
+
+from prometheus_client import CollectorRegistry
+
+from app import metrics
+from app.main import configure_logging
+from app.log_pipeline import DroppingQueueHandler, SamplingFilter, install_log_pipeline, parse_sample_rates, stop_log_pipeline
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _record(name: str, level: int) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, "msg", None, None)
+
+
+def test_parse_sample_rates():
+    assert parse_sample_rates("app.api.books=0.1, app.security.dependencies=2,bad,=1") == {
+        "app.api.books": 0.1,
+        "app.security.dependencies": 1.0,
+    }
+
+
+def test_sampling_filter_only_drops_low_levels():
+    metrics.set_registry(CollectorRegistry())
+    f = SamplingFilter({"app.api.books": 0.0, "app.api": 1.0})
+    assert not f.filter(_record("app.api.books", logging.INFO))
+    assert not f.filter(_record("app.api.books.sub", logging.DEBUG))
+    assert f.filter(_record("app.api.books", logging.WARNING))
+    assert f.filter(_record("app.api.reviews", logging.INFO))
+    assert f.filter(_record("app.api.bookshelf", logging.INFO))
+    out = metrics.metrics_response().body.decode("utf-8")
+    assert 'app_log_records_dropped_total{reason="sampled"} 2.0' in out
+
+
+def test_full_queue_drops_without_blocking():
+    metrics.set_registry(CollectorRegistry())
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.handle(_record("app", logging.INFO))
+    out = metrics.metrics_response().body.decode("utf-8")
+    assert 'app_log_records_dropped_total{reason="queue_full"} 3.0' in out
+
+
+def test_install_moves_handlers_behind_queue():
+    target = _ListHandler()
+    lg = logging.getLogger("test.log_pipeline")
+    lg.addHandler(target)
+    lg.propagate = False
+    try:
+        install_log_pipeline(100)
+        assert len(lg.handlers) == 1 and isinstance(lg.handlers[0], DroppingQueueHandler)
+        lg.warning("hello %s", "world")
+        stop_log_pipeline()
+        assert [r.getMessage() for r in target.records] == ["hello world"]
+    finally:
+        for h in list(lg.handlers):
+            lg.removeHandler(h)
+        configure_logging()
@@ -0,0 +1,24 @@
+import logging
+
+
+def test_correlation_id_is_echoed(test_app):
+    r = test_app.get("/health", headers={"X-Correlation-ID": "abc-123"})
+    assert r.headers["X-Correlation-ID"] == "abc-123"
+    r = test_app.get("/health", headers={"X-Request-ID": "req.42"})
+    assert r.headers["X-Correlation-ID"] == "req.42"
+
+
+def test_correlation_id_generated_when_missing_or_invalid(test_app):
+    generated = test_app.get("/health").headers["X-Correlation-ID"]
+    assert len(generated) == 32
+    r = test_app.get("/health", headers={"X-Correlation-ID": "bad id\twith spaces"})
+    assert r.headers["X-Correlation-ID"] != "bad id\twith spaces"
+
+
+def test_one_access_line_per_request(test_app, caplog):
+    with caplog.at_level(logging.INFO, logger="app.middleware"):
+        test_app.get("/api/v1/books/does-not-exist", params={"x": "1"}, headers={"X-Correlation-ID": "cid-1"})
+    lines = [r.getMessage() for r in caplog.records if r.name == "app.middleware"]
+    assert len(lines) == 1
+    assert "GET /api/v1/books/does-not-exist?x=1 - 404 -" in lines[0]
+    assert "(cid=cid-1)" in lines[0]
@@ -0,0 +1,47 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from prometheus_client import CollectorRegistry
+
+from app import metrics
+from app.loop_monitor import BlockingWatchdog, _measure_lag
+
+
+def _block_the_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_lag_histogram_records_blocking():
+    reg = CollectorRegistry()
+    metrics.set_registry(reg)
+    task = asyncio.create_task(_measure_lag(0.01))
+    await asyncio.sleep(0.02)
+    _block_the_loop(0.15)
+    await asyncio.sleep(0.05)
+    task.cancel()
+    assert reg.get_sample_value("app_event_loop_lag_seconds_count") >= 2
+    # the blocked sleep overshot by ~0.14s
+    assert reg.get_sample_value("app_event_loop_lag_seconds_bucket", {"le": "0.1"}) < reg.get_sample_value("app_event_loop_lag_seconds_count")
+
+
+@pytest.mark.asyncio
+async def test_watchdog_logs_blocking_stack(caplog):
+    reg = CollectorRegistry()
+    metrics.set_registry(reg)
+    watchdog = BlockingWatchdog(asyncio.get_running_loop(), 0.05)
+    watchdog.start()
+    try:
+        await asyncio.sleep(0.1)
+        with caplog.at_level(logging.WARNING, logger="app.loop_monitor"):
+            _block_the_loop(0.3)
+            await asyncio.sleep(0.1)
+    finally:
+        watchdog.stop()
+    blocked = [r.getMessage() for r in caplog.records if "Event loop blocked" in r.getMessage()]
+    assert len(blocked) == 1
+    assert "_block_the_loop" in blocked[0]
+    assert reg.get_sample_value("app_event_loop_blocked_total") == 1
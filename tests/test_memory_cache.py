@@ -0,0 +1,52 @@
+import pytest
+
+from app.config import settings, CacheKind
+from app.redis_client import _MemoryRedis, get_redis, get_memory_cache
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_ttl(monkeypatch):
+    r = _MemoryRedis(max_bytes=1024)
+    assert await r.set("k", "v", ex=60) is True
+    assert await r.get("k") == "v"
+    # expire the entry by moving the clock forward
+    import time
+    now = time.monotonic()
+    monkeypatch.setattr("app.redis_client.time.monotonic", lambda: now + 61)
+    assert await r.get("k") is None
+    assert len(r) == 0 and r.nbytes == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_evicts_least_recently_used():
+    r = _MemoryRedis(max_bytes=3 * (_MemoryRedis._ENTRY_OVERHEAD + 2))
+    for k in ("a", "b", "c"):
+        await r.set(k, "x")
+    # touch 'a' so 'b' becomes the LRU entry
+    assert await r.get("a") == "x"
+    await r.set("d", "x")
+    assert await r.get("b") is None
+    assert await r.get("a") == "x"
+    assert r.nbytes <= r.max_bytes
+    assert await r.delete("a", "missing") == 1
+
+
+@pytest.mark.asyncio
+async def test_get_redis_uses_memory_backend_when_configured(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_BACKEND", CacheKind.MEMORY)
+    r = get_redis()
+    await r.set("book:memtest", "cached")
+    assert await get_redis().get("book:memtest") == "cached"
+    assert await get_memory_cache().delete("book:memtest") == 1
+
+
+def test_book_cache_invalidated_on_update(test_app, admin_user):
+    book_id = "memcache-book"
+    r = test_app.post("/api/v1/books/", json={"id": book_id, "title": "Before"}, headers=admin_user[1])
+    assert r.status_code == 201
+    assert test_app.get(f"/api/v1/books/{book_id}").json()["title"] == "Before"
+    r = test_app.put(f"/api/v1/books/{book_id}", json={"id": book_id, "title": "After"}, headers=admin_user[1])
+    assert r.status_code == 200
+    assert test_app.get(f"/api/v1/books/{book_id}").json()["title"] == "After"
+    assert test_app.delete(f"/api/v1/books/{book_id}").status_code == 200
+    assert test_app.get(f"/api/v1/books/{book_id}").status_code == 404
@@ -0,0 +1,66 @@
+import tracemalloc
+
+import pytest
+
+from app import memory_diagnostics
+from conftest import UserWithLogin
+
+BASE = "/api/v1/admin/memory"
+
+
+@pytest.fixture
+def stop_tracing():
+    yield
+    if tracemalloc.is_tracing():
+        memory_diagnostics.stop_tracing()
+
+
+def test_snapshot_store_is_bounded(stop_tracing):
+    memory_diagnostics.start_tracing()
+    ids = [memory_diagnostics.take_snapshot() for _ in range(memory_diagnostics.MAX_SNAPSHOTS + 2)]
+    assert [s["id"] for s in memory_diagnostics.list_snapshots()] == ids[-memory_diagnostics.MAX_SNAPSHOTS:]
+    with pytest.raises(memory_diagnostics.SnapshotNotFound):
+        memory_diagnostics.top_allocations(ids[0])
+
+
+def test_diff_shows_growth(stop_tracing):
+    memory_diagnostics.start_tracing()
+    base = memory_diagnostics.take_snapshot()
+    leak = [bytearray(1024) for _ in range(200)]
+    after = memory_diagnostics.take_snapshot()
+    diff = memory_diagnostics.diff_snapshots(after, base, limit=5)
+    assert any("test_memory_diagnostics.py" in d["site"] and d["size_diff_bytes"] >= 200 * 1024 for d in diff)
+    assert all("tracemalloc" not in d["site"] for d in memory_diagnostics.top_allocations(after, limit=50))
+    del leak
+
+
+def test_memory_endpoints(test_app, admin_user: UserWithLogin, normal_user: UserWithLogin, stop_tracing):
+    headers = admin_user[1]
+    assert test_app.post(f"{BASE}/snapshots", headers=headers).status_code == 409
+    assert test_app.post(f"{BASE}/tracemalloc/start", headers=normal_user[1]).status_code == 403
+
+    r = test_app.post(f"{BASE}/tracemalloc/start", params={"frames": 5}, headers=headers)
+    assert r.status_code == 200 and r.json()["tracing"] and r.json()["frames"] == 5
+    first = test_app.post(f"{BASE}/snapshots", headers=headers).json()["id"]
+    second = test_app.post(f"{BASE}/snapshots", headers=headers).json()["id"]
+    assert [s["id"] for s in test_app.get(f"{BASE}/snapshots", headers=headers).json()] == [first, second]
+
+    top = test_app.get(f"{BASE}/snapshots/{second}/top", params={"key_type": "traceback", "limit": 3}, headers=headers)
+    assert top.status_code == 200 and 0 < len(top.json()) <= 3
+    assert {"site", "size_bytes", "count"} <= set(top.json()[0])
+    diff = test_app.get(f"{BASE}/snapshots/{second}/diff/{first}", headers=headers)
+    assert diff.status_code == 200 and "size_diff_bytes" in diff.json()[0]
+    assert test_app.get(f"{BASE}/snapshots/{second}/top", params={"key_type": "bogus"}, headers=headers).status_code == 400
+    assert test_app.get(f"{BASE}/snapshots/9999/diff/{first}", headers=headers).status_code == 404
+
+    assert 'app_tracemalloc_traced_bytes{kind="peak"}' in test_app.get("/metrics").text
+    r = test_app.post(f"{BASE}/tracemalloc/stop", headers=headers)
+    assert r.json()["tracing"] is False and r.json()["snapshots"] == []
+    assert "app_tracemalloc_traced_bytes{" not in test_app.get("/metrics").text
+
+
+def test_inprocess_cache_size_gauges(test_app):
+    out = test_app.get("/metrics").text
+    for cache in ("principal", "jwt", "memory", "hotkeys", "bloom"):
+        assert f'app_inprocess_cache_entries{{cache="{cache}"}}' in out
+    assert 'app_inprocess_cache_bytes{cache="hotkeys"}' in out
@@ -0,0 +1,41 @@
+import os
+import pathlib
+import subprocess
+import sys
+
+SRC = str(pathlib.Path(__file__).resolve().parents[1] / "src")
+
+_WORKER = """
+import os
+from app import metrics
+print(os.getpid())
+metrics.inc_redis_hitrate("hit")
+metrics.inc_http_in_flight("GET", 1)
+metrics.observe_http_request("GET", "/api/v1/books/", 200, 0.02, 0, 100)
+"""
+
+_SCRAPE = """
+import sys
+from app import metrics
+for pid in sys.argv[1:]:
+    metrics.mark_process_dead(int(pid))
+print(metrics.metrics_response().body.decode())
+"""
+
+
+def _run(code: str, env: dict, *args: str) -> str:
+    return subprocess.run([sys.executable, "-c", code, *args], env=env, check=True, capture_output=True, text=True).stdout
+
+
+def test_metrics_aggregate_across_worker_processes(tmp_path):
+    env = {**os.environ, "PYTHONPATH": SRC, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    pids = [_run(_WORKER, env).strip() for _ in range(2)]
+    assert 'app_http_requests_in_flight{method="GET"} 2.0' in _run(_SCRAPE, env)
+    out = _run(_SCRAPE, env, *pids)
+    assert 'app_cache_redis_hitrate_total{cache="redis",result="hit"} 2.0' in out
+    assert 'app_http_request_duration_seconds_count{method="GET",route="/api/v1/books/",status="200"} 2.0' in out
+    # live gauges stop counting workers once they are marked dead; counters and histograms keep their values
+    assert 'app_http_requests_in_flight{method="GET"}' not in out
+    # per-process scrape-time collectors are still exported by the answering worker
+    assert 'app_inprocess_cache_entries' in out
+    assert "process_cpu_seconds_total" not in out
@@ -0,0 +1,48 @@
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.security import password
+from app.security.password import hash_password_async, verify_password_async, shutdown_hash_pool
+
+
+@pytest.mark.asyncio
+async def test_async_hash_and_verify_in_pool():
+    try:
+        h = await hash_password_async("secret")
+        assert await verify_password_async("secret", h) is True
+        assert await verify_password_async("wrong", h) is False
+        # hashes are interchangeable with the synchronous helpers
+        assert password.verify_password("secret", h) is True
+    finally:
+        shutdown_hash_pool()
+
+
+@pytest.mark.asyncio
+async def test_hash_queue_timeout_returns_503(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 0)
+    monkeypatch.setattr(settings, "PASSWORD_HASH_QUEUE_TIMEOUT", 0.01)
+    monkeypatch.setattr(password, "_hash_slots", None)
+    slots = password._get_hash_slots()
+    await slots.acquire()
+    try:
+        with pytest.raises(HTTPException) as ei:
+            await hash_password_async("secret")
+        assert ei.value.status_code == 503
+        assert "Retry-After" in ei.value.headers
+    finally:
+        slots.release()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_starts_every_worker(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 2)
+    shutdown_hash_pool()
+    try:
+        await password.warm_up_hash_pool()
+        pool = password._hash_pool
+        assert pool is not None
+        assert len(pool._processes) == 2
+        assert all(p.is_alive() for p in pool._processes.values())
+    finally:
+        shutdown_hash_pool()
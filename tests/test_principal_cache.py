@@ -0,0 +1,43 @@
+from app.security.principal_cache import principal_cache
+from conftest import UserWithLogin
+
+
+def _user_selects(statements: list[str]) -> list[str]:
+    return [s for s in statements if s.lstrip().upper().startswith("SELECT") and "FROM users" in s]
+
+
+def test_principal_cached_after_authenticated_request(test_app, normal_user: UserWithLogin, count_queries):
+    user, headers = normal_user
+    principal_cache.clear()
+    with count_queries() as q:
+        r = test_app.get("/api/v1/users/me", headers=headers)
+    assert r.status_code == 200
+    assert _user_selects(q.statements)
+    # second request is served from the cache without loading the user again
+    with count_queries() as q:
+        r2 = test_app.get("/api/v1/users/me", headers=headers)
+    assert r2.status_code == 200
+    assert r2.json()["username"] == user.username
+    assert _user_selects(q.statements) == [], q
+
+
+def test_without_redis_principals_are_cached_once(test_app, normal_user: UserWithLogin):
+    # the default cache client is in-process already, so no separate L1 copy is kept
+    _, headers = normal_user
+    principal_cache.clear()
+    assert test_app.get("/api/v1/users/me", headers=headers).status_code == 200
+    assert len(principal_cache._local) == 0
+
+
+def test_logout_invalidates_cached_principal(test_app, normal_user: UserWithLogin, count_queries):
+    user, headers = normal_user
+    assert test_app.get("/api/v1/users/me", headers=headers).status_code == 200
+    r2 = test_app.post("/api/v1/auth/logout", headers=headers)
+    assert r2.status_code == 200
+    login = test_app.post("/api/v1/auth/login", json={"username": user.username, "password": "userpw"})
+    assert login.status_code == 200, login.text
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    # the cached principal was dropped, so the next request loads the user again
+    with count_queries() as q:
+        assert test_app.get("/api/v1/users/me", headers=headers).status_code == 200
+    assert _user_selects(q.statements)
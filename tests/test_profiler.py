@@ -0,0 +1,45 @@
+import threading
+
+import pytest
+
+from app.profiler import ProfilerBusy, _running, sample_stacks
+from conftest import UserWithLogin
+
+
+def _busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_stacks_sees_other_threads():
+    stop = threading.Event()
+    t = threading.Thread(target=_busy_loop, args=(stop,), name="busy-worker")
+    t.start()
+    try:
+        result = sample_stacks(0.2, 0.005)
+    finally:
+        stop.set()
+        t.join()
+    assert result.samples > 5
+    lines = result.collapsed().splitlines()
+    busy = [line for line in lines if line.startswith("busy-worker;")]
+    assert busy and any("test_profiler:_busy_loop" in line for line in busy)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_only_one_profile_at_a_time():
+    _running.acquire()
+    try:
+        with pytest.raises(ProfilerBusy):
+            sample_stacks(0.01, 0.005)
+    finally:
+        _running.release()
+
+
+def test_profile_endpoint(test_app, admin_user: UserWithLogin, normal_user: UserWithLogin):
+    r = test_app.get("/api/v1/admin/profile", params={"seconds": 0.2, "interval_ms": 5}, headers=admin_user[1])
+    assert r.status_code == 200
+    assert int(r.headers["X-Profile-Samples"]) > 0
+    assert r.text
+    assert test_app.get("/api/v1/admin/profile", params={"seconds": 60}, headers=admin_user[1]).status_code == 422
+    assert test_app.get("/api/v1/admin/profile", headers=normal_user[1]).status_code == 403
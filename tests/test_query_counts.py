@@ -0,0 +1,75 @@
+"""Query budgets per endpoint: fail when an endpoint starts running more SQL statements or
+DB round trips (statements + commits) than it does today. When a change legitimately needs
+more queries, raise the budget in CASES in the same commit so the cost is reviewed."""
+import pytest
+
+from conftest import UserWithLogin
+
+# (name, method, path, body, auth, expected status, max statements, max round trips)
+# paths/bodies are formatted with the ids of the seeded data; auth is "admin", "user" or None
+CASES = [
+    ("books.create", "POST", "/api/v1/books/", {"id": "b-new", "title": "New"}, "admin", 201, 2, 3),
+    ("books.get", "GET", "/api/v1/books/{book}", None, None, 200, 1, 1),
+    ("books.list", "GET", "/api/v1/books/?title=Seed", None, None, 200, 2, 2),
+    ("books.update", "PUT", "/api/v1/books/{book}", {"id": "{book}", "title": "Upd"}, "admin", 200, 3, 4),
+    ("books.patch", "PATCH", "/api/v1/books/{book}", {"id": "{book}", "title": "Patched"}, "admin", 200, 3, 4),
+    ("books.delete", "DELETE", "/api/v1/books/{book}", None, "admin", 200, 2, 3),
+    ("books.like", "PATCH", "/api/v1/books/{book}/like?favourite=true", None, "user", 201, 5, 6),
+    ("books.cover_missing", "GET", "/api/v1/books/{book}/cover", None, None, 404, 1, 1),
+    ("reviews.create", "POST", "/api/v1/reviews/", {"id": "r-new", "book_id": "{book}", "user_id": "{user}", "title": "t"}, "user", 201, 2, 3),
+    ("reviews.get", "GET", "/api/v1/reviews/{review}", None, None, 200, 1, 1),
+    ("reviews.list_for_book", "GET", "/api/v1/reviews/book/{book}", None, None, 200, 3, 3),
+    ("reviews.delete", "DELETE", "/api/v1/reviews/{review}", None, "user", 200, 2, 3),
+    ("reviews.comments", "GET", "/api/v1/reviews/{review}/comments", None, None, 200, 3, 3),
+    ("reviews.add_comment", "POST", "/api/v1/reviews/{review}/comments", {"id": "c-new", "user_id": "{user}", "content": "x"}, None, 201, 3, 4),
+    ("reviews.like_comment", "POST", "/api/v1/reviews/{review}/comments/{comment}/like", None, "user", 200, 3, 4),
+    ("comments.create", "POST", "/api/v1/comments/", {"id": "c-new", "user_id": "{user}", "review_id": "{review}", "content": "x"}, "user", 201, 2, 3),
+    ("comments.get", "GET", "/api/v1/comments/{comment}", None, None, 200, 1, 1),
+    ("comments.delete", "DELETE", "/api/v1/comments/{comment}", None, None, 200, 2, 3),
+    ("comments.list_for_review", "GET", "/api/v1/comments/review/{review}/comments", None, None, 200, 3, 3),
+    ("orders.create", "POST", "/api/v1/orders/", {"id": "o-new", "user_id": "{user}"}, "user", 201, 2, 3),
+    ("orders.get", "GET", "/api/v1/orders/{order}", None, None, 200, 1, 1),
+    ("orders.set_item", "POST", "/api/v1/orders/{order}/items", {"book_id": "{book}", "quantity": 2}, "user", 201, 5, 6),
+    ("orders.pay", "POST", "/api/v1/orders/{order_with_item}/pay", None, "user", 200, 4, 5),
+    ("auth.login", "POST", "/api/v1/auth/login", {"username": "__test_user", "password": "userpw"}, None, 200, 2, 3),
+    ("auth.register", "POST", "/api/v1/auth/register", {"username": "qc_new", "email": "qc_new@example.com", "password": "pw"}, None, 201, 4, 6),
+    ("auth.refresh", "POST", "/api/v1/auth/refresh", {"refresh_token": "{refresh_token}"}, None, 200, 3, 4),
+    ("auth.logout", "POST", "/api/v1/auth/logout", None, "user", 200, 2, 3),
+]
+
+
+def _fill(value, ids: dict[str, str]):
+    if isinstance(value, str):
+        return value.format(**ids)
+    if isinstance(value, dict):
+        return {k: _fill(v, ids) for k, v in value.items()}
+    return value
+
+
+@pytest.fixture
+def seeded(test_app, admin_user: UserWithLogin, normal_user: UserWithLogin) -> dict[str, str]:
+    user_id = normal_user[0].id
+    ids = {"book": "qc-book", "review": "qc-review", "comment": "qc-comment", "order": "qc-order", "order_with_item": "qc-order2", "user": user_id}
+    admin_h, user_h = admin_user[1], normal_user[1]
+    assert test_app.post("/api/v1/books/", json={"id": ids["book"], "title": "Seed"}, headers=admin_h).status_code == 201
+    assert test_app.post("/api/v1/reviews/", json={"id": ids["review"], "book_id": ids["book"], "user_id": user_id}, headers=user_h).status_code == 201
+    assert test_app.post("/api/v1/comments/", json={"id": ids["comment"], "user_id": user_id, "review_id": ids["review"]}, headers=user_h).status_code == 201
+    for order_id in (ids["order"], ids["order_with_item"]):
+        assert test_app.post("/api/v1/orders/", json={"id": order_id, "user_id": user_id}, headers=user_h).status_code == 201
+    assert test_app.post(f"/api/v1/orders/{ids['order_with_item']}/items", json={"book_id": ids["book"], "quantity": 1}, headers=user_h).status_code == 201
+    r = test_app.post("/api/v1/auth/login", json={"username": "__test_user", "password": "userpw"})
+    ids["refresh_token"] = r.json()["refresh_token"]
+    # warm the principal cache so budgets measure the endpoint, not the first authentication
+    test_app.get("/api/v1/users/me", headers=user_h)
+    test_app.get("/api/v1/users/me", headers=admin_h)
+    return ids
+
+
+@pytest.mark.parametrize("name,method,path,body,auth,expected_status,max_statements,max_round_trips", CASES, ids=[c[0] for c in CASES])
+def test_endpoint_query_budget(test_app, admin_user, normal_user, seeded, count_queries, name, method, path, body, auth, expected_status, max_statements, max_round_trips):
+    headers = {"admin": admin_user[1], "user": normal_user[1]}.get(auth, {})
+    with count_queries() as counter:
+        r = test_app.request(method, _fill(path, seeded), json=_fill(body, seeded), headers=headers)
+    assert r.status_code == expected_status, r.text
+    assert len(counter.statements) <= max_statements, f"{name}: {counter!r}"
+    assert counter.round_trips <= max_round_trips, f"{name}: {counter!r}"
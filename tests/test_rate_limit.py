@@ -0,0 +1,76 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware.rate_limit_middleware import RateLimitMiddleware
+from app.main import create_app
+from app.security.jwt import create_access_token
+
+
+def _app(**limits) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, **limits)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return app
+
+
+def test_min_interval_rejects_with_retry_after(test_app):
+    app = create_app(enable_rate_limiting=True)
+    with TestClient(app) as client:
+        assert client.get("/api/v1/books/").status_code == 200
+        r = client.get("/api/v1/books/")
+        assert r.status_code == 429
+        assert int(r.headers["Retry-After"]) >= 1
+        # probes are exempt
+        assert client.get("/health").status_code == 200
+
+
+def test_window_exceeded_blacklists_client():
+    client = TestClient(_app(window=60.0, max_requests=3, min_interval=0.0, blacklist_duration=30.0))
+    for _ in range(3):
+        assert client.get("/ping").status_code == 200
+    r = client.get("/ping")
+    assert r.status_code == 429
+    assert r.headers["Retry-After"] == "30"
+    # still blacklisted on the next request
+    assert client.get("/ping").status_code == 429
+    assert client.get("/health").status_code == 200
+
+
+def test_user_limit_applies_across_ips():
+    app = _app(window=60.0, max_requests=2, min_interval=0.0, blacklist_duration=30.0)
+    headers = {"Authorization": f"Bearer {create_access_token(subject='rl-user')}"}
+    # different client addresses share the per-user budget
+    assert TestClient(app, client=("10.0.0.1", 1000)).get("/ping", headers=headers).status_code == 200
+    assert TestClient(app, client=("10.0.0.2", 1000)).get("/ping", headers=headers).status_code == 200
+    assert TestClient(app, client=("10.0.0.3", 1000)).get("/ping", headers=headers).status_code == 429
+    assert TestClient(app, client=("10.0.0.3", 1000)).get("/ping").status_code == 200
+
+
+def test_default_settings_do_not_limit_parallel_clients(test_app):
+    # the limiter is opt-in: back-to-back requests (e.g. a browser loading a page) all succeed
+    app = create_app()
+    with TestClient(app) as client:
+        for _ in range(5):
+            assert client.get("/api/v1/books/").status_code == 200
+
+
+def test_trusted_proxy_keys_clients_by_forwarded_for():
+    app = _app(window=60.0, max_requests=1, min_interval=0.0, blacklist_duration=30.0, trusted_proxies="10.0.0.0/8")
+    proxy = TestClient(app, client=("10.1.2.3", 1000))
+    # two clients behind the same proxy get separate budgets
+    assert proxy.get("/ping", headers={"X-Forwarded-For": "203.0.113.1"}).status_code == 200
+    assert proxy.get("/ping", headers={"X-Forwarded-For": "203.0.113.2"}).status_code == 200
+    # a spoofed left-most entry does not escape the limit: the proxy-appended address is used
+    assert proxy.get("/ping", headers={"X-Forwarded-For": "1.1.1.1, 203.0.113.1"}).status_code == 429
+    # the header is ignored from untrusted peers
+    direct = TestClient(app, client=("198.51.100.7", 1000))
+    assert direct.get("/ping", headers={"X-Forwarded-For": "203.0.113.9"}).status_code == 200
+    assert direct.get("/ping", headers={"X-Forwarded-For": "203.0.113.10"}).status_code == 429
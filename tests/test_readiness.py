@@ -0,0 +1,78 @@
+import pytest
+
+from app import readiness
+from app.config import settings
+
+
+def test_ready_reports_cached_checks(test_app):
+    response = test_app.get("/ready")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ready"
+    assert data["checks"]["db"]["status"] == "ok"
+    assert data["checks"]["db"]["required"] is True
+    # tests run without Redis
+    assert data["checks"]["redis"]["status"] == "skipped"
+    assert data["checks"]["storage"]["status"] in ("ok", "skipped")
+
+
+def test_ready_does_not_touch_dependencies(test_app, count_queries):
+    with count_queries() as q:
+        for _ in range(5):
+            assert test_app.get("/ready").status_code == 200
+    assert q.statements == []
+
+
+@pytest.mark.asyncio
+async def test_required_check_failure_makes_app_unready(monkeypatch):
+    async def broken():
+        raise ConnectionError("connection refused")
+
+    monkeypatch.setitem(readiness.CHECKS, "redis", broken)
+    monkeypatch.setattr(settings, "READINESS_REQUIRED", "db")
+    try:
+        await readiness.refresh_readiness()
+        ready, body = readiness.readiness()
+        # redis is reported but not required
+        assert body["checks"]["redis"]["status"] == "failed"
+        assert "connection refused" in body["checks"]["redis"]["detail"]
+
+        monkeypatch.setattr(settings, "READINESS_REQUIRED", "db,redis")
+        ready, body = readiness.readiness()
+        assert not ready
+        assert body["status"] == "not ready"
+    finally:
+        readiness._results.clear()
+
+
+@pytest.mark.asyncio
+async def test_slow_check_times_out_and_stale_results_are_unready(monkeypatch):
+    import asyncio
+
+    async def hangs():
+        await asyncio.sleep(10)
+
+    monkeypatch.setitem(readiness.CHECKS, "db", hangs)
+    monkeypatch.setattr(settings, "READINESS_CHECK_TIMEOUT", 0.05)
+    try:
+        await readiness.refresh_readiness()
+        ready, body = readiness.readiness()
+        assert not ready
+        assert "timed out" in body["checks"]["db"]["detail"]
+
+        monkeypatch.setitem(readiness.CHECKS, "db", lambda: asyncio.sleep(0))
+        await readiness.refresh_readiness()
+        assert readiness.readiness()[0]
+        # results the refresh loop stopped updating no longer count as healthy
+        for name, result in list(readiness._results.items()):
+            readiness._results[name] = readiness.CheckResult(result.status, result.latency_ms, result.checked_at - 3600, result.detail)
+        ready, body = readiness.readiness()
+        assert not ready
+        assert body["checks"]["db"]["detail"].startswith("stale")
+    finally:
+        readiness._results.clear()
+
+
+def test_ready_metrics(test_app):
+    text = test_app.get("/metrics").text
+    assert 'app_dependency_up{dependency="db"} 1.0' in text
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+from prometheus_client import CollectorRegistry
+
+from app import metrics
+from app.redis_client import _CircuitBreakerRedis, _MemoryRedis
+
+
+class FlakyClient:
+    def __init__(self):
+        self.fail = True
+        self.calls = 0
+
+    async def get(self, key: str):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("redis down")
+        return "from-redis"
+
+
+class SlowClient:
+    async def get(self, key: str):
+        await asyncio.sleep(1)
+        return "too-late"
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_falls_back_and_recovers():
+    metrics.set_registry(CollectorRegistry())
+    client = FlakyClient()
+    fallback = _MemoryRedis(max_bytes=1024)
+    await fallback.set("k", "from-local")
+    breaker = _CircuitBreakerRedis(client, fallback, failure_threshold=2, reset_timeout=0.05, call_timeout=0.5)
+
+    # failures are served from the fallback until the threshold opens the circuit
+    assert await breaker.get("k") == "from-local"
+    assert await breaker.get("k") == "from-local"
+    assert breaker.state == breaker.OPEN
+    # while open, Redis is not called at all
+    assert await breaker.get("k") == "from-local"
+    assert client.calls == 2
+
+    # after the reset timeout a single probe goes through and closes the circuit
+    await asyncio.sleep(0.06)
+    client.fail = False
+    assert await breaker.get("k") == "from-redis"
+    assert breaker.state == breaker.CLOSED
+
+    out = metrics.metrics_response().body.decode("utf-8")
+    assert 'app_redis_circuit_transitions_total{from_state="closed",to_state="open"} 1.0' in out
+    assert 'app_redis_circuit_transitions_total{from_state="half_open",to_state="closed"} 1.0' in out
+    assert "app_redis_circuit_state 0.0" in out
+
+
+@pytest.mark.asyncio
+async def test_breaker_times_out_slow_calls():
+    breaker = _CircuitBreakerRedis(SlowClient(), _MemoryRedis(max_bytes=1024), failure_threshold=1, reset_timeout=60, call_timeout=0.01)
+    assert await breaker.get("k") is None
+    assert breaker.state == breaker.OPEN
@@ -32,3 +32,36 @@ async def test_redis_get_hits_and_misses():
     out2 = metrics.metrics_response().body.decode('utf-8')
     assert 'result="hit"' in out2
 
+
+
+@pytest.mark.asyncio
+async def test_cache_ops_recorded_per_namespace():
+    reg = CollectorRegistry()
+    metrics.set_registry(reg)
+    instr = redis_client._InstrumentedRedis(redis_client._MemoryRedis(max_bytes=4096), cache_name="memory")
+    await instr.set("book:1", "x" * 100, ex=60)
+    assert await instr.get("book:1") == "x" * 100
+    assert await instr.get("principal:u1") is None
+    await instr.delete("book:1")
+    await instr.get("unknown-prefix:1")
+    out = metrics.metrics_response().body.decode('utf-8')
+    assert 'app_cache_operations_total{cache="memory",namespace="book",op="set",result="ok"} 1.0' in out
+    assert 'app_cache_operations_total{cache="memory",namespace="book",op="get",result="hit"} 1.0' in out
+    assert 'app_cache_operations_total{cache="memory",namespace="principal",op="get",result="miss"} 1.0' in out
+    assert 'app_cache_operations_total{cache="memory",namespace="other",op="get",result="miss"} 1.0' in out
+    assert 'app_cache_payload_bytes_sum{cache="memory",namespace="book",op="get"} 100.0' in out
+    assert 'app_cache_operation_seconds_count{cache="memory",namespace="book",op="delete"} 1.0' in out
+
+
+def test_get_redis_returns_long_lived_client():
+    assert redis_client.get_redis() is redis_client.get_redis()
+
+
+def test_key_builders_register_their_namespaces(monkeypatch):
+    monkeypatch.setattr(redis_client, "KNOWN_CACHE_NAMESPACES", set(redis_client.KNOWN_CACHE_NAMESPACES))
+    # the prefixes used by the app's key builders are labelled without a hand-kept list
+    assert {"book", "principal"} <= redis_client.KNOWN_CACHE_NAMESPACES
+    assert redis_client.cache_namespace("books_page:1") == "other"
+    prefix = redis_client.cache_key_prefix("books_page")
+    assert prefix == "books_page:"
+    assert redis_client.cache_namespace(f"{prefix}1") == "books_page"
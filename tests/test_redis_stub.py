@@ -1,8 +1,16 @@
 import asyncio
 
+import pytest
+
+from app.config import settings, CacheKind
 from app.redis_client import get_redis, _NullRedis, RedisLike
 
 
+@pytest.fixture(autouse=True)
+def null_cache_backend(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_BACKEND", CacheKind.NULL)
+
+
 def test_nullredis_implements_protocol():
     r = get_redis()
     assert isinstance(r, RedisLike)
@@ -0,0 +1,107 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+
+from app.server import _prepare_multiprocess_metrics, _rss_bytes
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_rss_of_own_process():
+    rss = _rss_bytes(os.getpid())
+    assert rss is None or rss > 1024 * 1024
+
+
+def test_multiprocess_dir_is_emptied(tmp_path, monkeypatch):
+    (tmp_path / "counter_123.db").write_bytes(b"stale")
+    (tmp_path / "keep.txt").write_text("x")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    _prepare_multiprocess_metrics()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["keep.txt"]
+
+
+def _start_server(tmp_path, workers: int) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "PYTHONPATH": SRC,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{tmp_path / 'server.db'}",
+        "REDIS_URL": "",
+        "RATE_LIMIT_ENABLED": "false",
+        "PASSWORD_HASH_WORKERS": "0",
+        "WORKER_MAX_REQUESTS": "2",
+        "PROMETHEUS_MULTIPROC_DIR": str(tmp_path / "metrics"),
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+        env=env, cwd=tmp_path, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 20
+    while True:
+        try:
+            httpx.get(f"{base}/health", timeout=1)
+            return proc, base
+        except httpx.TransportError:
+            if time.monotonic() >= deadline:
+                proc.kill()
+                proc.wait()
+                raise AssertionError("server did not start")
+            time.sleep(0.1)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="pre-fork mode needs os.fork")
+def test_prefork_workers_recycle_and_drain(tmp_path):
+    proc, base = _start_server(tmp_path, workers=2)
+    try:
+        # 2 workers x 2 requests each: the following requests are served by replacement workers
+        for _ in range(8):
+            assert httpx.get(f"{base}/health", timeout=10).status_code == 200
+            # uvicorn notices the request limit on its next tick; connecting inside that window races it
+            time.sleep(0.25)
+        metrics = httpx.get(f"{base}/metrics", timeout=10).text
+        # counters of recycled workers are still aggregated
+        assert 'app_http_requests_total{method="GET",route="/health",status="200"} 9.0' in metrics
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=15) == 0
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="pre-fork mode needs os.fork")
+def test_single_worker_is_replaced_after_max_requests(tmp_path):
+    proc, base = _start_server(tmp_path, workers=1)
+    try:
+        # the only worker retires after 2 requests; the supervisor must start a new one
+        for _ in range(3):
+            time.sleep(0.25)
+            deadline = time.monotonic() + 10
+            while True:
+                try:
+                    assert httpx.get(f"{base}/health", timeout=10).status_code == 200
+                    break
+                except httpx.TransportError:
+                    # the replacement may still be warming up
+                    assert time.monotonic() < deadline, "no worker took over"
+                    time.sleep(0.1)
+        assert proc.poll() is None
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=15) == 0
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
@@ -0,0 +1,58 @@
+from app.config import settings, ServerTimingMode
+from conftest import UserWithLogin
+
+
+def _phases(header: str) -> dict[str, str]:
+    return {part.split(";")[0].strip(): part for part in header.split(",")}
+
+
+def test_server_timing_off_by_default(test_app, admin_user: UserWithLogin):
+    assert "Server-Timing" not in test_app.get("/api/v1/users/me", headers=admin_user[1]).headers
+
+
+def test_server_timing_admin_only(test_app, admin_user: UserWithLogin, normal_user: UserWithLogin, monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_TIMING", ServerTimingMode.ADMIN)
+    assert test_app.post("/api/v1/books/", json={"id": "st-1", "title": "T"}, headers=admin_user[1]).status_code == 201
+    r = test_app.get("/api/v1/books/st-1", headers=admin_user[1])
+    # get_book is public; the admin is only known when auth runs, so no header here
+    assert "Server-Timing" not in r.headers
+    r = test_app.put("/api/v1/books/st-1", json={"id": "st-1", "title": "U"}, headers=admin_user[1])
+    phases = _phases(r.headers["Server-Timing"])
+    assert {"auth", "cache", "db", "render", "total"} <= phases.keys()
+    assert 'desc="' in phases["db"]
+    assert "Server-Timing" not in test_app.get("/api/v1/users/me", headers=normal_user[1]).headers
+
+
+def test_server_timing_all(test_app, monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_TIMING", ServerTimingMode.ALL)
+    r = test_app.get("/api/v1/books/")
+    phases = _phases(r.headers["Server-Timing"])
+    assert {"db", "render", "total"} <= phases.keys()
+    assert "auth" not in phases
+
+
+def test_sync_endpoints_run_in_threadpool(monkeypatch):
+    import threading
+
+    from fastapi import APIRouter, FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.api.routing import TimedAPIRoute
+    from app.middleware.server_timing_middleware import ServerTimingMiddleware
+
+    monkeypatch.setattr(settings, "SERVER_TIMING", ServerTimingMode.ALL)
+    router = APIRouter(route_class=TimedAPIRoute)
+
+    @router.get("/sync")
+    def sync_endpoint(q: int = 1):
+        return {"q": q, "thread": threading.get_ident()}
+
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware)
+    app.include_router(router)
+    with TestClient(app) as client:
+        r = client.get("/sync", params={"q": 3})
+    assert r.status_code == 200
+    assert r.json()["q"] == 3
+    assert r.json()["thread"] != threading.get_ident()
+    assert "render" in _phases(r.headers["Server-Timing"])
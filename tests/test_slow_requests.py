@@ -0,0 +1,69 @@
+import time
+
+from conftest import UserWithLogin
+
+
+def _wait_for(caplog, text: str, timeout: float = 2.0) -> list[str]:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        found = [r.getMessage() for r in caplog.records if text in r.getMessage()]
+        if found:
+            return found
+        time.sleep(0.02)
+    return []
+
+
+def test_fast_requests_are_not_logged(test_app, caplog):
+    with caplog.at_level("WARNING", logger="app.slow_requests"):
+        test_app.get("/api/v1/books/")
+    assert not [r for r in caplog.records if r.name == "app.slow_requests"]
+
+
+def test_slow_request_logs_statements(test_app, admin_user: UserWithLogin, caplog, monkeypatch):
+    from app.config import settings
+    monkeypatch.setattr(settings, "SLOW_REQUEST_SECONDS", 1e-9)
+    with caplog.at_level("WARNING", logger="app.slow_requests"):
+        test_app.get("/api/v1/books/", params={"title": "dune", "sort_by": "title"})
+    lines = _wait_for(caplog, "Slow request GET /api/v1/books/")
+    assert lines
+    message = lines[-1]
+    assert "query='title=dune&sort_by=title'" in message
+    assert "SQL statements" in message and "FROM books" in message
+    assert "plan:" not in message
+
+
+def test_slow_request_explains_selects(test_app, admin_user: UserWithLogin, caplog, monkeypatch):
+    from app.config import settings
+    assert test_app.post("/api/v1/books/", json={"id": "slow-1", "title": "Slow"}, headers=admin_user[1]).status_code == 201
+    monkeypatch.setattr(settings, "SLOW_REQUEST_SECONDS", 1e-9)
+    monkeypatch.setattr(settings, "SLOW_REQUEST_EXPLAIN", True)
+    with caplog.at_level("WARNING", logger="app.slow_requests"):
+        test_app.get("/api/v1/books/slow-1")
+        lines = _wait_for(caplog, "Slow request GET /api/v1/books/slow-1")
+    assert lines
+    # SQLite's EXPLAIN QUERY PLAN reports a primary-key lookup for the by-id query
+    assert "plan:" in lines[-1] and "SEARCH books" in lines[-1]
+
+
+def test_explain_is_not_recorded_as_application_queries(test_app, admin_user: UserWithLogin, caplog, monkeypatch):
+    from prometheus_client import CollectorRegistry
+
+    from app import metrics
+    from app.config import settings
+    assert test_app.post("/api/v1/books/", json={"id": "slow-2", "title": "Slow"}, headers=admin_user[1]).status_code == 201
+    monkeypatch.setattr(settings, "SLOW_REQUEST_SECONDS", 1e-9)
+    monkeypatch.setattr(settings, "SLOW_REQUEST_EXPLAIN", True)
+    reg = CollectorRegistry()
+    metrics.set_registry(reg)
+    with caplog.at_level("WARNING", logger="app.slow_requests"):
+        test_app.get("/api/v1/books/slow-2")
+        lines = _wait_for(caplog, "Slow request GET /api/v1/books/slow-2")
+    assert lines and "plan:" in lines[-1]
+    out = metrics.metrics_response().body.decode("utf-8")
+    assert "EXPLAIN" not in out
+    # only the request's own statements were observed
+    observed = sum(
+        s.value for m in reg.collect() if m.name == "app_db_statement_seconds"
+        for s in m.samples if s.name.endswith("_count")
+    )
+    assert f"{int(observed)} SQL statements" in lines[-1]
@@ -0,0 +1,52 @@
+import json
+
+from app.tracing import flush_traces, is_sampled, trace_id_for
+from conftest import UserWithLogin
+
+
+def _exported(path) -> list[dict]:
+    flush_traces()
+    if not path.exists():
+        return []
+    return [span for line in path.read_text().splitlines() for span in json.loads(line)]
+
+
+def test_trace_id_from_correlation_id():
+    cid = "0123456789abcdef0123456789abcdef"
+    assert trace_id_for(cid) == cid
+    derived = trace_id_for("order-42")
+    assert len(derived) == 32 and derived == trace_id_for("order-42")
+    assert is_sampled(cid, 1.0) and not is_sampled(cid, 0.0)
+
+
+def test_request_spans_are_exported(test_app, admin_user: UserWithLogin, monkeypatch, tmp_path):
+    from app.config import settings
+    out = tmp_path / "traces.jsonl"
+    assert test_app.post("/api/v1/books/", json={"id": "tr-1", "title": "Traced"}, headers=admin_user[1]).status_code == 201
+    monkeypatch.setattr(settings, "TRACING_ENDPOINT", str(out))
+    monkeypatch.setattr(settings, "TRACING_SAMPLE_RATE", 1.0)
+    cid = "feedfacefeedfacefeedfacefeedface"
+    r = test_app.get("/api/v1/books/tr-1", headers={**admin_user[1], "X-Correlation-ID": cid})
+    assert r.status_code == 200
+    spans = _exported(out)
+    assert spans and {s["traceId"] for s in spans} == {cid}
+    root = next(s for s in spans if "parentId" not in s)
+    assert root["kind"] == "SERVER" and root["name"] == "GET /api/v1/books/{book_id}"
+    assert root["tags"]["http.status_code"] == "200" and root["tags"]["correlation_id"] == cid
+    assert {"db.query", "cache.get"} <= {s["name"] for s in spans}
+    by_id = {s["id"]: s for s in spans}
+    assert all(s["parentId"] in by_id for s in spans if s is not root)
+    assert any(s["tags"].get("db.statement", "").startswith("SELECT") for s in spans if s["name"] == "db.query")
+
+    assert test_app.get("/api/v1/users/me", headers=admin_user[1]).status_code == 200
+    auth = [s for s in _exported(out) if s["name"] == "auth.get_current_user"]
+    assert auth and auth[0]["traceId"] != cid
+
+
+def test_unsampled_requests_export_nothing(test_app, monkeypatch, tmp_path):
+    from app.config import settings
+    out = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(settings, "TRACING_ENDPOINT", str(out))
+    monkeypatch.setattr(settings, "TRACING_SAMPLE_RATE", 0.0)
+    test_app.get("/api/v1/books/")
+    assert _exported(out) == []